@@ -7,12 +7,14 @@ For more details on the several modes of operations and command line parameters
 """
 import sys
 import os
-from collections import namedtuple, OrderedDict
+import functools
+import multiprocessing
+from collections import namedtuple, OrderedDict, Counter
 
 # ===================================================================
 
 import crds
-from crds.core import log, config, utils, timestamp, cmdline, heavy_client
+from crds.core import log, config, utils, timestamp, cmdline, heavy_client, rmap
 from crds import diff, matches
 from . import table_effects, headers
 from crds.client import api
@@ -26,6 +28,12 @@ MAX_DATE = "9999-01-01 23:59:59"
 
 UpdateTuple = namedtuple("UpdateTuple", ["instrument", "filekind", "old_reference", "new_reference"])
 
+# Results of processing one dataset in a --processes worker,  merged back by the parent in dataset order.
+ShardResult = namedtuple("ShardResult", ["dataset", "events", "updates", "kill_list", "header",
+                                         "log_counts", "stats", "memo_counts", "active_header"])
+
+SHARD_SIZE = 100   # datasets per worker task for --processes
+
 # ============================================================================
 
 
@@ -222,6 +230,16 @@ amount of informational and debug output.  Verbosity ranges from 0..100 where 0
 means "no debug output" and 100 means "all debug output".  50 is the default
 for --verbose.
 
+....................
+Parallel Processing
+....................
+
+crds.bestrefs --processes N shards dataset ids across N worker processes.
+Each worker loads the pickled contexts once and computes bestrefs for its
+share of datasets while the parent continues to fetch parameters.  The parent
+replays worker log messages,  error tracking, and results in dataset order so
+output is the same as a serial run.
+
 .........
 Bad Files
 .........
@@ -305,6 +323,10 @@ than errors as the default.
         self.datasets_since = self.args.datasets_since
 
         self.active_header = None   # new or old header last processed with bestrefs
+
+        self.shard_events = None    # per-dataset deferred log events in a --processes worker
+
+        self.batched_bestrefs = {}  # { (context, dataset) : (reftypes, bestrefs) } from batch_bestrefs()
     def complex_init(self):
         """Complex init tasks run inside any --pdb environment,  also unfortunately --profile."""
 
@@ -399,8 +421,7 @@ than errors as the default.
         Returns { instrument: EXPTIME, ... }
         """
         datasets_since = {}
-        self.oldctx = crds.get_pickled_mapping(self.old_context)   # reviewed
-        self.newctx = crds.get_pickled_mapping(self.new_context)   # reviewed
+        self.oldctx, self.newctx = rmap.load_contexts([self.old_context, self.new_context])
         for instrument in self.oldctx.selections:
             old_imap = self.oldctx.get_imap(instrument)
             new_imap = self.newctx.get_imap(instrument)
@@ -537,6 +558,9 @@ than errors as the default.
         self.add_argument("--eliminate-duplicate-cases", action="store_true",
                           help="Categorize unique bestrefs results as errors to determine representative test cases...  Replaces normal error counts with coverage counts and ids.")
 
+        self.add_argument("--processes", type=int, default=1, metavar="N",
+                          help="Compute bestrefs using N worker processes,  merging results in dataset order.")
+
         cmdline.UniqueErrorsMixin.add_args(self)
 
     def setup_contexts(self):
@@ -668,11 +692,19 @@ than errors as the default.
         """Compute bestrefs for datasets."""
         # Finish __init__() inside --pdb
         if self.complex_init():
-            for i, dataset in enumerate(self.new_headers):
-                if i != 0 and i % 1000 == 0:
-                    log.verbose(self.get_stat("datasets"), "sources processed", verbosity=5)
-                self.process(dataset)
-            self.post_processing()
+            try:
+                if self.args.processes > 1:
+                    self.process_sharded()
+                elif self.batch_size() > 1:
+                    self.process_batched()
+                else:
+                    for i, dataset in enumerate(self.new_headers):
+                        if i != 0 and i % 1000 == 0:
+                            log.verbose(self.get_stat("datasets"), "sources processed", verbosity=5)
+                        self.process(dataset)
+                self.post_processing()
+            finally:
+                self.close_headers()
         self.report_stats()
         if self.args.eliminate_duplicate_cases:
             log.warning("Running in --eliminate-duplicate-cases mode;  even successful bestrefs are categorized as errors for analysis.")
@@ -681,6 +713,22 @@ than errors as the default.
         log.standard_status()
         return log.errors()
 
+    def close_headers(self):
+        """Release the resources,  e.g. header prefetch threads,  held by the header generators."""
+        self.new_headers.close()
+        if self.old_headers is not None and self.old_headers is not self.new_headers:
+            self.old_headers.close()
+
+    def report_stats(self):
+        """Report the hits and misses of the rmap bestref memos along with the standard --stats."""
+        if self.args.stats and not self._already_reported_stats:
+            hits, misses = rmap.BESTREF_MEMO_COUNTS["hits"], rmap.BESTREF_MEMO_COUNTS["misses"]
+            super(BestrefsScript, self).report_stats()
+            lookups = hits + misses
+            self.stats.msg(utils.human_format_number(hits), "bestref memo hits",
+                           utils.human_format_number(misses), "misses",
+                           "%.1f%%" % (100.0 * hits / lookups if lookups else 0.0), "hit rate")
+
     def process(self, dataset):
         """Process best references for `dataset`,  printing dataset output,  collecting stats, trapping exceptions."""
         with log.error_on_exception("Failed processing", repr(dataset)):
@@ -698,6 +746,257 @@ than errors as the default.
             self.increment_stat("datasets", 1)
             self._process(dataset)
 
+    def batch_size(self):
+        """Return the number of datasets to look up together.   Verbose lookups are done one
+        dataset at a time so that their output stays with the dataset being processed.
+        """
+        return 1 if log.get_verbose() >= 50 else config.BESTREFS_BATCH_SIZE.get()
+
+    def process_batched(self):
+        """Process self.new_headers in batches of CRDS_BESTREFS_BATCH_SIZE datasets whose best
+        references are looked up together by batch_bestrefs().   The log output of iterating
+        ahead over the headers is deferred and replayed in dataset order so that output is the
+        same as the one-at-a-time loop in main().
+        """
+        sources = iter(self.new_headers)
+        processed = 0
+        trailing = None
+        try:
+            while trailing is None:
+                items, trailing = self._gather_wave(sources, self.batch_size())
+                self.batch_bestrefs([(dataset, new_header, old_header)
+                                     for (dataset, _events, new_header, old_header) in items])
+                for dataset, events, new_header, old_header in items:
+                    self._replay_events(events)
+                    if processed != 0 and processed % 1000 == 0:
+                        log.verbose(self.get_stat("datasets"), "sources processed", verbosity=5)
+                    processed += 1
+                    self._keep_header(self.new_headers, dataset, new_header)
+                    self._keep_header(self.old_headers, dataset, old_header)
+                    self.process(dataset)
+        finally:
+            self.batched_bestrefs = {}
+        self._replay_events(trailing)
+
+    def _keep_header(self, the_headers, dataset, header):
+        """Put back `header` for `dataset` if iterating ahead dropped it from `the_headers`,
+        e.g. when InstrumentHeaderGenerator moved on to the next segment.
+        """
+        if the_headers is not None and header is not None:
+            the_headers.headers.setdefault(dataset, header)
+
+    def batch_bestrefs(self, items):
+        """Look up the best references of the (dataset, new_header, old_header) `items` together,
+        with one call to heavy_client.hv_best_references_many() per context and set of reference
+        types,  remembering the results for get_bestrefs() as each dataset is processed.
+
+        Batches run silently:  datasets whose lookups log errors or warnings are left for
+        get_bestrefs() to repeat in dataset order,  and the log counts are restored afterwards.
+        """
+        self.batched_bestrefs = {}
+        if self.batch_size() <= 1:
+            return
+        lookups = [(self.new_context, 1)]
+        if self.compare_prior and self.args.old_context:
+            lookups.append((self.old_context, 1 if self.old_headers is self.new_headers else 2))
+        counts = log.THE_LOGGER.status() + (log.THE_LOGGER.debugs,)
+        try:
+            with log.deferred_log([]):
+                for context, column in lookups:
+                    self._batch_bestrefs(context, [(item[0], item[column]) for item in items])
+        finally:
+            (log.THE_LOGGER.errors, log.THE_LOGGER.warnings,
+             log.THE_LOGGER.infos, log.THE_LOGGER.debugs) = counts
+
+    def _batch_bestrefs(self, context, items):
+        """Look up the best references of the (dataset, raw header) `items` for `context`."""
+        mode, final_context = heavy_client.get_processing_mode(self.observatory, context)
+        if mode != "local":
+            return
+        groups = {}
+        for dataset, raw_header in items:
+            if (raw_header is None or isinstance(raw_header, str) or dataset in self.drop_ids or
+                    (self.only_ids and dataset not in self.only_ids)):
+                continue
+            try:
+                header = headers.add_instrument(dict(raw_header))
+                instrument = utils.header_to_instrument(header)
+                reftypes = self.determine_reftypes(instrument, dataset, context, header)
+            except Exception:
+                continue
+            if reftypes is not None:
+                groups.setdefault(tuple(reftypes), {})[dataset] = header
+        for reftypes, group in groups.items():
+            try:
+                found = heavy_client.hv_best_references_many(final_context, group, list(reftypes), skip_logged=True)
+            except Exception:
+                continue
+            for dataset, bestrefs in found.items():
+                self.batched_bestrefs[(context, dataset)] = (
+                    list(reftypes), {key.upper(): value for (key, value) in bestrefs.items()})
+
+    def process_sharded(self):
+        """Process self.new_headers using --processes worker processes.   Headers are fetched
+        by the parent and sent to the workers in shards of SHARD_SIZE datasets.   Worker log
+        output,  tracked errors,  stats,  and results are merged back one dataset at a time in
+        iteration order so that output is the same as the serial loop in main().
+        """
+        contexts = [] if self.args.remote_bestrefs else \
+            [context for context in (self.new_context, self.old_context) if context]
+        wave_size = self.args.processes * SHARD_SIZE * 2
+        sources = iter(self.new_headers)
+        processed = 0
+        pending = trailing = None
+        pool = multiprocessing.get_context("spawn").Pool(
+            self.args.processes, _init_shard_worker,
+            (self, config.get_crds_state(), log.get_exception_trap(), contexts))
+        try:
+            while trailing is None:
+                items, trailing = self._gather_wave(sources, wave_size)
+                submitted = None
+                if items:   # workers compute this wave while the previous one is merged
+                    shards = [[(dataset, new_header, old_header)
+                               for (dataset, _events, new_header, old_header) in items[i:i+SHARD_SIZE]]
+                              for i in range(0, len(items), SHARD_SIZE)]
+                    submitted = (items, pool.map_async(_process_shard, shards))
+                if pending:
+                    processed = self._merge_wave(pending, processed)
+                pending = submitted
+            if pending:
+                processed = self._merge_wave(pending, processed)
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+        self._replay_events(trailing)
+
+    def _gather_wave(self, sources, size):
+        """Advance `sources` by up to `size` datasets,  deferring the log output of iteration.
+
+        Returns ([(dataset, events, new_header, old_header), ...], trailing_events)
+        where trailing_events is None until `sources` is exhausted.
+        """
+        items = []
+        while len(items) < size:
+            events = []
+            with log.deferred_log(events):
+                try:
+                    dataset = next(sources)
+                except StopIteration:
+                    return items, events
+                new_header = _raw_header(self.new_headers, dataset)
+                if self.old_headers is not None and self.old_headers is not self.new_headers:
+                    old_header = _raw_header(self.old_headers, dataset)
+                else:
+                    old_header = None
+            items.append((dataset, events, new_header, old_header))
+        return items, None
+
+    def _merge_wave(self, pending, processed):
+        """Wait for the worker results of `pending` wave and merge them in dataset order,
+        interleaving the deferred iteration output and progress messages of the serial loop.
+        Return the updated count of `processed` sources.
+        """
+        items, async_results = pending
+        results = [result for shard in async_results.get() for result in shard]
+        for (_dataset, events, _new, _old), result in zip(items, results):
+            self._replay_events(events)
+            if processed != 0 and processed % 1000 == 0:
+                log.verbose(self.get_stat("datasets"), "sources processed", verbosity=5)
+            processed += 1
+            self._merge_result(result)
+        return processed
+
+    # Attributes which are not sent to --processes workers,  see __setstate__().
+    _unshared_attrs = ["parser", "stats", "ue_mixin", "error_on_exception", "pickle_headers",
+                       "oldctx", "newctx", "updates", "kill_list", "batched_bestrefs"]
+
+    def __getstate__(self):
+        """Return the state of a script sent to its --processes workers."""
+        state = dict(self.__dict__)
+        for name in self._unshared_attrs:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        """Recreate a script in a --processes worker with empty results and error tracking."""
+        self.__dict__.update(state)
+        self.parser = self.pickle_headers = self.oldctx = self.newctx = None
+        self.stats = utils.TimingStats()
+        self.updates = OrderedDict()
+        self.kill_list = OrderedDict()
+        self.batched_bestrefs = {}
+        cmdline.UniqueErrorsMixin.__init__(self)
+
+    def process_shard(self, shard):
+        """Worker side of process_sharded():  process each (dataset, new_header, old_header)
+        of `shard` and return a list of ShardResult.
+        """
+        self.new_headers.headers = { dataset : new_header for (dataset, new_header, _old) in shard
+                                     if new_header is not None }
+        if self.old_headers is not None and self.old_headers is not self.new_headers:
+            self.old_headers.headers = { dataset : old_header for (dataset, _new, old_header) in shard
+                                         if old_header is not None }
+        memo_counts = Counter(rmap.BESTREF_MEMO_COUNTS)
+        self.batch_bestrefs(shard)
+        memo_counts = rmap.BESTREF_MEMO_COUNTS - memo_counts
+        try:
+            results = [self._process_in_shard(dataset) for (dataset, _new, _old) in shard]
+        finally:
+            self.batched_bestrefs = {}
+        if results:   # report the batched lookups with the first dataset
+            results[0] = results[0]._replace(memo_counts=results[0].memo_counts + memo_counts)
+        return results
+
+    def _process_in_shard(self, dataset):
+        """Run process() on `dataset` in a worker,  capturing its effects as a ShardResult."""
+        self.shard_events = _SHARD_HANDLER.events = []
+        log_counts = log.THE_LOGGER.status() + (log.THE_LOGGER.debugs,)
+        stats = Counter(self.stats.counts)
+        memo_counts = Counter(rmap.BESTREF_MEMO_COUNTS)
+        self.process(dataset)
+        log_counts = tuple(after - before for (after, before) in
+                           zip(log.THE_LOGGER.status() + (log.THE_LOGGER.debugs,), log_counts))
+        return ShardResult(
+            dataset, self.shard_events, self.updates.pop(dataset, None), self.kill_list.pop(dataset, None),
+            self.new_headers.headers.get(dataset) if self.args.update_pickle else None,
+            log_counts, self.stats.counts - stats, rmap.BESTREF_MEMO_COUNTS - memo_counts,
+            self.active_header if self.args.print_error_headers else None)
+
+    def _merge_result(self, result):
+        """Replay the log output and errors of worker ShardResult `result` and merge its updates."""
+        self._replay_events(result.events)
+        errors, warnings, infos, debugs = result.log_counts
+        log.THE_LOGGER.errors += errors
+        log.THE_LOGGER.warnings += warnings
+        log.THE_LOGGER.infos += infos
+        log.THE_LOGGER.debugs += debugs
+        self.stats.counts.update(result.stats)
+        rmap.BESTREF_MEMO_COUNTS.update(result.memo_counts)
+        if result.header is not None:
+            self.new_headers.headers[result.dataset] = result.header
+        if result.updates:
+            self.updates[result.dataset] = result.updates
+        if result.kill_list:
+            self.kill_list[result.dataset] = result.kill_list
+        self.active_header = result.active_header
+
+    def _replay_events(self, events):
+        """Re-issue log records, tracked errors, and deferred method calls from a worker."""
+        for event in events:
+            if event[0] == "record":
+                log.THE_LOGGER.logger.handle(event[1])
+            elif event[0] == "track":
+                cmdline.UniqueErrorsMixin.log_and_track_error(self, *event[1], **event[2])
+            else:   # "call"
+                self.active_header = event[4]
+                getattr(self, event[1])(*event[2], **event[3])
+
+    def defer_call(self, name, *args, **keys):
+        """In a worker,  record a call to method `name` for the parent to make in dataset order."""
+        active_header = self.active_header if self.args.print_error_headers else None
+        self.shard_events.append(("call", name, args, keys, active_header))
+
     def _process(self, dataset):
         """Core best references,  add to update tuples."""
         self.active_header = new_header = self.new_headers.get_lookup_parameters(dataset)
@@ -730,6 +1029,9 @@ than errors as the default.
             reftypes = self.determine_reftypes(instrument, dataset, context, header)
             if reftypes is None:
                 return {}
+        batched = self.batched_bestrefs.pop((context, dataset), None)
+        if batched is not None and batched[0] == reftypes:
+            return batched[1]
         with log.augment_exception("Failed computing bestrefs for data", repr(dataset),
                                    "with respect to", repr(context)):
             bestrefs = crds.getrecommendations(
@@ -908,7 +1210,10 @@ than errors as the default.
         parts = dataset.split(":")
         if parts[0] == parts[-1]:  # no guarantee len() == 2
             dataset = parts[0]
-        super(BestrefsScript, self).log_and_track_error(dataset, *pars, **keys)
+        if self.shard_events is not None:   # --processes worker,  tracked by the parent in dataset order
+            self.shard_events.append(("track", (dataset,) + pars, keys))
+        else:
+            super(BestrefsScript, self).log_and_track_error(dataset, *pars, **keys)
         if self.args.print_error_headers:
             log.info("Header for", repr(dataset) + ":\n", log.PP(self.active_header))
 
@@ -1054,6 +1359,41 @@ def cleanpath(name):
 
 # ============================================================================
 
+# Worker process state for BestrefsScript.process_sharded(),  set by _init_shard_worker().
+_SHARD_SCRIPT = None
+_SHARD_HANDLER = None
+
+def _raw_header(generator, dataset):
+    """Return the unconditioned header for `dataset` from `generator`,  or None if it fails."""
+    try:
+        return generator._header(dataset)
+    except Exception:
+        return None
+
+def _init_shard_worker(script, crds_state, exception_trap, contexts):
+    """Pool initializer:  adopt the parent's BestrefsScript `script`,  CRDS configuration
+    `crds_state`,  and `exception_trap`,  load `contexts` once,  and defer worker log output
+    to the parent.
+    """
+    global _SHARD_SCRIPT, _SHARD_HANDLER
+    config.set_crds_state(crds_state)
+    log.set_exception_trap(exception_trap)
+    _SHARD_SCRIPT = script
+    logger = log.THE_LOGGER.logger
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    _SHARD_HANDLER = log.DeferredLogHandler()
+    logger.addHandler(_SHARD_HANDLER)
+    for context in contexts:
+        heavy_client.get_pickled_mapping(context)   # reviewed
+    _SHARD_SCRIPT.warn_bad_context = functools.partial(_SHARD_SCRIPT.defer_call, "warn_bad_context")
+
+def _process_shard(shard):
+    """Pool worker function,  see BestrefsScript.process_shard()."""
+    return _SHARD_SCRIPT.process_shard(shard)
+
+# ============================================================================
+
 def assign_bestrefs(filepaths, context=None, reftypes=(),
                     sync_references=False, verbosity=-1):
     """Assign best references to FITS files specified by `filepaths`
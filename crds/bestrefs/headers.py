@@ -7,11 +7,12 @@ For more details on the several modes of operations and command line parameters
 """
 import json
 import gc
+from concurrent import futures
 
 # ===================================================================
 
 import crds
-from crds.core import log, utils, heavy_client
+from crds.core import log, utils, heavy_client, config
 from crds.core.exceptions import CrdsError
 from crds import data_file, matches
 from crds.client import api
@@ -44,13 +45,23 @@ class HeaderGenerator:
         self.headers = {}
         self._datasets_since = datasets_since
 
+    def __getstate__(self):
+        """Header generators are pickled to --processes workers without their headers,
+        which the workers receive with each shard of datasets instead.
+        """
+        state = dict(self.__dict__)
+        state["headers"] = {}
+        state["sources"] = None if self.sources is None else list(self.sources)
+        return state
+
     def __iter__(self):
         """Return the sources from self with EXPTIME >= self.datasets_since."""
-        for source in sorted(self.sources):
+        for source in self.iter_sources():
             with log.error_on_exception("Failed loading source", repr(source),
                                         "from", repr(self.__class__.__name__)):
-                instrument = utils.header_to_instrument(self.header(source))
-                exptime = matches.get_exptime(self.header(source))
+                header = self.header(source)
+                instrument = utils.header_to_instrument(header)
+                exptime = matches.get_exptime(header)
                 since = self.datasets_since(instrument)
                 # since == None when no command line argument given.
                 if since is None or exptime >= since:
@@ -60,6 +71,13 @@ class HeaderGenerator:
                                 "with EXPTIME =", repr(exptime),
                                 "< --datasets-since =", repr(since))
 
+    def iter_sources(self):
+        """Return the sources of self in processing order."""
+        return sorted(self.sources)
+
+    def close(self):
+        """Release any resources held for fetching headers.   Nominally nothing."""
+
     def datasets_since(self, instrument):
         """Return the earliest dataset processed cut-off date for `instrument`.
 
@@ -256,18 +274,28 @@ def _normalize_jwst_id_part(part):
         return part
 
 class InstrumentHeaderGenerator(HeaderGenerator):
-    """Generates lookup parameters and historical best references from a list of instrument names.  Server/DB based."""
+    """Generates lookup parameters and historical best references from a list of instrument names.  Server/DB based.
+
+    While one segment of headers is being processed,  the next CRDS_HEADER_PREFETCH_SEGMENTS segments are
+    fetched by background threads.   At most that many segments are held in addition to the current one.
+    """
 
     def __init__(self, context, instruments, datasets_since, save_pickles, server_info):
         """"Contact the CRDS server and get headers for the list of `instruments` names with respect to `context`."""
         super(InstrumentHeaderGenerator, self).__init__(context, [], datasets_since)
         self.instruments = instruments
         self.sources = self.determine_source_ids()
+        self._source_positions = {}
+        for (i, source) in enumerate(self.sources):
+            self._source_positions.setdefault(source, i)   # first position wins for duplicate ids
         self.save_pickles = save_pickles
         try:
             self.segment_size = server_info.max_headers_per_rpc
         except Exception:
             self.segment_size = 5000
+        self.prefetch_segments = config.HEADER_PREFETCH_SEGMENTS.get()
+        self._prefetched = {}    # { segment index : Future({ dataset_id : header }) }
+        self._executor = None
 
     def determine_source_ids(self):
         """Return the dataset ids for all instruments."""
@@ -285,6 +313,12 @@ class InstrumentHeaderGenerator(HeaderGenerator):
             source_ids.extend(instr_ids)
         return sorted(source_ids)  # sort is needed to match generic __iter__() sort. assumes instruments don't shuffle
 
+    def iter_sources(self):
+        """Return the already sorted dataset ids,  streaming headers segment by segment as
+        each new segment is first accessed by header().
+        """
+        return iter(self.sources)
+
     def _header(self, source):
         """Return the header associated with dataset id `source`,  fetching the surround segment of
         headers if `source` is not already in the cached set of headers.
@@ -296,21 +330,67 @@ class InstrumentHeaderGenerator(HeaderGenerator):
     def fetch_source_segment(self, source):
         """Return the segment of dataset ids which surrounds id `source`."""
         try:
-            index = self.sources.index(source) // self.segment_size
-        except ValueError as exc:
+            index = self._source_positions[source] // self.segment_size
+        except KeyError as exc:
             raise CrdsError("Unknown dataset id " + repr(source)) from exc
         lower = index * self.segment_size
-        upper = (index + 1) * self.segment_size
-        segment_ids = self.sources[lower:upper]
+        segment_ids = self.segment_ids(index)
         log.verbose("Dumping", len(segment_ids), "datasets from indices", lower, "to",
                     lower + len(segment_ids), verbosity=20)
-        dumped_headers = api.get_dataset_headers_by_id(self.context, segment_ids)
+        pending = self._prefetched.pop(index, None)
+        self.prefetch(index)
+        if pending is not None:
+            dumped_headers = pending.result()
+        else:
+            dumped_headers = api.get_dataset_headers_by_id(self.context, segment_ids)
         log.verbose("Dumped", len(dumped_headers), "datasets", verbosity=20)
         if self.save_pickles:  # keep all headers,  causes memory problems with multiple instruments on ~8G ram.
             self.headers.update(dumped_headers)
         else:  # conserve memory by keeping only the last N headers
             self.headers = dumped_headers
 
+    def segment_ids(self, index):
+        """Return the dataset ids of segment number `index`."""
+        return self.sources[index * self.segment_size : (index + 1) * self.segment_size]
+
+    def prefetch(self, index):
+        """Start background fetches for the segments following segment `index`,  discarding any
+        read-ahead which is no longer within self.prefetch_segments of `index`.
+        """
+        ahead = range(index + 1, index + 1 + self.prefetch_segments)
+        for stale in [i for i in self._prefetched if i not in ahead]:
+            self._prefetched.pop(stale).cancel()
+        if self.prefetch_segments <= 0:
+            return
+        if self._executor is None:
+            self._executor = futures.ThreadPoolExecutor(max_workers=self.prefetch_segments)
+        for i in ahead:
+            if i * self.segment_size >= len(self.sources):
+                break
+            if i not in self._prefetched:
+                self._prefetched[i] = self._executor.submit(
+                    api.get_dataset_headers_by_id, self.context, self.segment_ids(i))
+
+    def __getstate__(self):
+        """Drop the prefetch threads,  which are restarted if needed."""
+        state = super(InstrumentHeaderGenerator, self).__getstate__()
+        state["_prefetched"] = {}
+        state["_executor"] = None
+        return state
+
+    def close(self):
+        """Cancel any outstanding read-ahead and shut down the prefetch threads."""
+        for pending in self._prefetched.values():
+            pending.cancel()
+        self._prefetched = {}
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __del__(self):
+        if hasattr(self, "_executor"):   # __init__ may have failed before the prefetch state was defined
+            self.close()
+
 
 class PickleHeaderGenerator(HeaderGenerator):
     """Generates lookup parameters and historical best references from a list of pickle files (or .json files)
@@ -9,7 +9,11 @@ a dataset to be processed.
 
 If the rows are different,  then the dataset should be reprocessed.
 """
-from crds.core import rmap, log
+from collections import Counter
+
+import numpy as np
+
+from crds.core import rmap, log, utils, config
 from crds.io import tables
 from crds.client import api
 
@@ -155,15 +159,84 @@ def mode_select(table, constraints):
     -------
     The next row that matches.
     """
-    for row in table.rows:
-        selected = True
-        for field in constraints:
-            field_index = table.colnames.index(field.upper())
-            (value, cmpfn, args) = constraints[field]
-            selected = selected & cmpfn(str_to_number(row[field_index]), value, args)
+    for row_no in ModeIndex(table, constraints).select(constraints):
+        yield table.rows[row_no]
+
+class ModeIndex:
+    """Groups the rows of `table` by the distinct values of the columns named by `fields`
+    so that selecting rows applies each comparison function once per distinct column value
+    rather than once per row.   Values are converted by str_to_number() exactly as they are
+    for row by row selection,  so any comparison function,  including wildcards handled by
+    cmp_equal(),  selects the same rows.
+
+    >>> from crds.io.tables import TableRows
+    >>> class Table:
+    ...     colnames = ["OPT_ELEM", "CENWAVE"]
+    ...     rows = TableRows([np.array(["G130M", "G160M", "ANY", "G130M"]), np.array([1291, 1600, 1600, 1300])])
+    >>> index = ModeIndex(Table, ["opt_elem", "cenwave"])
+    >>> constraints = {"opt_elem" : ("G130M", cmp_equal, ("ANY",)), "cenwave" : (1600, cmp_equal, ("ANY",))}
+    >>> index.select(constraints)
+    [2]
+    >>> constraints["cenwave"] = ([1291, 1300], cmp_equal, ())
+    >>> index.select(constraints)
+    [0, 3]
+    """
+    def __init__(self, table, fields):
+        self.nrows = len(table.rows)
+        self.columns = {}
+        for field in fields:
+            column = table.rows.arrays[table.colnames.index(field.upper())]
+            self.columns[field] = self._distinct_values(column)
+
+    @staticmethod
+    def _distinct_values(column):
+        """Return (codes, values) where values[codes[i]] is the converted value of row i."""
+        if column.ndim == 1 and len(column):
+            _uniques, first_rows, codes = np.unique(column, return_index=True, return_inverse=True)
+            cells = [column[row_no] for row_no in first_rows]
+        else:
+            cells, codes = list(column), np.arange(len(column))
+        return codes.ravel(), [str_to_number(cell) for cell in cells]
 
-        if selected:
-            yield row
+    def select(self, constraints):
+        """Return the ascending row numbers of the rows matching `constraints`,
+        {field: (value, cmpfn, args), ...},  as in mode_select().
+        """
+        selected = np.ones(self.nrows, dtype=bool)
+        for field, (value, cmpfn, args) in constraints.items():
+            codes, values = self.columns[field]
+            matches = np.array([bool(cmpfn(cell, value, args)) for cell in values], dtype=bool)
+            selected &= matches[codes]
+        return np.flatnonzero(selected).tolist()
+
+@utils.cached
+def mode_index(reference, fields):
+    """Return the ModeIndex of the mode columns `fields` of the first table of `reference`.
+
+    This function is self-cached.    Clear the cache using clear_cache().
+    """
+    return ModeIndex(tables.tables(reference)[0], fields)
+
+# Process-wide "hits" and "misses" of the DeepLook.are_different() memo.
+ARE_DIFFERENT_MEMO_COUNTS = Counter()
+
+def _make_are_different_memo():
+    """Return a new memo of DeepLook.are_different() results sized by CRDS_TABLE_EFFECTS_MEMO_SIZE,
+    or None if the memo is disabled.
+    """
+    size = config.TABLE_EFFECTS_MEMO_SIZE.get()
+    return utils.LRUCache(size, ARE_DIFFERENT_MEMO_COUNTS) if size > 0 else None
+
+_ARE_DIFFERENT_MEMO = _make_are_different_memo()
+
+def clear_cache():
+    """Clear the cached mode indices and DeepLook.are_different() results,  as well as
+    the underlying tables.
+    """
+    global _ARE_DIFFERENT_MEMO
+    mode_index.cache.clear()
+    _ARE_DIFFERENT_MEMO = _make_are_different_memo()
+    tables.clear_cache()
 
 def mode_equality(modes_a, modes_b):
     """Check if the modes are equal"""
@@ -322,6 +395,24 @@ class DeepLook:
                 if constraint_values[key] in self.metavalues[key]:
                     constraint_values[key] = self.metavalues[key][constraint_values[key]]
 
+        # Rows selected from the same pair of references by the same mode values are
+        # compared once,  no matter how many datasets share them.
+        memo_key = (self.__class__.__name__, old_reference, new_reference, repr(sorted(constraint_values.items())))
+        memo = _ARE_DIFFERENT_MEMO.get(memo_key) if _ARE_DIFFERENT_MEMO is not None else None
+        if memo is not None:
+            self.is_different, self.message = memo
+            log.verbose(self.preamble, 'Using remembered comparison for constraint values', constraint_values, verbosity=75)
+            return
+
+        self._compare_references(constraint_values, old_reference, new_reference)
+
+        if _ARE_DIFFERENT_MEMO is not None:
+            _ARE_DIFFERENT_MEMO[memo_key] = (self.is_different, self.message)
+
+    def _compare_references(self, constraint_values, old_reference, new_reference):
+        """Compare the rows of `old_reference` and `new_reference` selected by `constraint_values`,
+        setting self.is_different and self.message as for are_different().
+        """
         # Read the references
         data_old = tables.tables(old_reference)[0]   # XXXX currently limited to FITS extension 1
         data_new = tables.tables(new_reference)[0]
@@ -341,8 +432,9 @@ class DeepLook:
 
         # Reduce the tables to just those rows that match the mode
         # specifications.
-        mode_rows_old = [repr(row) for row in mode_select(data_old, constraints)]
-        mode_rows_new = [repr(row) for row in mode_select(data_new, constraints)]
+        fields = tuple(self.mode_fields)
+        mode_rows_old = [repr(data_old.rows[row_no]) for row_no in mode_index(old_reference, fields).select(constraints)]
+        mode_rows_new = [repr(data_new.rows[row_no]) for row_no in mode_index(new_reference, fields).select(constraints)]
 
         # Sort the rows
         mode_rows_old.sort()
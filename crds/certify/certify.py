@@ -5,8 +5,10 @@ they have legal values.    It is also used to verify that CRDS mapping files are
 consistent with outside systems.
 """
 import os
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 import gc
+import itertools
+import multiprocessing
 import uuid
 import re
 
@@ -423,53 +425,50 @@ class ReferenceCertifier(Certifier):
             log.info("No modes defined in new reference", repr(new_reference_ex), "for keys",
                      repr(self.mode_columns))
             return
-        old_sample = list(old_modes.values())[0]
-        new_sample = list(new_modes.values())[0]
-        if len(old_sample) != len(new_sample) or old_all_cols != new_all_cols:
+        if old_all_cols != new_all_cols:
             log.warning("Change in row format between", repr(old_reference_ex), "and", repr(new_reference_ex))
-            log.verbose("Old sample:", repr(old_sample))
-            log.verbose("New sample:", repr(new_sample))
+            log.verbose("Old sample:", log.Deferred(lambda: repr(mode_row(old_table, old_all_cols, 0))))
+            log.verbose("New sample:", log.Deferred(lambda: repr(mode_row(new_table, new_all_cols, 0))))
             return
-        for mode in sorted(old_modes):
+        # Matching modes only produce verbose output,  skip comparing them otherwise.
+        verbose = log.should_output(verbosity=50)
+        differences = self.compare_modes(old_table, new_table, old_modes, new_modes) if verbose else {}
+        for mode in sorted(old_modes if verbose else old_modes.keys() - new_modes.keys()):
             if mode not in new_modes:
                 log.warning("Table mode", mode, "from old reference", repr(old_reference_ex),
                             "is NOT IN new reference", repr(new_reference_ex))
-                log.verbose("Old:", repr(old_modes[mode]), verbosity=60)
+                log.verbose("Old:", log.Deferred(lambda: repr(mode_row(old_table, old_all_cols, old_modes[mode]))),
+                            verbosity=60)
                 continue
-            # modes[mode][0] is row_no,  modes[mode][1] is row value
-            diffs = self.compare_row_values(mode, old_modes[mode][1], new_modes[mode][1])
-            if not diffs:
+            if not differences[mode]:
                 log.verbose("Mode", mode, "of", repr(new_reference_ex),
                             "has same values as", repr(old_reference_ex),  verbosity=60)
             else:
                 log.verbose("Mode change", mode, "between", repr(old_reference_ex), "and",
                             repr(new_reference_ex))
-                log.verbose("Old:", repr(old_modes[mode]), verbosity=60)
-                log.verbose("New:", repr(new_modes[mode]), verbosity=60)
-        for mode in sorted(new_modes):
-            if mode not in old_modes:
-                log.info("Table mode", mode, "of new reference", repr(new_reference_ex),
-                         "is NOT IN old reference", repr(old_table.basename))
-                log.verbose("New:", repr(new_modes[mode]), verbosity=60)
-
-    def compare_row_values(self, mode, old_row, new_row):
-        """Compare key value tuple list `old_row` to `new_row` for key value tuple list `mode`.
-        Handle array value comparisons.
-
-        Return 0 if old_row == new_row,  non-0 otherwise.
+                log.verbose("Old:", log.Deferred(lambda: repr(mode_row(old_table, old_all_cols, old_modes[mode]))),
+                            verbosity=60)
+                log.verbose("New:", log.Deferred(lambda: repr(mode_row(new_table, new_all_cols, new_modes[mode]))),
+                            verbosity=60)
+        for mode in sorted(new_modes.keys() - old_modes.keys()):
+            log.info("Table mode", mode, "of new reference", repr(new_reference_ex),
+                     "is NOT IN old reference", repr(old_table.basename))
+            log.verbose("New:", log.Deferred(lambda: repr(mode_row(new_table, new_all_cols, new_modes[mode]))),
+                        verbosity=60)
+
+    def compare_modes(self, old_table, new_table, old_modes, new_modes):
+        """Compare the rows of each mode common to `old_modes` and `new_modes`,  the
+        mode dictionaries of `old_table` and `new_table` with identical columns.
+
+        Returns { mode : number of differing columns,  0 if rows are the same,  ... }
         """
-        different = 0
-        for field_no, (old_key, old_value) in enumerate(old_row):
-            new_key, new_value = new_row[field_no]
-            if old_key != new_key:
-                log.warning("Column key mismatch at mode", mode, "old_key", repr(old_key),
-                            "new_key", new_key)
-                different += 1
-            old_value = handle_nan(old_value)
-            new_value = handle_nan(new_value)
-            if np.any(old_value != new_value):
-                different += 1
-        return different
+        common = [mode for mode in old_modes if mode in new_modes]
+        old_rows = np.array([old_modes[mode] for mode in common], dtype=int)
+        new_rows = np.array([new_modes[mode] for mode in common], dtype=int)
+        different = np.zeros(len(common), dtype=int)
+        for old_column, new_column in zip(old_table.rows.arrays, new_table.rows.arrays):
+            different += differing_rows(old_column, new_column, old_rows, new_rows)
+        return dict(zip(common, different.tolist()))
 
     def check_asdf_standard_version(self):
         """
@@ -515,41 +514,99 @@ def find_governing_rmap(context, reference):
 # ============================================================================
 
 def table_mode_dictionary(generic_name, tab, mode_keys):
-    """Returns ({ (mode_val,...) : (row_no, (entire_row_values, ...)) },  [col_name, ...] )
+    """Returns ({ (mode_val,...) : row_no }, [col_name, ...] )
     for crds.tables `tab` where column names `mode_keys` define the  columns to select for mode values.
+    row_no is the first row defining each mode,  see mode_row() for its values.
     """
     all_cols = [name.upper() for name in tab.colnames]
     basename = repr(os.path.basename(tab.filename) + "[{}]".format(tab.segment))
     log.info("Mode columns defined by spec for", generic_name, basename, "are:", repr(mode_keys))
     log.info("All column names for this table", generic_name, basename, "are:", repr(all_cols))
     log.info("Checking for duplicate modes using intersection", sorted(list(set(mode_keys)&set(all_cols))))
-    modes = defaultdict(list)
-    for i, row in enumerate(tab.rows):
-        new_row = tuple(zip(all_cols, (handle_nan(v) for v in row)))
-        rowdict = dict(new_row)
-        # Table row keys can vary by extension.  Have CRDS support a simple model of using
-        # whichever mode_keys are present in a given row.
-        mode = tuple((key, rowdict[key]) for key in mode_keys if key in rowdict)
-        if not mode:
+    # Table row keys can vary by extension.  Have CRDS support a simple model of using
+    # whichever mode_keys are present in a given row.  As for dict(row),  the last of
+    # any duplicate column names defines the value.
+    column_index = { name : i for (i, name) in enumerate(all_cols) }
+    keys = [key for key in mode_keys if key in column_index]
+    if not keys:
+        if len(tab.rows):
             log.info("Empty actual mode in", generic_name, basename, "with candidate mode columns", mode_keys)
-            return {}, []
-        modes[mode].append((i, new_row))
-    for mode in sorted(modes.keys()):
-        if len(modes[mode]) > 1:
-            log.warning("Duplicate definitions in", generic_name, basename, "for mode:", mode, ":\n",
-                        "\n".join([repr(row) for row in modes[mode]]))
-    # modes[mode][0] is first instance of multiply defined mode.
-    return { mode:modes[mode][0] for mode in modes }, all_cols
+        return {}, []
+    columns = [list(zip(itertools.repeat(key), handle_nan_column(tab.rows.arrays[column_index[key]])))
+               for key in keys]
+    row_modes = list(zip(*columns))
+    # Map each mode to its first row by assigning rows last to first.
+    first_rows = dict(zip(reversed(row_modes), range(len(row_modes)-1, -1, -1)))
+    if len(first_rows) < len(row_modes):
+        modes = defaultdict(list)
+        for i, mode in enumerate(row_modes):
+            modes[mode].append(i)
+        for mode in sorted(modes.keys()):
+            if len(modes[mode]) > 1:
+                log.warning("Duplicate definitions in", generic_name, basename, "for mode:", mode, ":\n",
+                            "\n".join([repr(mode_row(tab, all_cols, i)) for i in modes[mode]]))
+    return first_rows, all_cols
+
+def mode_row(tab, all_cols, row_no):
+    """Return (row_no, ((col_name, value), ...)) for row `row_no` of crds.tables `tab`."""
+    return (row_no, tuple(zip(all_cols, (handle_nan(v) for v in tab.rows[row_no]))))
+
+# Scalar types whose NaN values handle_nan() maps to 'nan'
+NAN_TYPES = (np.float32, np.float64, np.longdouble)
 
 def handle_nan(var):
     """Map nan values to 'nan' so that 'nan' == 'nan'."""
-    if isinstance(var, (np.float32, np.float64, np.float128)) and np.isnan(var):
+    if isinstance(var, NAN_TYPES) and np.isnan(var):
         return 'nan'
     elif isinstance(var, np.ndarray) and var.shape == () and np.any(np.isnan(var)):
         return 'nan'
     else:
         return var
 
+def handle_nan_column(column):
+    """Return the list of handle_nan() values of table `column`,  locating NaNs of
+    float columns with one array operation.
+    """
+    if (isinstance(column, np.ndarray) and not isinstance(column, np.ma.MaskedArray) and
+            column.ndim == 1 and column.dtype.type in NAN_TYPES):
+        nans = np.isnan(column)
+        if not nans.any():
+            return list(column)
+        return ['nan' if nan else value for (value, nan) in zip(column, nans)]
+    if isinstance(column, np.char.chararray) and column.ndim == 1:
+        return np.char.rstrip(np.asarray(column)).tolist()   # as for chararray cells
+    return [handle_nan(value) for value in column]
+
+def differing_rows(old_column, new_column, old_rows, new_rows):
+    """Return a boolean array which is True where row `old_rows[i]` of `old_column`
+    differs from row `new_rows[i]` of `new_column`,  with NaN scalars equal to each
+    other as for handle_nan().   Array cells differ if any element differs.
+    """
+    if _array_comparable(old_column, new_column):
+        old_values, new_values = old_column[old_rows], new_column[new_rows]
+        different = np.asarray(old_values != new_values)
+        if different.ndim > 1:
+            different = different.any(axis=tuple(range(1, different.ndim)))
+        elif old_column.dtype.type in NAN_TYPES and new_column.dtype.type in NAN_TYPES:
+            different &= ~(np.isnan(old_values) & np.isnan(new_values))
+        return different
+    return np.array([bool(np.any(handle_nan(old_column[i]) != handle_nan(new_column[j])))
+                     for (i, j) in zip(old_rows, new_rows)], dtype=bool)
+
+def _array_comparable(old_column, new_column):
+    """Return True IFF the cells of `old_column` and `new_column` can be compared
+    with array operations,  giving the same results as comparing them one by one.
+    """
+    for column in (old_column, new_column):
+        if not isinstance(column, np.ndarray) or isinstance(column, np.ma.MaskedArray):
+            return False
+    if old_column.shape[1:] != new_column.shape[1:]:
+        return False
+    old_kind, new_kind = old_column.dtype.kind, new_column.dtype.kind
+    # chararrays strip trailing blanks when compared,  as do their cells
+    return ((old_kind in "biuf" and new_kind in "biuf") or
+            (old_kind in "SU" and old_kind == new_kind and type(old_column) is type(new_column)))
+
 # ============================================================================
 
 class FitsCertifier(ReferenceCertifier):
@@ -871,7 +928,7 @@ def get_certifier_class(original_name, filepath):
 def certify_files(files, context, dump_provenance=False, check_references=False,
                   compare_old_reference=False, dont_parse=False, skip_banner=False,
                   script=None, observatory=None, comparison_reference=None,
-                  run_fitsverify=False, check_rmap=True, check_sha1sums=False):
+                  run_fitsverify=False, check_rmap=True, check_sha1sums=False, jobs=1):
     """Check the specified list of reference or mapping `files` paths.
 
     files:                  full paths of references or mappings to check
@@ -886,19 +943,21 @@ def certify_files(files, context, dump_provenance=False, check_references=False,
     comparison_reference:   filepath to use for table comparison rather than finding in `context`.
     check_rmap:             run trial rmap update to check for overlapping reference cases.
     check_sha1sums:         check the sha1sums of `files` relative to files known on the CRDS server.
+    jobs:                   number of worker processes used to certify `files`.
     """
     trap = log.error_on_exception if script is None else script.error_on_exception
-    for fnum, filename in enumerate(files):
-
-        if not skip_banner:
-            banner()
-
-        ith = ' (' + str(fnum+1) + '/' + str(len(files)) + ')'
+    certify_keys = dict(
+        dump_provenance=dump_provenance, check_references=check_references,
+        compare_old_reference=compare_old_reference, dont_parse=dont_parse, script=script, observatory=observatory,
+        comparison_reference=comparison_reference, run_fitsverify=run_fitsverify, check_sha1sum=check_sha1sums)
 
-        certify_file(
-            filename, context, dump_provenance=dump_provenance, check_references=check_references,
-            compare_old_reference=compare_old_reference, dont_parse=dont_parse, script=script, observatory=observatory,
-            comparison_reference=comparison_reference, ith=ith, run_fitsverify=run_fitsverify, check_sha1sum=check_sha1sums)
+    if jobs > 1 and len(files) > 1:
+        certify_files_parallel(files, context, jobs, skip_banner=skip_banner, **certify_keys)
+    else:
+        for fnum, filename in enumerate(files):
+            if not skip_banner:
+                banner()
+            certify_file(filename, context, ith=_ith(fnum, files), **certify_keys)
 
     if check_rmap: # Requires checking all files in parallel, hence not in certify_file()
         if not skip_banner:
@@ -909,6 +968,78 @@ def certify_files(files, context, dump_provenance=False, check_references=False,
     if not skip_banner:
         banner()
 
+def _ith(fnum, files):
+    """Return the ' (i/n)' progress suffix for certifying the file at index `fnum` of `files`."""
+    return ' (' + str(fnum+1) + '/' + str(len(files)) + ')'
+
+# ============================================================================
+
+# Results of certifying one file in a --jobs worker,  merged back by the parent in file order.
+CertifyResult = namedtuple("CertifyResult", ["filename", "events", "log_counts"])
+
+# Worker process state for certify_files_parallel(),  inherited by fork.
+_PARALLEL_CERTIFY = None
+
+def certify_files_parallel(files, context, jobs, skip_banner=False, script=None, **keys):
+    """Certify `files` relative to `context` using `jobs` fork()'ed worker processes,
+    one file per task.   Each worker defers its log output and tracked errors for
+    a file,  returning them as a CertifyResult.   The parent replays the results in
+    the order of `files` as they become available,  so output stays grouped per
+    file and error counts and unique error tracking match a serial run.
+
+    Additional `keys` are passed through to certify_file().
+    """
+    global _PARALLEL_CERTIFY
+    if context:   # load once in the parent so workers inherit it
+        with log.verbose_warning_on_exception("Failed preloading context", repr(context)):
+            crds.get_pickled_mapping(context, ignore_checksum="warn")   # reviewed
+    _PARALLEL_CERTIFY = (files, context, skip_banner, script, keys)
+    pool = multiprocessing.get_context("fork").Pool(min(jobs, len(files)))
+    try:
+        for result in pool.imap(_certify_one, range(len(files))):
+            _merge_certify_result(script, result)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+        _PARALLEL_CERTIFY = None
+
+def _certify_one(fnum):
+    """Pool worker function:  certify file `fnum` of certify_files_parallel() capturing its
+    log output and tracked errors.   Return a CertifyResult.
+    """
+    files, context, skip_banner, script, keys = _PARALLEL_CERTIFY
+    events = []
+    log_counts = log.THE_LOGGER.status() + (log.THE_LOGGER.debugs,)
+    if script is not None:
+        script.certify_events = events
+    try:
+        with log.deferred_log(events):
+            if not skip_banner:
+                banner()
+            certify_file(files[fnum], context, script=script, ith=_ith(fnum, files), **keys)
+    finally:
+        if script is not None:
+            script.certify_events = None
+    log_counts = tuple(after - before for (after, before) in
+                       zip(log.THE_LOGGER.status() + (log.THE_LOGGER.debugs,), log_counts))
+    return CertifyResult(files[fnum], events, log_counts)
+
+def _merge_certify_result(script, result):
+    """Replay the log output and tracked errors of worker CertifyResult `result`
+    and add its message counts to the parent's.
+    """
+    for event in result.events:
+        if event[0] == "record":
+            log.THE_LOGGER.logger.handle(event[1])
+        else:   # "track"
+            script.log_and_track_error(*event[1], **event[2])
+    errors, warnings, infos, debugs = result.log_counts
+    log.THE_LOGGER.errors += errors
+    log.THE_LOGGER.warnings += warnings
+    log.THE_LOGGER.infos += infos
+    log.THE_LOGGER.debugs += debugs
+
 # ============================================================================
 
 @memory_cleanup
@@ -941,7 +1072,7 @@ def check_rmap_updates(observatory, context, filepaths):
         return
     observatory = utils.file_to_observatory(references[0]) if observatory is None else observatory
     organized = utils.organize_files(observatory, references)   # { (instrument, filekind) : [references,...] }
-    pmap = crds.get_cached_mapping(context)
+    pmap = rmap.load_contexts([context])[0]
     for instrument, filekind in organized:
         references2 = organized[(instrument, filekind)]
         old_rmap = pmap.get_imap(instrument).get_rmap(filekind)
@@ -969,6 +1100,7 @@ class CertifyScript(cmdline.Script, cmdline.UniqueErrorsMixin):
             keys["print_status"] = True
         cmdline.Script.__init__(self, *args, **keys)
         cmdline.UniqueErrorsMixin.__init__(self, *args, **keys)
+        self.certify_events = None   # per-file deferred log events in a --jobs worker
 
     description = """
 Checks a CRDS reference or mapping file:
@@ -1032,7 +1164,8 @@ For more information on the checks being performed,  use --verbose or --verbosit
                           help="Do a dry-run of adding reference files to the appropriate rmaps to detect errors.")
         self.add_argument("-k", "--check-sha1sums", action="store_true",
                           help="Check certified files to see if any are identical to files already in CRDS.")
-
+        self.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                          help="Certify files using N worker processes,  reporting each file's results in order.")
 
         cmdline.UniqueErrorsMixin.add_args(self)
 
@@ -1085,7 +1218,8 @@ For more information on the checks being performed,  use --verbose or --verbosit
                       script=self, observatory=self.observatory,
                       run_fitsverify=self.args.run_fitsverify,
                       check_rmap=self.args.check_rmap_updates,
-                      check_sha1sums=self.args.check_sha1sums)
+                      check_sha1sums=self.args.check_sha1sums,
+                      jobs=self.args.jobs)
 
         self.dump_unique_errors()
         return log.errors()
@@ -1112,6 +1246,9 @@ For more information on the checks being performed,  use --verbose or --verbosit
 
     def log_and_track_error(self, filename, *args, **keys):
         """Override log_and_track_error() to compute instrument, filekind automatically."""
+        if self.certify_events is not None:   # --jobs worker,  tracked by the parent in file order
+            self.certify_events.append(("track", (filename,) + tuple(str(arg) for arg in args), keys))
+            return None
         try:
             instrument, filekind = utils.get_file_properties(self.observatory, filename)
         except Exception:
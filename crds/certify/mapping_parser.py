@@ -1,125 +1,316 @@
-"""This module uses the package Parsley to parse CRDS mappings into a
-header dictionary and a Selector Parameters object tree.  Selector
-Parameters are uninstantiated Selectors which are first built up from
-the mapping file.  Since the parser captures full item lists, with no
-removal of duplicate keys, the results can be used to detect duplicate
-dictionary entries which normally collide silently eliminating one
-item.  This is principally intended to detect rmap cut-and-paste
-errors in hand edited rmaps.
+"""This module parses CRDS mappings into a header item list and a selector
+item list or Selector Parameters object tree.  Selector Parameters are
+uninstantiated Selectors which are first built up from the mapping file.
+Since the parser captures full item lists, with no removal of duplicate
+keys, the results can be used to detect duplicate dictionary entries
+which normally collide silently eliminating one item.  This is
+principally intended to detect rmap cut-and-paste errors in hand edited
+rmaps.
+
+The parser is a hand written recursive descent parser for the restricted
+subset of Python used by mappings,  scanning the mapping text once:
+
+    mapping = header_section comment_section? selector_section
+    header_section = 'header' '=' dict
+    comment_section = 'comment' '=' block_string
+    selector_section = 'selector' '=' selector
+    selector = dict | parameters_name '(' dict ')'
+    dict = '{' (immutable ':' value (',' immutable ':' value)* ','?)? '}'
+    immutable = string | immutable_tuple | number | True | False | None
+    value = string | tuple | number | selector | set | True | False | None
+    tuple = '(' (value (',' value)*)? ','? ')'
+    set = '{' (value (',' value)*)? ','? '}'
+
+Dictionaries are returned as item lists to preserve duplicates,  and the
+parenthesized values of tuples are always tuples,  e.g. ('A') is ('A',).
+Whitespace and #-comments may appear between any two tokens.
+
+>>> parsing = parse_mapping_text('''
+... header = {
+...     'name' : 'hst_acs_biasfile.rmap',   # a comment
+...     'name' : 'duplicate.rmap',
+...     'parkey' : (('DETECTOR',), ('DATE-OBS',)),
+... }
+... comment = \"\"\"Some notes.\"\"\"
+... selector = Match({
+...     ('HRC', -1.5e2) : UseAfter({ '2002-03-01 00:00:00' : 'biasfile.fits' }),
+...     'N/A' : { 1, 2.0, None },
+... })
+... ''')
+>>> parsing.header
+[('name', 'hst_acs_biasfile.rmap'), ('name', 'duplicate.rmap'), ('parkey', (('DETECTOR',), ('DATE-OBS',)))]
+>>> parsing.comment
+'Some notes.'
+>>> parsing.selector
+Match
+>>> parsing.selector.selections
+[(('HRC', -150.0), UseAfter), ('N/A', {1, 2.0, None})]
+
+>>> parse_mapping_text("header = { 'name' : 'x' 'y' }\\nselector = {}")
+Traceback (most recent call last):
+...
+crds.core.exceptions.MappingFormatError: Expected '}' at line 1 column 25
 """
+import re
 from collections import namedtuple
 
-from crds.core import rmap, selectors, log, exceptions, config
+from crds.core import selectors, log, exceptions, config
 
 # NOTE:  #-comments are treated as white space and currently dropped when an rmap is rewritten
 # as a new version.
 
-MAPPING_GRAMMAR = r"""
+# ==============================================================================
 
-ws = (' ' | '\r' | '\n' | '\t' | pound_comment)*
+Parsing = namedtuple("Parsing", "header,selector,comment")
 
-pound_comment = '#' (~'\n' anything)*:c '\n' -> ''.join(c)
+def parse_mapping(filename):
+    """Parse mapping `filename`.   Return parsing."""
+    log.verbose("Parsing", repr(filename))
+    filename = config.locate_mapping(filename)
+    with log.augment_exception("Parsing error in", repr(filename), exception_class=exceptions.MappingFormatError):
+        with open(filename) as pfile:
+            return parse_mapping_text(pfile.read())
 
-mapping = header_section:h comment_section:c selector_section:s -> (h, s, c)
+def parse_mapping_text(text):
+    """Parse the mapping source code `text`.   Return parsing."""
+    header, selector, comment = MappingParser(text).mapping()
+    return Parsing(header, selector, comment)
 
-header_section = ws 'header' ws '=' ws dict:d ws -> d
+def check_duplicates(parsing):
+    """Examine mapping `parsing` from parse_mapping() for duplicate header or selector entries."""
+    if isinstance(parsing.selector, selectors.Parameters):
+        parsing.selector.instantiate(parsing.header)
+    else:
+        selectors.check_duplicates(parsing.header, ["header"])
+        selectors.check_duplicates(parsing.selector, ["selector"])
 
-comment_section = ((ws 'comment' ws '=' ws block_string:c ws -> c)
-                  | -> None)
-selector_section = ws 'selector' ws '=' ws selector:s ws -> s
+# ==============================================================================
 
-selector = ( dict | parameters ):d -> d
-parameters = ws parameters_name:n ws '(' ws dict:d ws ')' -> eval(n, globals(), locals())(d)
-parameters_name = ('Match' | 'UseAfter' | 'VersionAfter' | 'SelectVersion' | 'Bracket' | 'GeometricallyNearest' | 'ClosestTime'):n -> n
+WHITESPACE_RE = re.compile(r"(?:[ \r\n\t]+|#[^\n]*\n)*")
+NAME_RE = re.compile(r"[A-Za-z_][A-Za-z_0-9]*")
+NUMBER_RE = re.compile(r"(-?(?:[1-9][0-9]*|[0-9]))(\.[0-9]*(?:[eE][+-]?[0-9]*)?|[eE][+-]?[0-9]*)?")
+STRING_RES = {
+    '"' : re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"', re.DOTALL),
+    "'" : re.compile(r"'([^'\\]*(?:\\.[^'\\]*)*)'", re.DOTALL),
+    '"""' : re.compile(r'"""([^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*)"""', re.DOTALL),
+    "'''" : re.compile(r"'''([^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*)'''", re.DOTALL),
+}
+ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+ESCAPES = {
+    '"' : '"', "\\" : "\\", "/" : "/", "b" : "\b", "f" : "\f",
+    "n" : "\n", "r" : "\r", "t" : "\t", "'" : "'",
+}
+CONSTANTS = {
+    "True" : True,
+    "False" : False,
+    "None" : None,
+}
 
-# NOTE:  dict is returned as an item-list to preserve duplicates (considered errors)
-dict = ws '{' items:m '}' ws -> m
-items = ws (pair:first (ws ',' pair)*:rest ws ','? ws -> [first] + rest) | ws -> []
-pair = ws immutable:k ws ':' ws value:v ws -> (k, v)
-immutable = (string | immutable_tuple | number | true | false | none):i -> i
+def _unescape(match):
+    """Replace a recognized escape sequence with its character,  leaving others as-is."""
+    return ESCAPES.get(match.group(1), match.group(0))
 
-value = (string | tuple | number | selector | dict | set | true | false | none):v -> v
+class MappingParser:
+    """Parses mapping `text` in one left to right pass,  with each method consuming
+    the construct it's named for starting at the next non-whitespace character and
+    returning its value.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
 
-string = (('"' (escapedChar | ~'"' anything)*:c '"')
-         |("'" (escapedChar | ~"'" anything)*:c "'") -> ''.join(c))
+    def mapping(self):
+        """Parse an entire mapping and return (header, selector, comment)."""
+        header = self.section("header", self.dict)
+        comment = self.section("comment", self.block_string) if self.at_name("comment") else None
+        selector = self.section("selector", self.selector)
+        self.skip_ws()
+        if self.pos != len(self.text):
+            self.error("Expected end of mapping")
+        return header, selector, comment
 
-block_string = (('\"\"\"' (escapedChar | ~'\"\"\"' anything)*:c '\"\"\"')
-               |("\'\'\'" (escapedChar | ~"\'\'\'" anything)*:c "\'\'\'")) -> ''.join(c)
+    def section(self, name, value):
+        """Parse `name` = `value`,  returning the value."""
+        if self.name() != name:
+            self.error("Expected " + repr(name) + " section")
+        self.expect("=")
+        return value()
 
-escapedChar = '\\' (('"' -> '"')    |('\\' -> '\\')
-                   |('/' -> '/')    |('b' -> '\b')
-                   |('f' -> '\f')   |('n' -> '\n')
-                   |('r' -> '\r')   |('t' -> '\t')
-                   |('\'' -> '\'')  )
+    # ----------------------------------------------------------------------
 
-number = ('-' | -> ''):sign (intPart:ds (floatPart(sign ds) | -> int(sign + ds)))
-digit = :x ?(x in '0123456789') -> x
-digits = <digit*>
-digit1_9 = :x ?(x in '123456789') -> x
-intPart = (digit1_9:first digits:rest -> first + rest) | digit
-floatPart :sign :ds = <('.' digits exponent?) | exponent>:tail -> float(sign + ds + tail)
-exponent = ('e' | 'E') ('+' | '-')? digits
+    def error(self, message, pos=None):
+        """Raise a MappingFormatError for `message` at `pos` or the current position."""
+        pos = self.pos if pos is None else pos
+        line = self.text.count("\n", 0, pos) + 1
+        column = pos - self.text.rfind("\n", 0, pos)
+        raise exceptions.MappingFormatError(message, "at line", line, "column", column)
 
-# list = '[' elements:xs ws ','? ws ']' -> list(xs)
-tuple = '(' elements:xs ws ','? ws ')' -> tuple(xs)
-set = '{' elements:xs ws ','? ws '}' -> set(xs)
-elements = (ws value:first (ws ',' ws value)*:rest ws -> [first] + rest) | -> []
+    def skip_ws(self):
+        """Skip whitespace and #-comments."""
+        self.pos = WHITESPACE_RE.match(self.text, self.pos).end()
 
-immutable_tuple = '(' immutable_elements:xs ws ','? ws ')' -> tuple(xs)
-immutable_elements = (ws immutable:first (ws ',' ws immutable)*:rest ws -> [first] + rest) | -> []
+    def peek(self):
+        """Return the next non-whitespace character,  or '' at the end of the text."""
+        self.skip_ws()
+        return self.text[self.pos:self.pos+1]
 
-true = 'True' -> True
-false = 'False' -> False
-none = 'None' -> None
-"""
+    def accept(self, char):
+        """Consume `char` if it is next,  returning True IFF it was consumed."""
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
 
-try:
-    import parsley
-except ImportError:
-    parsley = None
+    def expect(self, char):
+        """Consume `char` or raise a MappingFormatError."""
+        if not self.accept(char):
+            self.error("Expected " + repr(char))
 
-MAPPING_PARSER = None
+    def at_name(self, name):
+        """Return True IFF the next token is identifier `name`."""
+        self.skip_ws()
+        match = NAME_RE.match(self.text, self.pos)
+        return match is not None and match.group() == name
 
-'''
-def profile_parse(filename="hst_cos_deadtab.rmap"):
-    """Profile the parsing of `filename`, print stats, and instantiate the
-    mapping to run the duplicates checking.
-    """
-    import cProfile
-    import pstats
-    filename = config.locate_mapping(filename)
-    statsname = os.path.splitext(filename)[0] + ".stats"
-    cProfile.runctx('result = MAPPING_PARSER(open("{}").read()).mapping()'.format(filename),
-                    locals(), globals(), statsname)
-    stats = pstats.Stats(statsname)
-    stats.sort_stats("time")
-    stats.print_stats(20)
-'''
+    def name(self):
+        """Consume and return the next identifier."""
+        self.skip_ws()
+        match = NAME_RE.match(self.text, self.pos)
+        if match is None:
+            self.error("Expected a name")
+        self.pos = match.end()
+        return match.group()
 
-Parsing = namedtuple("Parsing", "header,selector,comment")
+    # ----------------------------------------------------------------------
 
-def parse_mapping(filename):
-    """Parse mapping `filename`.   Return parsing."""
-    global parsley, MAPPING_PARSER
+    def value(self):
+        """Parse any mapping value."""
+        char = self.peek()
+        if char in ("'", '"'):
+            return self.string()
+        elif char == "(":
+            return self.tuple(self.value)
+        elif char == "-" or char.isdigit():
+            return self.number()
+        elif char == "{":
+            return self.dict_or_set()
+        else:
+            start = self.pos
+            name = self.name()
+            if name in CONSTANTS:
+                return CONSTANTS[name]
+            self.pos = start
+            return self.selector()
 
-    if parsley is None:
-        raise NotImplementedError("Parsley parsing package must be installed.")
+    def immutable(self):
+        """Parse a dictionary key:  a string,  number,  constant,  or tuple of them."""
+        char = self.peek()
+        if char in ("'", '"'):
+            return self.string()
+        elif char == "(":
+            return self.tuple(self.immutable)
+        elif char == "-" or char.isdigit():
+            return self.number()
+        start = self.pos
+        name = self.name()
+        if name not in CONSTANTS:
+            self.error("Invalid dictionary key " + repr(name), start)
+        return CONSTANTS[name]
 
-    if MAPPING_PARSER is None:
-        MAPPING_PARSER = parsley.makeGrammar(MAPPING_GRAMMAR, selectors.SELECTORS)
+    def selector(self):
+        """Parse a dictionary or Selector Parameters call."""
+        if self.peek() == "{":
+            return self.dict()
+        start = self.pos
+        name = self.name()
+        if name not in selectors.SELECTORS:
+            self.error("Unknown selector or value " + repr(name), start)
+        self.expect("(")
+        selections = self.dict()
+        self.expect(")")
+        return selectors.SELECTORS[name](selections)
 
-    log.verbose("Parsing", repr(filename))
-    filename = config.locate_mapping(filename)
-    with log.augment_exception("Parsing error in", repr(filename), exception_class=exceptions.MappingFormatError):
-        with open(filename) as pfile:
-            parser = MAPPING_PARSER(pfile.read())
-            header, selector, comment = parser.mapping()
-            return Parsing(header, selector, comment)
+    def dict_or_set(self):
+        """Parse '{' ... '}' as a dict if its first element is a key followed by ':',
+        otherwise as a set.
+        """
+        start = self.pos
+        self.expect("{")
+        if self.peek() != "}":
+            try:
+                self.immutable()
+                is_dict = self.peek() == ":"
+            except exceptions.MappingFormatError:
+                is_dict = False
+        else:
+            is_dict = True
+        self.pos = start
+        return self.dict() if is_dict else self.set()
 
-def check_duplicates(parsing):
-    """Examine mapping `parsing` from parse_mapping() for duplicate header or selector entries."""
-    if isinstance(parsing.selector, selectors.Parameters):
-        parsing.selector.instantiate(parsing.header)
-    else:
-        selectors.check_duplicates(parsing.header, ["header"])
-        selectors.check_duplicates(parsing.selector, ["selector"])
+    def dict(self):
+        """Parse a dictionary as a list of (key, value) items,  including duplicates."""
+        self.expect("{")
+        items = []
+        while self.peek() != "}":
+            key = self.immutable()
+            self.expect(":")
+            items.append((key, self.value()))
+            if not self.accept(","):
+                break
+        self.expect("}")
+        return items
+
+    def elements(self, element, close):
+        """Parse a comma separated list of `element`s ending with optional ',' and `close`."""
+        values = []
+        while self.peek() not in (close, ","):
+            values.append(element())
+            if not self.accept(","):
+                break
+        else:
+            if not values:
+                self.accept(",")
+        self.expect(close)
+        return values
+
+    def tuple(self, element):
+        """Parse a parenthesized tuple of `element`s."""
+        self.expect("(")
+        return tuple(self.elements(element, ")"))
+
+    def set(self):
+        """Parse a set of values."""
+        self.expect("{")
+        return set(self.elements(self.value, "}"))
+
+    def number(self):
+        """Parse an int or float."""
+        self.skip_ws()
+        match = NUMBER_RE.match(self.text, self.pos)
+        if match is None:
+            self.error("Invalid number")
+        self.pos = match.end()
+        if match.group(2) is None:
+            return int(match.group(1))
+        try:
+            return float(match.group())
+        except ValueError:
+            self.error("Invalid number " + repr(match.group()), match.start())
+
+    def string(self):
+        """Parse a single or double quoted string."""
+        return self._quoted(self.peek())
+
+    def block_string(self):
+        """Parse a triple quoted string."""
+        self.skip_ws()
+        return self._quoted(self.text[self.pos:self.pos+3])
+
+    def _quoted(self, quote):
+        """Parse a string delimited by `quote`,  replacing escape sequences."""
+        pattern = STRING_RES.get(quote)
+        match = pattern.match(self.text, self.pos) if pattern else None
+        if match is None:
+            self.error("Expected " + ("string" if len(quote) <= 1 else "block string"))
+        self.pos = match.end()
+        return ESCAPE_RE.sub(_unescape, match.group(1))
@@ -41,6 +41,16 @@ def array_name(rootname):
     else:
         raise TypeError("Invalid array rootname type for: " + repr(rootname))
 
+# Maximum number of invalid row numbers listed for a table column check.
+MAX_REPORTED_ROWS = 10
+
+def bulk_checkable(column):
+    """Return True IFF table `column` is a plain 1-D numpy array of scalars which
+    KeywordValidator.check_column_values() can check all at once.
+    """
+    return (isinstance(column, np.ndarray) and not isinstance(column, np.ma.MaskedArray) and
+            column.ndim == 1 and column.dtype.kind in "biufSU")
+
 # ============================================================================
 
 class Validator:
@@ -161,13 +171,17 @@ class Validator:
         for tab in tables.tables(filename):
             if self.name in tab.colnames:
                 column_seen = True
-                # new_values must not be None,  check all, waiting to fail later
-                for i, value in enumerate(tab.columns[self.name]): # compare to TPN values
-                    self.check_value(filename + "[" + str(i) +"]", value)
+                self.check_column_values(filename, tab.column_arrays[self.name])
         if not column_seen:
             self.handle_missing(header)
         return True
 
+    def check_column_values(self, filename, column):
+        """Check each value of table `column` from `filename` one cell at a time."""
+        # new_values must not be None,  check all, waiting to fail later
+        for i, value in enumerate(column): # compare to TPN values
+            self.check_value(filename + "[" + str(i) +"]", value)
+
     def check_group(self, _filename, _header):
         """Probably related to pre-FITS HST GEIS files,  not implemented."""
         log.warning("Group keys are not currently supported by CRDS.")
@@ -301,6 +315,44 @@ class KeywordValidator(Validator):
         """Do a literal match of `value` to the allowed values of this tpninfo."""
         return value in self._values or not self._values
 
+    def check_column_values(self, filename, column):
+        """Check all of table `column` at once,  raising an exception for the first invalid
+        row with the same message as check_value(),  summarizing any other invalid rows.
+
+        Verbose mode and columns of arrays or objects are checked one cell at a time.
+        """
+        if log.get_verbose() or not bulk_checkable(column):
+            return super(KeywordValidator, self).check_column_values(filename, column)
+        rows = np.flatnonzero(self.invalid_rows(column))
+        if not len(rows):
+            return
+        first = rows[0]
+        try:
+            self.check_value(filename + "[" + str(first) + "]", column[first])
+        except Exception as exc:
+            if len(rows) == 1:
+                raise
+            raise ValueError(
+                str(exc) + " : " + str(len(rows)) + " of " + str(len(column)) + " rows are invalid,  first at rows " +
+                repr([int(row) for row in rows[:MAX_REPORTED_ROWS]])) from exc
+        super(KeywordValidator, self).check_column_values(filename, column)   # bulk and cell checks disagree
+
+    def invalid_rows(self, column):
+        """Return a boolean array marking the rows of 1-D `column` which fail check_value(),
+        checking each distinct value of `column` only once.
+        """
+        _uniques, firsts, inverse = np.unique(column, return_index=True, return_inverse=True)
+        invalid = np.array([not self._valid_cell(column[i]) for i in firsts], dtype=bool)
+        return invalid[inverse.reshape(-1)]
+
+    def _valid_cell(self, value):
+        """Return True IFF check_value() accepts table cell `value`."""
+        try:
+            self.check_value("", value)
+        except Exception:
+            return False
+        return True
+
 # ----------------------------------------------------------------------------
 
 class CharacterValidator(KeywordValidator):
@@ -353,6 +405,13 @@ class NumericalValidator(KeywordValidator):
             values = KeywordValidator.condition_values(self, values)
         return values
 
+    def invalid_rows(self, column):
+        """Range check numerical columns with array comparisons,  otherwise check distinct values."""
+        if self.is_range and (column.dtype.kind in "iu" or
+                              (column.dtype.kind == "f" and isinstance(self, FloatValidator))):
+            return (column < self.min) | (column > self.max)
+        return super(NumericalValidator, self).invalid_rows(column)
+
     def _check_value(self, filename, value):
         if self.is_range:
             if value < self.min or value > self.max:
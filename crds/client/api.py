@@ -5,10 +5,14 @@ cache them locally.
 import os
 import os.path
 import base64
+import hashlib
 import re
 import zlib
 import html
-from urllib import request
+import threading
+import http.client
+from urllib import request, parse
+from concurrent import futures
 import warnings
 import json
 import ast
@@ -554,6 +558,106 @@ def file_progress(activity, name, path, bytes, bytes_so_far, total_bytes, nth_fi
 
 # ==============================================================================
 
+# Concurrent downloads keep one HTTP(S) connection per server for each thread of the
+# download pool,  re-used for successive files and closed when the pool finishes.
+# Serial downloads,  proxied environments,  and non-HTTP URIs use urllib.
+
+HTTP_REDIRECT_LIMIT = 5
+
+def partial_path(localpath):
+    """Return the path of the partial file used while downloading `localpath`."""
+    return localpath + ".part"
+
+class KeepAliveConnections:
+    """The keep-alive connections of one download pool,  held per (thread, server)."""
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._connections = {}
+
+    def get(self, scheme, netloc):
+        """Return the (possibly re-used) connection to `netloc` for this thread."""
+        key = (threading.get_ident(), scheme, netloc)
+        with self._lock:
+            if key not in self._connections:
+                cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+                self._connections[key] = cls(netloc, timeout=self.timeout)
+            return self._connections[key]
+
+    def drop(self, url):
+        """Close and forget this thread's connection to the server of `url`."""
+        parts = parse.urlsplit(url)
+        with self._lock:
+            connection = self._connections.pop((threading.get_ident(), parts.scheme, parts.netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def close(self):
+        """Close every connection of the pool."""
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for connection in connections:
+            connection.close()
+
+def http_open(url, offset=0, connections=None):
+    """Open `url` for reading starting at byte `offset` and return the response.
+    If `connections` is a KeepAliveConnections and no proxy is configured,  the
+    request is issued on one of its connections,  otherwise by urllib.
+
+    A response with status 206 starts at `offset`,  any other successful response
+    contains the whole file.
+    """
+    headers = {"Range" : "bytes={}-".format(offset)} if offset else {}
+    timeout = config.get_download_timeout()
+    if connections is None or parse.urlsplit(url).scheme not in ["http", "https"] or request.getproxies():
+        return request.urlopen(request.Request(url, headers=headers), timeout=timeout)
+    for _redirect in range(HTTP_REDIRECT_LIMIT + 1):
+        parts = parse.urlsplit(url)
+        selector = parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        response = _http_request(connections, parts, selector, headers)
+        if response.status in [301, 302, 303, 307, 308] and response.getheader("Location"):
+            response.read()
+            url = parse.urljoin(url, response.getheader("Location"))
+        elif response.status in [200, 206]:
+            return response
+        else:
+            response.read()
+            raise CrdsNetworkError("HTTP Error", response.status, ":", response.reason, "for url", srepr(url))
+    raise CrdsNetworkError("Too many HTTP redirects for url", srepr(url))
+
+def read_chunks(infile):
+    """Yield successive CRDS_DATA_CHUNK_SIZE chunks read from `infile`.   For a truncated
+    HTTP response,  yield the bytes which did arrive before re-raising so that a retry
+    can resume after them.
+    """
+    while True:
+        try:
+            data = infile.read(config.CRDS_DATA_CHUNK_SIZE)
+        except http.client.IncompleteRead as exc:
+            if exc.partial:
+                yield exc.partial
+            raise
+        if not data:
+            return
+        yield data
+
+def _http_request(connections, parts, selector, headers):
+    """Issue a GET for `selector` on this thread's connection to `parts.netloc`.
+    A re-used connection which the server has since closed is re-opened once.
+    """
+    for attempt in range(2):
+        connection = connections.get(parts.scheme, parts.netloc)
+        reused = connection.sock is not None
+        try:
+            connection.request("GET", selector, headers=headers)
+            return connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            connections.drop(parts.geturl())
+            if not reused or attempt:
+                raise
+
+# ==============================================================================
+
 class FileCacher:
     """FileCacher gets remote files with simple names into a local cache."""
     def __init__(self, pipeline_context, ignore_cache=False, raise_exceptions=True):
@@ -562,6 +666,10 @@ class FileCacher:
         self.ignore_cache = ignore_cache
         self.raise_exceptions = raise_exceptions
         self.info_map = {}
+        self._progress_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._bytes_so_far = 0
+        self._connections = None
 
     def get_local_files(self, names):
         """Given a list of basename `mapping_names` which are pertinent to the
@@ -616,37 +724,71 @@ class FileCacher:
         return int(self.info_map[os.path.basename(name)]["size"])
 
     def download_files(self, downloads, localpaths):
-        """Serial file-by-file download."""
+        """Download `downloads` to `localpaths`,  running up to CRDS_DOWNLOAD_WORKERS
+        transfers concurrently.  Returns the total bytes downloaded.
+        """
         download_metadata = get_download_metadata()
         self.info_map = {}
         for filename in downloads:
             self.info_map[filename] = download_metadata.get(filename, "NOT FOUND unknown to server")
         if config.writable_cache_or_verbose("Readonly cache, skipping download of (first 5):", repr(downloads[:5]), verbosity=70):
-            bytes_so_far = 0
+            self._cancelled.clear()
+            self._bytes_so_far = 0
             total_files = len(downloads)
             total_bytes = get_total_bytes(self.info_map)
-            for nth_file, name in enumerate(downloads):
+            workers = min(config.get_download_workers(), total_files)
+            if workers <= 1:
+                for nth_file, name in enumerate(downloads):
+                    self.download_one(name, localpaths[name], nth_file, total_files, total_bytes)
+            else:
+                self._connections = KeepAliveConnections(config.get_download_timeout())
                 try:
-                    if "NOT FOUND" in self.info_map[name]:
-                        raise CrdsDownloadError("file is not known to CRDS server.")
-                    bytes, path = self.catalog_file_size(name), localpaths[name]
-                    log.info(file_progress("Fetching", name, path, bytes, bytes_so_far, total_bytes, nth_file, total_files))
-                    self.download(name, path)
-                    bytes_so_far += os.stat(path).st_size
-                except Exception as exc:
-                    if self.raise_exceptions:
-                        raise
-                    else:
-                        log.error("Failure downloading file", repr(name), ":", str(exc))
-            return bytes_so_far
+                    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                        jobs = [executor.submit(self.download_one, name, localpaths[name], nth_file, total_files, total_bytes)
+                                for nth_file, name in enumerate(downloads)]
+                        try:
+                            for job in jobs:
+                                job.result()
+                        except BaseException:
+                            # Stop queued and in-flight transfers,  the executor waits for them to clean up.
+                            self._cancelled.set()
+                            for job in jobs:
+                                job.cancel()
+                            raise
+                finally:
+                    self._connections.close()
+                    self._connections = None
+            return self._bytes_so_far
         return 0
 
+    def download_one(self, name, path, nth_file, total_files, total_bytes):
+        """Download file `name` to `path` as the `nth_file` of a download_files() batch,
+        reporting aggregate progress across all concurrent transfers.
+        """
+        if self._cancelled.is_set():
+            return
+        try:
+            if "NOT FOUND" in self.info_map[name]:
+                raise CrdsDownloadError("file is not known to CRDS server.")
+            bytes = self.catalog_file_size(name)
+            with self._progress_lock:
+                log.info(file_progress("Fetching", name, path, bytes, self._bytes_so_far, total_bytes, nth_file, total_files))
+            self.download(name, path)
+            with self._progress_lock:
+                self._bytes_so_far += os.stat(path).st_size
+        except Exception as exc:
+            if self.raise_exceptions:
+                raise
+            elif not self._cancelled.is_set():
+                log.error("Failure downloading file", repr(name), ":", str(exc))
+
     def download(self, name, localpath):
         """Download a single file."""
         # This code is complicated by the desire to blow away failed downloads.  For the specific
         # case of KeyboardInterrupt,  the file needs to be blown away,  but the interrupt should not
         # be re-characterized so it is still un-trapped elsewhere under normal idioms which try *not*
-        # to trap KeyboardInterrupt.
+        # to trap KeyboardInterrupt.   Any partial HTTP download is kept so that the next attempt
+        # to fetch the file resumes it.
         assert not config.get_cache_readonly(), "Readonly cache,  cannot download files " + repr(name)
         try:
             utils.ensure_dir_exists(localpath)
@@ -664,6 +806,8 @@ class FileCacher:
 
     def remove_file(self, localpath):
         """Removes file at `localpath`."""
+        if not os.path.exists(localpath):
+            return
         log.verbose("Removing file", repr(localpath))
         try:
             os.remove(localpath)
@@ -674,16 +818,58 @@ class FileCacher:
         """Download and verify file `name` under context `pipeline_context` to `localpath`."""
         if config.get_download_plugin():
             self.plugin_download(name, localpath)
+            self.verify_file(name, localpath)
         else:
-            generator = self.get_data_http(name)
-            self.generator_download(generator, localpath)
-        self.verify_file(name, localpath)
+            self.http_download(name, localpath)
+
+    def http_download(self, filename, localpath):
+        """Download `filename` to a partial file next to `localpath`,  verify it,  and
+        then rename it to `localpath`.   Bytes left in the partial file by an earlier
+        failed attempt are resumed with an HTTP Range request.
+        """
+        if self._cancelled.is_set():
+            raise CrdsDownloadError("download cancelled.")
+        partpath = partial_path(localpath)
+        size = self.catalog_file_size(filename)
+        offset = os.path.getsize(partpath) if os.path.exists(partpath) else 0
+        if offset > size:
+            offset = 0
+        sha1sum = None
+        if offset == 0 or offset < size:
+            generator = self.get_data_http(filename, offset)
+            offset = next(generator)
+            sha1sum = self.generator_download(generator, partpath, offset)
+        received = os.path.getsize(partpath)
+        if received < size and config.get_length_flag():   # keep the partial file to resume on retry
+            raise CrdsDownloadError("connection closed after", received, "of", size, "bytes.")
+        try:
+            self.verify_file(filename, partpath, sha1sum)
+        except Exception:
+            self.remove_file(partpath)   # don't resume from bad bytes on retry
+            raise
+        os.replace(partpath, localpath)
 
-    def generator_download(self, generator, localpath):
-        """Read all bytes from `generator` until file is downloaded to `localpath.`"""
-        with open(localpath, "wb+") as outfile:
+    def generator_download(self, generator, localpath, offset=0):
+        """Read all bytes from `generator` until file is downloaded to `localpath.`
+        When `offset` is non-zero,  append to the first `offset` bytes already in `localpath`.
+
+        Returns the sha1sum of the complete file computed while it is written,  or None
+        when CRDS_DOWNLOAD_CHECKSUMS is off.  See also utils.copy_and_checksum().
+        """
+        xsum = hashlib.sha1() if config.get_checksum_flag() else None
+        with open(localpath, "r+b" if offset else "wb") as outfile:
+            while xsum and outfile.tell() < offset:
+                block = outfile.read(min(config.CRDS_CHECKSUM_BLOCK_SIZE, offset - outfile.tell()))
+                if not block:
+                    break
+                xsum.update(block)
+            outfile.truncate(offset)
+            outfile.seek(offset)
             for data in generator:
                 outfile.write(data)
+                if xsum:
+                    xsum.update(data)
+        return xsum.hexdigest() if xsum else None
 
     def plugin_download(self, filename, localpath):
         """Run an external program defined by CRDS_DOWNLOAD_PLUGIN to download filename to localpath."""
@@ -703,26 +889,37 @@ class FileCacher:
                     "Plugin download fail status =", repr(status),
                     "with command:", srepr(plugin_cmd))
 
-    def get_data_http(self, filename):
-        """Yield the data returned from `filename` of `pipeline_context` in manageable chunks."""
+    def get_data_http(self, filename, offset=None):
+        """Yield the data returned from `filename` of `pipeline_context` in manageable chunks.
+
+        If `offset` is not None,  request the file starting at byte `offset` and first
+        yield the offset the server actually honored:  `offset` for a partial response,
+        0 if the server returned the whole file.
+        """
         url = self.get_url(filename)
+        complete = False
         try:
-            infile = request.urlopen(url)
+            infile = http_open(url, offset or 0, self._connections)
+            if offset is not None:
+                yield offset if getattr(infile, "status", None) == 206 else 0
             file_size = utils.human_format_number(self.catalog_file_size(filename)).strip()
             stats = utils.TimingStats()
-            data = infile.read(config.CRDS_DATA_CHUNK_SIZE)
-            while data:
+            for data in read_chunks(infile):
+                if self._cancelled.is_set():
+                    raise CrdsDownloadError("download cancelled.")
                 stats.increment("bytes", len(data))
                 status = stats.status("bytes")
                 bytes_so_far = " ".join(status[0].split()[:-1])
                 log.verbose("Transferred HTTP", repr(url), bytes_so_far, "/", file_size, "bytes at", status[1], verbosity=20)
                 yield data
-                data = infile.read(config.CRDS_DATA_CHUNK_SIZE)
+            complete = True
         except Exception as exc:
             raise CrdsDownloadError(
                 "Failed downloading", srepr(filename),
                 "from url", srepr(url), ":", str(exc)) from exc
         finally:
+            if not complete and self._connections is not None:   # failed or abandoned mid-response
+                self._connections.drop(url)
             try:
                 infile.close()
             except UnboundLocalError:   # maybe the open failed.
@@ -732,8 +929,12 @@ class FileCacher:
         """Return the URL used to fetch `filename` of `pipeline_context`."""
         return get_flex_uri(filename, self.observatory)
 
-    def verify_file(self, filename, localpath):
-        """Check that the size and checksum of downloaded `filename` match the server."""
+    def verify_file(self, filename, localpath, sha1sum=None):
+        """Check that the size and checksum of downloaded `filename` match the server.
+
+        `sha1sum` is the checksum of `localpath` if it was already computed during the
+        download,  otherwise `localpath` is read back to compute it.
+        """
         remote_info = self.info_map[filename]
         local_length = os.stat(localpath).st_size
         original_length = int(remote_info["size"])
@@ -745,7 +946,7 @@ class FileCacher:
             log.verbose("Skipping sha1sum with CRDS_DOWNLOAD_CHECKSUMS=False")
         elif remote_info["sha1sum"] not in ["", "none"]:
             original_sha1sum = remote_info["sha1sum"]
-            local_sha1sum = utils.checksum(localpath)
+            local_sha1sum = sha1sum or utils.checksum(localpath)
             if original_sha1sum != local_sha1sum:
                 raise CrdsDownloadError(
                     "downloaded file", srepr(filename),
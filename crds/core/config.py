@@ -560,6 +560,36 @@ FORCE_COMPLETE_LOAD = BooleanConfigItem("CRDS_FORCE_COMPLETE_LOAD", False,
 
 EXPLICIT_GARBAGE_COLLECTION = BooleanConfigItem("CRDS_EXPLICIT_GARBAGE_COLLECTION", True,
     "When False, the @gc_collected function decorator skips garbage collection.")
+
+USE_MATCH_INDEX = BooleanConfigItem("CRDS_USE_MATCH_INDEX", True,
+    "When True, Match selectors winnow match cases using a compiled hash index rather than evaluating every matcher.")
+
+USE_MATCH_COLUMNS = BooleanConfigItem("CRDS_USE_MATCH_COLUMNS", False,
+    "When True, Match selectors winnow match cases using NumPy arrays of match case values,  overriding CRDS_USE_MATCH_INDEX.")
+
+BESTREF_MEMO_SIZE = IntConfigItem("CRDS_BESTREF_MEMO_SIZE", 10000,
+    "Number of best reference results each rmap remembers by matching parameters,  0 disables the memo.")
+
+BESTREFS_BATCH_SIZE = IntConfigItem("CRDS_BESTREFS_BATCH_SIZE", 1000,
+    "Number of datasets crds.bestrefs looks up together in one batch,  0 or 1 looks up each dataset separately.")
+
+MERGE_GROUP_CACHE_SIZE = IntConfigItem("CRDS_MERGE_GROUP_CACHE_SIZE", 1000,
+    "Number of merged selectors each Match selector remembers for equally weighted match cases,  0 disables the cache.")
+
+PRECOMPUTE_MERGE_GROUPS = BooleanConfigItem("CRDS_PRECOMPUTE_MERGE_GROUPS", False,
+    "When True, Match selectors merge the equally weighted match cases of their own match values when loaded.")
+
+VERIFIED_MAPPING_CACHE_SIZE = IntConfigItem("CRDS_VERIFIED_MAPPING_CACHE_SIZE", 2000,
+    "Number of verified and checksummed mapping files remembered by path,  modification time,  and size,  0 disables.")
+
+TRUST_CACHED_MAPPINGS = BooleanConfigItem("CRDS_TRUST_CACHED_MAPPINGS", False,
+    "When True, mappings located in the CRDS cache load without syntax verification or sha1sum checks.")
+
+MATCHER_CACHE_SIZE = IntConfigItem("CRDS_MATCHER_CACHE_SIZE", 50000,
+    "Number of Matchers and conditioned match key values shared by all loaded rmaps,  0 disables the caches.")
+
+TABLE_EFFECTS_MEMO_SIZE = IntConfigItem("CRDS_TABLE_EFFECTS_MEMO_SIZE", 10000,
+    "Number of bestrefs table effects comparisons remembered by reference pair and mode values,  0 disables the memo.")
 # -------------------------------------------------------------------------------------
 
 def get_sqlite3_db_path(observatory):
@@ -726,6 +756,22 @@ def get_download_plugin():
                 return program + " --no-check-certificate --quiet ${SOURCE_URL}  -O ${OUTPUT_PATH}"
     return None
 
+DOWNLOAD_WORKERS = IntConfigItem(
+    "CRDS_DOWNLOAD_WORKERS", 1,
+    "Number of files the CRDS client downloads concurrently.  Serial download == 1.")
+
+def get_download_workers():
+    """Return the integer number of concurrent file downloads,  at least 1."""
+    return max(DOWNLOAD_WORKERS.get(), 1)
+
+DOWNLOAD_TIMEOUT = IntConfigItem(
+    "CRDS_DOWNLOAD_TIMEOUT", 300,
+    "Seconds the CRDS client waits on a stalled download connection before failing.  No timeout == 0.")
+
+def get_download_timeout():
+    """Return the download connection timeout in seconds,  or None for no timeout."""
+    return DOWNLOAD_TIMEOUT.get() or None
+
 # -------------------------------------------------------------------------------------
 
 # This permits an AWS environment to override the URLs normally supplied by the
@@ -781,6 +827,10 @@ def get_client_retry_delay_seconds():
     """Return the integer number of seconds CRDS should wait between retrying failed network transactions."""
     return CLIENT_RETRY_DELAY_SECONDS.get()
 
+HEADER_PREFETCH_SEGMENTS = IntConfigItem(
+    "CRDS_HEADER_PREFETCH_SEGMENTS", 2,
+    "Number of dataset header segments bestrefs fetches from the server ahead of processing,  0 disables read-ahead.")
+
 def enable_retries(retry_count=20, delay_seconds=10):
     """Set reasonable defaults for CRDS retries"""
     CLIENT_RETRY_COUNT.set(retry_count)
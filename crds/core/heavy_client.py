@@ -54,6 +54,9 @@ import traceback
 import uuid
 import fnmatch
 import pickle
+import marshal
+import mmap
+import struct
 
 # ============================================================================
 
@@ -375,6 +378,28 @@ def hv_best_references(context_file, header, include=None, condition=True):
     log.verbose("Bestrefs header:\n", log.PP(minheader))
     return ctx.get_best_references(minheader, include=include)
 
+def hv_best_references_many(context_file, headers, include=None, condition=True, skip_logged=False):
+    """Compute hv_best_references() for many datasets at once,  where `headers` is
+    { dataset_id : header },  returning { dataset_id : { filekind : bestref } }.   Datasets
+    are grouped by the filekinds which apply to them and each group is looked up with one
+    call to the context's get_best_references_many().   If `skip_logged` is True,  datasets
+    whose lookups log errors or warnings are left out of the result.
+    """
+    ctx = get_symbolic_mapping(context_file, cached=True)
+    groups = {}
+    for dataset_id, header in headers.items():
+        conditioned = utils.condition_header(header) if condition else header
+        if include is None:
+            types = set(ctx.locate.header_to_reftypes(conditioned, context_file))
+            types = tuple(sorted(set(ctx.get_filekinds(conditioned)) & types))
+        else:
+            types = tuple(include)
+        groups.setdefault(types, {})[dataset_id] = ctx.minimize_header(conditioned)
+    results = {}
+    for types, group in groups.items():
+        results.update(ctx.get_best_references_many(group, include=list(types), skip_logged=skip_logged))
+    return { dataset_id : results[dataset_id] for dataset_id in headers if dataset_id in results }
+
 # ============================================================================
 
 # !!!!! interface to jwst.stpipe.crds_client
@@ -687,7 +712,8 @@ def get_pickled_mapping(mapping, cached=True, use_pickles=None, save_pickles=Non
     if use_pickles and config.is_simple_crds_mapping(mapping):
         try:
             loaded = load_pickled_mapping(mapping)
-        except Exception:
+        except Exception as exc:
+            log.verbose("Loading", repr(mapping), "from mapping files,  no usable pickle:", str(exc), verbosity=55)
             loaded = rmap.asmapping(mapping, cached=cached, **keys)
             if save_pickles:
                 save_pickled_mapping(mapping, loaded)
@@ -696,8 +722,9 @@ def get_pickled_mapping(mapping, cached=True, use_pickles=None, save_pickles=Non
     return loaded
 
 def load_pickled_mapping(mapping):
-    """Load the pickle for `mapping` where `mapping` is canonically named and
-    located in the CRDS cache.
+    """Load the context snapshot for `mapping` where `mapping` is canonically named
+    and located in the CRDS cache.   Snapshots are stored under the traditional pickle
+    names so --save-pickles,  --clear-pickles,  and CRDS_PICKLE_URI work unchanged.
 
     Although pickles for sub-mappings may exist, only the highest level pickle
     in the hierarchy is read.  In general pickles for sub-mappings should not
@@ -705,22 +732,25 @@ def load_pickled_mapping(mapping):
     """
     pickle_uri = config.get_uri(mapping + ".pkl")
     if pickle_uri == "none":
-        pickle_uri = config.locate_pickle(mapping)
-    pickled = utils.get_uri_content(pickle_uri, mode="binary")
-    loaded = pickle.loads(pickled)
+        snapshot = ContextSnapshot.from_file(config.locate_pickle(mapping))
+    else:
+        snapshot = ContextSnapshot(pickle_uri, utils.get_uri_content(pickle_uri, mode="binary"))
+    if snapshot.is_legacy_pickle():   # e.g. S3 pickle buckets which do not include mapping files
+        loaded = pickle.loads(snapshot.contents)
+    else:
+        loaded = snapshot.load(os.path.basename(mapping))
     log.info("Loaded pickled context", repr(mapping))
     return loaded
 
 def save_pickled_mapping(mapping, loaded):
-    """Save live mapping `loaded` as a pickle under named based on `mapping` name."""
+    """Save live mapping `loaded` as a context snapshot under named based on `mapping` name."""
     pickle_file = config.locate_pickle(mapping)
     if not utils.is_writable(pickle_file):  # Don't even bother pickling
         log.verbose("Pickle file", repr(pickle_file), "is not writable,  skipping pickle save.")
         return
     with log.verbose_warning_on_exception("Failed saving pickle for", repr(mapping), "to", repr(pickle_file)):
         loaded.force_load()
-        pickled = pickle.dumps(loaded)
-        cache_atomic_write(pickle_file, pickled, "CONTEXT PICKLE")
+        cache_atomic_write(pickle_file, dump_snapshot(loaded), "CONTEXT PICKLE")
         log.info("Saved pickled context", repr(pickle_file))
 
 def remove_pickled_mapping(mapping):
@@ -735,3 +765,136 @@ def remove_pickled_mapping(mapping):
     with log.warn_on_exception("Failed removing pickle for", repr(mapping)):
         os.remove(pickle_file)
         log.info("Removed pickle for context", repr(pickle_file))
+
+# ============================================================================
+
+# Context snapshots are the on-disk form of a fully loaded context used by
+# get_pickled_mapping().   A snapshot file consists of:
+#
+#   preamble   struct SNAPSHOT_PREAMBLE:  SNAPSHOT_MAGIC,  SNAPSHOT_FORMAT,  index length
+#   index      marshal'ed dict:  CRDS version,  top mapping name,
+#              and the records { mapping_name : (kind, offset, length, sha1sum) },
+#              where sha1sum is None unless it was checked against the mapping text
+#   records    one per mapping,  offsets relative to the end of the index
+#
+# A "context" record is a marshal'ed (header, selector, comment) tuple for a .pmap
+# or .imap,  re-instantiated without parsing or checksumming mapping text.  A "pickle"
+# record is a pickled ReferenceMapping.  Records are materialized only when first
+# selected by get_imap() or get_rmap(),  so a process which uses a few types of one
+# instrument never reads or unpickles the rest of the context.  Snapshots in other
+# formats or written by any other version of CRDS are stale and rejected,  causing
+# get_pickled_mapping() to fall back to loading the mapping files and,  if pickles
+# are being saved,  to rebuild the snapshot.   Whole context pickles written by
+# earlier versions of CRDS are still loaded as-is.
+#
+# Materialized mappings are shared by basename and sha1sum with identical mappings
+# loaded from other snapshots or by rmap.load_shared_mapping(),  so a process which
+# loads several versions of a context holds one copy of each unchanged mapping.
+
+SNAPSHOT_MAGIC = b"CRDSSNAP"
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_PREAMBLE = struct.Struct("<8sII")
+
+class CrdsStaleSnapshotError(CrdsError):
+    """The context snapshot is not readable by this version of CRDS."""
+
+def dump_snapshot(loaded):
+    """Return the bytes of a context snapshot of fully loaded Mapping `loaded`."""
+    import crds
+    records = {}
+    chunks = []
+    offset = 0
+    for name, kind, data, sha1sum in _snapshot_records(loaded):
+        records[name] = (kind, offset, len(data), sha1sum)
+        chunks.append(data)
+        offset += len(data)
+    index = marshal.dumps(dict(
+        crds_version=crds.__version__,
+        mapping=loaded.basename,
+        records=records))
+    preamble = SNAPSHOT_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, len(index))
+    return b"".join([preamble, index] + chunks)
+
+def _snapshot_records(loaded):
+    """Yield (name, kind, data, sha1sum) for each snapshot record of `loaded` and its nested mappings."""
+    sha1sum = loaded._verified_sha1sum
+    if isinstance(loaded, rmap.ContextMapping):
+        yield loaded.basename, "context", marshal.dumps((dict(loaded.header), dict(loaded.selector), loaded.comment)), sha1sum
+        for nested in loaded.selections.normal_values():
+            yield from _snapshot_records(nested)
+    else:
+        yield loaded.basename, "pickle", pickle.dumps(loaded, pickle.HIGHEST_PROTOCOL), sha1sum
+
+class ContextSnapshot:
+    """Reads Mappings from the context snapshot `contents` originally located at `uri`.
+    Records are materialized on demand as the loader of snapshot context selections.
+    """
+    context_classes = {
+        "pipeline" : rmap.PipelineContext,
+        "instrument" : rmap.InstrumentContext,
+    }
+
+    def __init__(self, uri, contents):
+        self.uri = uri
+        self.contents = contents
+        self.mapping = None
+        self.records = {}
+        self.data_start = 0
+        if self.is_legacy_pickle():
+            return
+        magic, format_, index_length = SNAPSHOT_PREAMBLE.unpack_from(contents)
+        if magic != SNAPSHOT_MAGIC or format_ != SNAPSHOT_FORMAT:
+            raise CrdsStaleSnapshotError("Unsupported context snapshot format in", repr(uri))
+        start = SNAPSHOT_PREAMBLE.size
+        index = marshal.loads(contents[start:start + index_length])
+        import crds
+        if index["crds_version"] != crds.__version__:
+            raise CrdsStaleSnapshotError(
+                "Context snapshot", repr(uri), "was written by CRDS", repr(index["crds_version"]),
+                "not", repr(crds.__version__))
+        self.mapping = index["mapping"]
+        self.records = index["records"]
+        self.data_start = start + index_length
+
+    def is_legacy_pickle(self):
+        """Return True IFF this snapshot is actually a whole-context pickle written by older CRDS."""
+        return self.contents[:1] == b"\x80"
+
+    @classmethod
+    def from_file(cls, path):
+        """Memory map the snapshot file at `path` rather than reading it."""
+        with open(path, "rb") as handle:
+            return cls(path, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __getstate__(self):
+        """Snapshot contexts can be pickled;  the snapshot is re-read when unpickled."""
+        return dict(uri=self.uri)
+
+    def __setstate__(self, state):
+        if os.path.exists(state["uri"]):
+            self.__dict__ = dict(self.from_file(state["uri"]).__dict__)
+        else:
+            self.__init__(state["uri"], utils.get_uri_content(state["uri"], mode="binary"))
+
+    def load(self, name, **keys):
+        """Return the Mapping for `name`,  reusing an identical shared mapping or
+        materializing it from the snapshot if possible,  otherwise loading it normally.
+        Used as a MappingSelectionsDict loader.
+        """
+        name = os.path.basename(name)
+        if name not in self.records:
+            log.verbose("Mapping", repr(name), "not in context snapshot", repr(self.uri), verbosity=55)
+            return rmap.load_mapping(name)
+        kind, offset, length, sha1sum = self.records[name]
+        shared = rmap.get_shared_mapping(name, sha1sum)
+        if shared is not None:
+            return shared
+        data = memoryview(self.contents)[self.data_start + offset : self.data_start + offset + length]
+        if kind == "context":
+            header, selector, comment = marshal.loads(data)
+            cls = self.context_classes[header["mapping"].lower()]
+            loaded = cls(name, header, selector, comment=comment, loader=self.load)
+        else:
+            loaded = pickle.loads(data)
+        loaded._verified_sha1sum = sha1sum
+        return rmap.share_mapping(loaded)
@@ -327,6 +327,52 @@ def set_log_time(enable_time=False):
 
 # ===========================================================================
 
+class DeferredLogHandler(logging.Handler):
+    """Logging handler which appends log records to an event list for later replay,
+    e.g. by a parent process merging the output of worker processes in order.
+    """
+    def __init__(self, events=None):
+        super(DeferredLogHandler, self).__init__()
+        self.events = [] if events is None else events
+
+    def emit(self, record):
+        self.events.append(("record", record))
+
+@contextlib.contextmanager
+def deferred_log(events):
+    """Divert CRDS log records issued inside the with-block onto `events` as
+    ("record", logging.LogRecord) tuples rather than outputting them.   Message
+    counts are still incremented.   Replay with replay_log().
+
+    >>> events = []
+    >>> with deferred_log(events):
+    ...     info("Deferred message.")
+    >>> len(events)
+    1
+    >>> replay_log(events)
+    CRDS - INFO -  Deferred message.
+    """
+    logger = THE_LOGGER.logger
+    handlers = list(logger.handlers)
+    for handler in handlers:
+        logger.removeHandler(handler)
+    deferred = DeferredLogHandler(events)
+    logger.addHandler(deferred)
+    try:
+        yield
+    finally:
+        logger.removeHandler(deferred)
+        for handler in handlers:
+            logger.addHandler(handler)
+
+def replay_log(events):
+    """Output the ("record", logging.LogRecord) events of `events` captured by deferred_log()."""
+    for event in events:
+        if event[0] == "record":
+            THE_LOGGER.logger.handle(event[1])
+
+# ===========================================================================
+
 @contextlib.contextmanager
 def reduced_verbosity(reduced_level, threshhold):
     """Sets the global verbosity level to `reduced_level` as long as it is already below `threshhold`
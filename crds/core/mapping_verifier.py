@@ -4,7 +4,6 @@ in rmaps.  Verfication is part of basic checking which is executed whenever and
 Mapping is loaded, and is non-recursive.
 """
 import ast
-import sys
 
 from . import exceptions as crexc
 from . import selectors
@@ -119,8 +118,10 @@ class MappingVerifier(ast.NodeVisitor):
         """Parse `text` to verify that it's a legal mapping, and return a
         compiled code object.
         """
-        if sys.version_info >= (2, 7, 0):
-            self.visit(ast.parse(text))
+        tree = ast.parse(text)
+        self.visit(tree)
+        if mode == "exec":    # compile the verified tree rather than parsing again
+            return compile(tree, source, mode)
         return compile(text, source, mode)
 
     def __getattribute__(self, attr):
@@ -54,8 +54,11 @@ True
 import os.path
 import glob
 import json
+import contextlib
+import threading
+import weakref
 
-from collections import namedtuple
+from collections import namedtuple, defaultdict, Counter
 
 # ===================================================================
 
@@ -91,6 +94,7 @@ __all__ = [
     "list_mappings",
     "list_references",
     "get_best_references",
+    "get_best_references_many",
     "mapping_type",
 ]
 
@@ -100,6 +104,51 @@ Filetype = namedtuple("Filetype","header_keyword,extension,rmap")
 Failure  = namedtuple("Failure","header_keyword,message")
 Filemap  = namedtuple("Filemap","date,file,comment")
 
+# Marks get_best_ref() memo misses,  distinct from None results for omitted types.
+_MEMO_MISSING = object()
+
+# Process-wide "hits" and "misses" of the ReferenceMapping.get_best_ref() memos.
+BESTREF_MEMO_COUNTS = Counter()
+
+def _log_count():
+    """Return the number of errors and warnings logged so far."""
+    return log.errors() + log.warnings()
+
+# Compiled code of mapping files which passed verification and checksumming,  keyed by
+# (path, modification time, size) so that reloading an unchanged file skips both.
+VERIFIED_MAPPING_COUNTS = Counter()
+
+def _make_verified_mappings():
+    """Return a new cache of verified mapping code sized by CRDS_VERIFIED_MAPPING_CACHE_SIZE,
+    or None if the cache is disabled.
+    """
+    size = config.VERIFIED_MAPPING_CACHE_SIZE.get()
+    return utils.LRUCache(size, VERIFIED_MAPPING_COUNTS) if size > 0 else None
+
+_VERIFIED_MAPPINGS = _make_verified_mappings()
+
+def clear_verified_mappings():
+    """Forget all verified mapping code,  resizing the cache for the current value of
+    CRDS_VERIFIED_MAPPING_CACHE_SIZE.
+    """
+    global _VERIFIED_MAPPINGS
+    _VERIFIED_MAPPINGS = _make_verified_mappings()
+
+def _verification_key(filename):
+    """Return the (path, mtime, size) key identifying the current contents of mapping
+    file `filename`,  or None if `filename` is not a local file.
+    """
+    try:
+        stat = os.stat(filename)
+    except (OSError, ValueError):
+        return None
+    return (os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+
+# Mappings loaded by load_shared_mapping() or from context snapshots,  weakly held by
+# (basename, sha1sum) so that contexts loaded together share identical sub-mappings.
+SHARED_MAPPINGS = weakref.WeakValueDictionary()
+_SHARED_MAPPINGS_LOCK = threading.Lock()
+
 # =============================================================================
 
 class LowerCaseDict(dict):
@@ -155,6 +204,9 @@ class Mapping:
     # no precursor file if derived_from contains any of these.
     null_derivation_substrings = ("generated", "cloning", "by hand")
 
+    # header sha1sum once it has been checked against the mapping's source text,  required for sharing.
+    _verified_sha1sum = None
+
     def __init__(self, filename, header, selector, **keys):
         self.filename = filename
         self.header = LowerCaseDict(header)   # consistent lower case values
@@ -263,35 +315,60 @@ class Mapping:
             basename = filename
         else:
             filename = config.locate_mapping(basename)
+        file_key = _verification_key(filename)
+        code = _VERIFIED_MAPPINGS.get(file_key) if file_key and _VERIFIED_MAPPINGS is not None else None
+        if code is not None:
+            mapping = cls._from_code(code, basename, *args, **keys)
+            mapping._verified_sha1sum = mapping.header.get("sha1sum", None)
+            return mapping
         text = utils.get_uri_content(filename)
-        return cls.from_string(text, basename, *args, **keys)
+        trusted = not path and not os.path.dirname(basename) and config.TRUST_CACHED_MAPPINGS.get()
+        code = cls._compile(text, basename, verify=not trusted)
+        mapping = cls._from_code(code, basename, *args, **keys)
+        # Only code which actually passed verification and checksumming is remembered,
+        # so trusted loads never make unverified code look verified later.
+        checksum_ok = not trusted and mapping._check_text_hash(text, **keys)
+        if file_key and checksum_ok and _VERIFIED_MAPPINGS is not None:
+            _VERIFIED_MAPPINGS[file_key] = code
+        return mapping
 
     @classmethod
     def from_string(cls, text, basename="(noname)", *args, **keys):
         """Construct a mapping from string `text` nominally named `basename`."""
+        code = cls._compile(text, basename)
+        mapping = cls._from_code(code, basename, *args, **keys)
+        mapping._check_text_hash(text, **keys)
+        return mapping
+
+    @classmethod
+    def _from_code(cls, code, basename, *args, **keys):
+        """Construct a mapping named `basename` from compiled mapping `code`."""
         keys.pop("comment", None) #  discard comment if defined
-        header, selector, comment = cls._parse_header_selector(text, basename)
-        mapping = cls(basename, header, selector, comment=comment, **keys)
-        try:
-            mapping._check_hash(text)
-        except crexc.ChecksumError as exc:
-            ignore = keys.get("ignore_checksum", False) or config.get_ignore_checksum()
-            if ignore == "warn":
-                log.warning("Checksum error", ":", str(exc))
-            elif ignore:
-                pass
+        with log.augment_exception("Can't load file " + basename,
+                                   exception_class=crexc.MappingError):
+            header, selector, comment = cls._interpret(code)
+        return cls(basename, LowerCaseDict(header), selector, comment=comment, **keys)
+
+    @classmethod
+    def _compile(cls, text, where="", verify=True):
+        """Return the code object for mapping `text`,  verifying that it only contains
+        the constructs permitted in mappings unless `verify` is False.
+        """
+        with log.augment_exception("Can't load file " + where,
+                                   exception_class=crexc.MappingError):
+            if verify:
+                return MAPPING_VERIFIER.compile_and_check(text)
             else:
-                raise
-        return mapping
+                return compile(text, "<ast>", "exec")
 
     @classmethod
     def _parse_header_selector(cls, text, where=""):
         """Given a mapping at `filepath`,  validate it and return a fully
         instantiated (header, selector) tuple.
         """
+        code = cls._compile(text, where)
         with log.augment_exception("Can't load file " + where,
                                    exception_class=crexc.MappingError):
-            code = MAPPING_VERIFIER.compile_and_check(text)
             header, selector, comment = cls._interpret(code)
         return LowerCaseDict(header), selector, comment
 
@@ -388,6 +465,25 @@ class Mapping:
         with open(filename, "w+") as handle:
             handle.write(self.format())
 
+    def _check_text_hash(self, text, **keys):
+        """Check the sha1sum of this mapping against its source `text`,  returning True
+        if it is correct.   Checksum errors are raised unless ignored by the `ignore_checksum`
+        keyword or CRDS_IGNORE_MAPPING_CHECKSUM,  either of which may be "warn".
+        """
+        try:
+            self._check_hash(text)
+            self._verified_sha1sum = self.header["sha1sum"]
+        except crexc.ChecksumError as exc:
+            ignore = keys.get("ignore_checksum", False) or config.get_ignore_checksum()
+            if ignore == "warn":
+                log.warning("Checksum error", ":", str(exc))
+            elif ignore:
+                pass
+            else:
+                raise
+            return False
+        return True
+
     def _check_hash(self, text):
         """Verify that the mapping header has a checksum and that it is
         correct,  else raise an appropriate exception.
@@ -400,10 +496,7 @@ class Mapping:
 
     def _get_checksum(self, text):
         """Compute the rmap checksum over the original file contents.  Skip over the sha1sum line."""
-        # Compute the new checksum over everything but the sha1sum line.
-        # This will fail if sha1sum appears for some other reason.  It won't ;-)
-        text = "".join([line for line in text.splitlines(True) if "sha1sum" not in line])
-        return utils.str_checksum(text)
+        return _text_checksum(text)
 
     rewrite_checksum = write
     #    """Re-write checksum updates the checksum for a Mapping writing the
@@ -736,6 +829,21 @@ class PipelineContext(ContextMapping):
         imap = self.get_imap(instrument)
         return imap.get_best_references(header, include)
 
+    def get_best_references_many(self, headers, include=None, skip_logged=False):
+        """Return the best references for many datasets as { dataset_id : { filekind : bestref } }
+        given `headers` { dataset_id : header }.   Headers are grouped by instrument so that each
+        instrument's rmaps are visited once per group rather than once per dataset.   See
+        InstrumentContext.get_best_references_many() for `skip_logged`.
+        """
+        groups = defaultdict(dict)
+        for dataset_id, header in headers.items():
+            groups[self.get_instrument(header)][dataset_id] = dict(header)
+        results = {}
+        for instrument, group in groups.items():
+            imap = self.get_imap(instrument)
+            results.update(imap.get_best_references_many(group, include, skip_logged=skip_logged))
+        return { dataset_id : results[dataset_id] for dataset_id in headers if dataset_id in results }
+
     def get_old_references(self, header, include=None):
         """Return the old references defined in keyword map `header` using this
         context to define the types to return when `include` is None.
@@ -900,20 +1008,58 @@ class InstrumentContext(ContextMapping):
         for filekind in include:
             log.verbose("-"*120, verbosity=55)
             filekind = filekind.lower()
-            ref = None
-            try:
-                ref = self.get_rmap(filekind).get_best_ref(header)
-            except crexc.IrrelevantReferenceTypeError:
-                ref = "NOT FOUND n/a"
-            except crexc.OmitReferenceTypeError:
-                ref = None
-            except Exception as exc:
-                ref = "NOT FOUND " + str(exc)
+            ref = self._get_best_ref(filekind, header)
             if ref is not None:
                 refs[filekind] = ref
         log.verbose("-"*120, verbosity=55)
         return refs
 
+    def _get_best_ref(self, filekind, header):
+        """Return the best reference for `filekind` and `header`,  mapping exceptions
+        onto "NOT FOUND..." strings,  or None if the type is omitted.
+        """
+        try:
+            return self.get_rmap(filekind).get_best_ref(header)
+        except crexc.IrrelevantReferenceTypeError:
+            return "NOT FOUND n/a"
+        except crexc.OmitReferenceTypeError:
+            return None
+        except Exception as exc:
+            return "NOT FOUND " + str(exc)
+
+    def get_best_references_many(self, headers, include=None, skip_logged=False):
+        """Return { dataset_id : { filekind : bestref } } for `headers` { dataset_id : header },
+        looking up each filekind's rmap once for the whole group with get_best_refs().   Results
+        are identical to calling get_best_references() on each header individually.
+
+        If `skip_logged` is True,  datasets with any lookup which logs an error or warning are
+        left out of the result.
+        """
+        refs = { dataset_id : {} for dataset_id in headers }
+        skipped = set()
+        if not include:
+            include = self.selections.keys()
+        for filekind in include:
+            filekind = filekind.lower()
+            try:
+                found = self.get_rmap(filekind).get_best_refs(headers, skip_logged=skip_logged)
+            except crexc.IrrelevantReferenceTypeError:
+                found = dict.fromkeys(headers, "NOT FOUND n/a")
+            except crexc.OmitReferenceTypeError:
+                continue
+            except Exception:
+                # Unknown type or untrapped failure:  redo per dataset to define each result exactly.
+                if skip_logged:
+                    skipped.update(headers)
+                    continue
+                found = { dataset_id : self._get_best_ref(filekind, header)
+                          for (dataset_id, header) in headers.items() }
+            skipped.update(dataset_id for dataset_id in headers if dataset_id not in found)
+            for dataset_id, ref in found.items():
+                if ref is not None:
+                    refs[dataset_id][filekind] = ref
+        return { dataset_id : refs[dataset_id] for dataset_id in headers if dataset_id not in skipped }
+
     def get_old_references(self, header, include=None):
         """Returns a map of old references which were recorded in `header`,
         returning only those types listed in `include` or all types if
@@ -1079,21 +1225,66 @@ class ReferenceMapping(Mapping):
         # Actually compile lambdas for the hooks above.
         self._init_compiled()
 
+        self._init_bestref_memo()
+
+    # Attributes defined by _init_compiled() and _init_bestref_memo() which are dropped
+    # from pickling state and recreated on first use after unpickling.
+    _compiled_attrs = frozenset([
+        "_rmap_relevance_expr", "_rmap_omit_expr", "_parkey_relevance_exprs",
+        "_precondition_header", "_fallback_header", "_rmap_update_headers",
+        "_bestref_memo", "_bestref_memo_keys",
+    ])
+
     def __getstate__(self):
         """Return rmap pickling state,  minus lambdas and anything else that doesn't pickle."""
         state = dict(self.__dict__)
-        del state["_rmap_relevance_expr"]
-        del state["_rmap_omit_expr"]
-        del state["_parkey_relevance_exprs"]
-        del state["_precondition_header"]
-        del state["_fallback_header"]
-        del state["_rmap_update_headers"]
+        for name in self._compiled_attrs:
+            state.pop(name, None)
         return state
 
     def __setstate__(self, state):
-        """Recreate rmap object from `state`,  recompiling missing __getstate__ objects on the fly."""
+        """Recreate rmap object from `state`.   The objects dropped by __getstate__ are
+        recompiled by __getattr__ when first used,  so rmaps which are unpickled but
+        never matched against cost nothing to compile.
+        """
         self.__dict__ = dict(state)
-        self._init_compiled()
+
+    def __getattr__(self, attr):
+        """Compile expressions and hooks missing after unpickling on demand,  otherwise
+        access required header parameters as for any Mapping.
+        """
+        if attr in ReferenceMapping._compiled_attrs and "header" in self.__dict__:
+            self._init_compiled()
+            self._init_bestref_memo()
+            return self.__dict__[attr]
+        return super(ReferenceMapping, self).__getattr__(attr)
+
+    def _init_bestref_memo(self):
+        """Initialize the memo of get_best_ref() results keyed by matching parameters."""
+        memo_size = config.BESTREF_MEMO_SIZE.get()
+        self._bestref_memo = utils.LRUCache(memo_size, BESTREF_MEMO_COUNTS) if memo_size > 0 else None
+        # Expressions are also keyed on any names they use which are not parkeys.
+        exprs = [self._rmap_relevance_expr, self._rmap_omit_expr] + list(self._parkey_relevance_exprs.values())
+        names = [name for (_source, code) in exprs for name in getattr(code, "co_names", ())]
+        names += [name.replace("_", ".") for name in names]
+        self._bestref_memo_keys = frozenset(key.upper() for key in list(self._required_parkeys) + names)
+
+    def clear_bestref_memo(self):
+        """Discard remembered get_best_ref() results,  e.g. after modifying the selector."""
+        if self._bestref_memo is not None:
+            self._bestref_memo.clear()
+
+    def _bestref_memo_key(self, header):
+        """Return the memo key for `header` consisting of the items for this rmap's
+        required parkeys,  or None if `header` cannot be memoized.
+        """
+        memo_keys = self._bestref_memo_keys
+        try:
+            key = tuple(sorted(item for item in header.items() if item[0].upper() in memo_keys))
+            hash(key)
+        except (TypeError, AttributeError):
+            return None
+        return key
 
     def force_load(self):
         """Nothing below ReferenceMapping is loaded."""
@@ -1204,52 +1395,145 @@ class ReferenceMapping(Mapping):
     def get_best_ref(self, header):
         """Return a single best reference value associated with this .rmap and `header`.  Map exceptions
         from nested methods onto simple "NOT FOUND..." strings which are exempted from reference downloads.
+
+        Results are remembered by the values of this rmap's required parkeys,  so headers which differ
+        only in other keywords are looked up once.   Results which logged warnings or trapped an
+        exception are recomputed for each header.
         """
-        try:
-            return self._get_best_ref(header)
-        except crexc.IrrelevantReferenceTypeError:
-            return "NOT FOUND n/a"
-        except crexc.OmitReferenceTypeError:
-            return None
-        except Exception as exc:
-            if log.get_exception_trap():
-                return "NOT FOUND " + str(exc)
+        memo = self._bestref_memo
+        key = None if memo is None else self._bestref_memo_key(header)
+        if key is None:
+            return self._get_best_refs_trapped([header])[0][0]
+        bestref = memo.get(key, _MEMO_MISSING)
+        if bestref is _MEMO_MISSING:
+            bestref, logged, trapped = self._get_best_refs_trapped([header])[0]
+            if not (logged or trapped):
+                memo[key] = bestref
+        return bestref
+
+    def get_best_refs(self, headers, skip_logged=False):
+        """Return { dataset_id : bestref } for `headers` { dataset_id : header }.
+
+        Headers are grouped by the values which key the get_best_ref() memo.   The headers
+        of groups not already remembered are conditioned together and matched by one call to
+        the selector's choose_many(),  which winnows the match cases once for each combination
+        of match parameters,  and each result is shared by its group.   Per-dataset results,
+        error trapping,  and log messages are the same as calling get_best_ref() on each header.
+
+        If `skip_logged` is True,  datasets whose lookup logs an error or warning are left out
+        of the result rather than computed one by one,  e.g. for the caller to repeat individually.
+        """
+        memo = self._bestref_memo
+        refs, groups, pending = {}, {}, []
+        for dataset_id, header in headers.items():
+            key = self._bestref_memo_key(header)
+            if key is None:
+                pending.append((None, [dataset_id]))
             else:
-                raise
+                groups.setdefault(key, []).append(dataset_id)
+        for key, dataset_ids in groups.items():
+            bestref = _MEMO_MISSING if memo is None else memo.get(key, _MEMO_MISSING)
+            if bestref is _MEMO_MISSING:
+                pending.append((key, dataset_ids))
+            else:
+                refs.update(dict.fromkeys(dataset_ids, bestref))
+        found = self._get_best_refs_trapped([headers[dataset_ids[0]] for (_key, dataset_ids) in pending])
+        for (key, dataset_ids), (bestref, logged, trapped) in zip(pending, found):
+            if logged:   # repeat the messages for each dataset as individual lookups would
+                if not skip_logged:
+                    refs[dataset_ids[0]] = bestref
+                    for dataset_id in dataset_ids[1:]:
+                        refs[dataset_id] = self.get_best_ref(headers[dataset_id])
+                continue
+            if key is not None and memo is not None and not trapped:
+                memo[key] = bestref
+            refs.update(dict.fromkeys(dataset_ids, bestref))
+        return { dataset_id : refs[dataset_id] for dataset_id in headers if dataset_id in refs }
+
+    def _get_best_refs_trapped(self, headers):
+        """Return [(bestref, logged, trapped), ...] for each of the list of `headers` computed
+        without the memo,  where `logged` is True if the lookup logged errors or warnings and
+        `trapped` is True if it trapped an exception.   Neither kind of result can be remembered:
+        doing so would drop the messages for later datasets with the same parameters,  or outlive
+        a change to log.set_exception_trap().
+        """
+        results = [None] * len(headers)
+        lookups = []
+        for i, header_in in enumerate(headers):
+            logged = _log_count()
+            header_in = dict(header_in)
+            try:
+                header = self._lookup_header(header_in)
+            except Exception as exc:
+                results[i] = self._trap_bestref_exception(exc, _log_count() != logged)
+            else:
+                lookups.append((i, header_in, header, _log_count() != logged))
+        logged = _log_count()
+        choices = self.selector.choose_many([header for (_i, _header_in, header, _logged) in lookups])
+        choose_logged = _log_count() != logged
+        for (i, header_in, header, lookup_logged), choice in zip(lookups, choices):
+            logged = _log_count()
+            try:
+                if isinstance(choice, Exception):
+                    log.verbose("First selection failed:", str(choice), verbosity=55)
+                    choice = self._fallback_choice(header_in, choice)
+                bestref = self._screen_bestref(choice)
+            except Exception as exc:
+                results[i] = self._trap_bestref_exception(
+                    exc, lookup_logged or choose_logged or _log_count() != logged)
+            else:
+                results[i] = (bestref, lookup_logged or choose_logged or _log_count() != logged, False)
+        return results
+
+    def _trap_bestref_exception(self, exc, logged):
+        """Return (bestref, logged, trapped) for a lookup which raised `exc`,  or re-raise `exc`
+        if exceptions are not being trapped.
+        """
+        if isinstance(exc, crexc.IrrelevantReferenceTypeError):
+            return "NOT FOUND n/a", logged, False
+        elif isinstance(exc, crexc.OmitReferenceTypeError):
+            return None, logged, False
+        elif log.get_exception_trap():
+            return "NOT FOUND " + str(exc), logged, True
+        else:
+            raise exc
 
-    def _get_best_ref(self, header_in):
-        """Return the single reference file basename appropriate for
-        `header_in` selected by this ReferenceMapping.
+    def _lookup_header(self, header_in):
+        """Check the rmap omit and relevance expressions against `header_in` and return the
+        preconditioned header which is matched against the selector.
         """
-        header_in = dict(header_in)
         log.verbose("Getting bestrefs:", self.basename, verbosity=55)
         expr_header = utils.condition_header_keys(header_in)
         self.check_rmap_omit(expr_header)     # Should bestref be omitted based on rmap_omit expr?
         self.check_rmap_relevance(expr_header)  # Should bestref be set N/A based on rmap_relevance expr?
         # Some filekinds, .e.g. ACS biasfile, mutate the header
         header = self._precondition_header(self, header_in) # Execute type-specific plugin if applicable
-        header = self.map_irrelevant_parkeys_to_na(header)  # Execute rmap parkey_relevance conditions
+        return self.map_irrelevant_parkeys_to_na(header)  # Execute rmap parkey_relevance conditions
+
+    def _fallback_choice(self, header_in, exc):
+        """Return the choice for the fallback header of `header_in` after the first selection
+        failed with `exc`,  or raise if there is no fallback or it fails too.
+        """
+        header = self._fallback_header(self, header_in) # Execute type-specific plugin if applicable
         try:
-            bestref = self.selector.choose(header)
+            if header:
+                header = self.minimize_header(header)
+                log.verbose("Fallback lookup on", repr(header), verbosity=55)
+                header = self.map_irrelevant_parkeys_to_na(header) # Execute rmap parkey_relevance conditions
+                return self.selector.choose(header)
+            else:
+                raise exc
         except Exception as exc:
-            log.verbose("First selection failed:", str(exc), verbosity=55)
-            header = self._fallback_header(self, header_in) # Execute type-specific plugin if applicable
-            try:
-                if header:
-                    header = self.minimize_header(header)
-                    log.verbose("Fallback lookup on", repr(header), verbosity=55)
-                    header = self.map_irrelevant_parkeys_to_na(header) # Execute rmap parkey_relevance conditions
-                    bestref = self.selector.choose(header)
-                else:
-                    raise
-            except Exception as exc:
-                log.verbose("Fallback selection failed:", str(exc), verbosity=55)
-                if self._reffile_required in ["YES", "NONE"]:
-                    log.verbose("No match found and reference is required:",  str(exc), verbosity=55)
-                    raise
-                else:
-                    log.verbose("No match found but reference is not required:",  str(exc), verbosity=55)
-                    raise crexc.IrrelevantReferenceTypeError("No match found and reference type is not required.") from exc
+            log.verbose("Fallback selection failed:", str(exc), verbosity=55)
+            if self._reffile_required in ["YES", "NONE"]:
+                log.verbose("No match found and reference is required:",  str(exc), verbosity=55)
+                raise
+            else:
+                log.verbose("No match found but reference is not required:",  str(exc), verbosity=55)
+                raise crexc.IrrelevantReferenceTypeError("No match found and reference type is not required.") from exc
+
+    def _screen_bestref(self, bestref):
+        """Return `bestref`,  or raise if the rules define it as N/A or OMIT."""
         log.verbose("Found bestref", repr(self.instrument), repr(self.filekind), "=", repr(bestref), verbosity=55)
         if MappingSelectionsDict.is_na_value(bestref):
             raise crexc.IrrelevantReferenceTypeError("Rules define this type as Not Applicable for these observation parameters.")
@@ -1507,14 +1791,37 @@ class ReferenceMapping(Mapping):
 
     def insert_header_reference(self, header, reffile):
         """Returns new ReferenceMapping made from `self` inserting `reffile`."""
+        new = self.copy()
+        new.insert_header_reference_in_place(header, reffile)
+        return new
+
+    def insert_reference_in_place(self, reffile):
+        """Modify `self` inserting `reffile`,  see bulk_update()."""
+        header = self.get_refactor_header(reffile)
+        self.insert_header_reference_in_place(header, os.path.basename(reffile))
+
+    def insert_header_reference_in_place(self, header, reffile):
+        """Modify `self` inserting `reffile` matched by `header`,  see bulk_update()."""
         if self._rmap_update_headers:
             # Generate variations on header as needed to emulate header "pre-conditioning" and fall back scenarios.
+            # Each variation was historically inserted into a fresh copy,  so only the last one takes effect.
             for hdr in self._rmap_update_headers(self, header):
-                new = self.insert(hdr, reffile)
-        else:
-            # almost all instruments/types do this.
-            new = self.insert(header, reffile)
-        return new
+                header = hdr
+        # almost all instruments/types do this.
+        self.insert_in_place(header, reffile)
+
+    @contextlib.contextmanager
+    def bulk_update(self):
+        """Yield a copy of `self` to be modified by a series of insert_reference_in_place()
+        or insert_header_reference_in_place() calls.   Unlike successive insert_reference()
+        calls,  the rmap is copied once and the modified selectors are rebuilt once,  when the
+        context exits.   Within the context only the rmap's match cases,  e.g. file_matches(),
+        reflect the insertions;  bestrefs and format() should wait until it exits.
+        """
+        new = self.copy()
+        with selectors.deferred_rebuilds():
+            yield new
+        new.clear_bestref_memo()
 
     def get_reference_parkeys(self):
         """Return parkey names from the reference file perspective,  this can be a superset
@@ -1533,10 +1840,15 @@ class ReferenceMapping(Mapping):
         of this rmap and return it.
         """
         new = self.copy()
-        new.selector.insert(header, value,
-            self.tpn_valid_values if not config.ALLOW_BAD_PARKEY_VALUES else {})
+        new.insert_in_place(header, value)
         return new
 
+    def insert_in_place(self, header, value):
+        """Given reference file `header` and terminal `value`, insert the value into this rmap."""
+        self.selector.insert(header, value,
+            self.tpn_valid_values if not config.ALLOW_BAD_PARKEY_VALUES else {})
+        self.clear_bestref_memo()
+
     def delete(self, terminal):
         """Remove all instances of `terminal` (nominally a filename) from `self`."""
         new = self.copy()
@@ -1544,6 +1856,7 @@ class ReferenceMapping(Mapping):
         deleted_count = new.selector.delete(terminal)
         if deleted_count == 0:
             raise crexc.CrdsError("Terminal '%s' could not be found and deleted." % terminal)
+        new.clear_bestref_memo()
         return new
 
     def todict(self, recursive=10):
@@ -1613,6 +1926,84 @@ def load_mapping(mapping, **keys):
     keys["loader"] = load_mapping
     return _load_mapping.uncached(mapping, **keys)
 
+def load_shared_mapping(mapping, **keys):
+    """Load `mapping` ignoring the mappings cache,  but return the already loaded
+    instance of it or any of its sub-mappings with the same basename and sha1sum as
+    one loaded earlier by load_shared_mapping(),  possibly under another context.
+    The sha1sum is computed from the mapping file text and only mappings whose
+    header sha1sum has been checked against their text are shared.
+
+    Shared mappings appear in every context which loaded them,  so they must be
+    treated as read-only:  use load_mapping() to obtain mappings for modification.
+
+    Return a PipelineContext, InstrumentContext, or ReferenceMapping.
+    """
+    keys["loader"] = load_shared_mapping
+    if keys.get("ignore_checksum", False) or config.get_ignore_checksum():
+        return _load_mapping.uncached(mapping, **keys)   # header sha1sum may not identify contents
+    sha1sum = _file_checksum(mapping, keys.get("path", None))
+    shared = get_shared_mapping(mapping, sha1sum)
+    if shared is None:
+        loaded = _load_mapping.uncached(mapping, **keys)
+        if sha1sum is not None and loaded.header.get("sha1sum", None) == sha1sum:
+            loaded._verified_sha1sum = sha1sum    # e.g. loaded without checking under CRDS_TRUST_CACHED_MAPPINGS
+        shared = share_mapping(loaded)
+    return shared
+
+def load_contexts(contexts, **keys):
+    """Load each of the mappings named in `contexts`,  nominally successive versions
+    of one context,  returning a list of the loaded mappings in the same order.
+
+    Sub-mappings which are identical by name and checksum are loaded only once and
+    shared by all the contexts,  so comparing N consecutive contexts costs little
+    more than loading one of them plus the mappings which differ.   The results are
+    shared and read-only as described for load_shared_mapping().
+    """
+    return [load_shared_mapping(context, **keys) for context in contexts]
+
+def get_shared_mapping(mapping, sha1sum):
+    """Return the shared Mapping for `mapping` with verified `sha1sum`,  or None."""
+    if sha1sum is None:
+        return None
+    with _SHARED_MAPPINGS_LOCK:
+        return SHARED_MAPPINGS.get((os.path.basename(mapping), sha1sum))
+
+def share_mapping(loaded):
+    """Return the shared Mapping with the same basename and sha1sum as Mapping `loaded`,
+    registering `loaded` itself as the shared instance if there is none yet.   Mappings
+    whose sha1sum was never checked against their text are not shared.
+    """
+    sha1sum = loaded._verified_sha1sum
+    if sha1sum is None:
+        return loaded
+    key = (loaded.basename, sha1sum)
+    with _SHARED_MAPPINGS_LOCK:
+        shared = SHARED_MAPPINGS.get(key)
+        if shared is None:
+            SHARED_MAPPINGS[key] = shared = loaded
+    return shared
+
+def _text_checksum(text):
+    """Return the sha1sum of mapping `text` computed over everything but the sha1sum line."""
+    # This will fail if sha1sum appears for some other reason.  It won't ;-)
+    text = "".join([line for line in text.splitlines(True) if "sha1sum" not in line])
+    return utils.str_checksum(text)
+
+def _file_checksum(mapping, path=None):
+    """Return the sha1sum of the text of mapping file `mapping`,  or None if it cannot
+    be read.   This matches the header sha1sum of any mapping which is not corrupt.
+    """
+    if config.S3_ENABLED:
+        return None
+    if path:
+        filename = os.path.join(path, os.path.basename(mapping))
+    else:
+        filename = config.locate_mapping(mapping)
+    try:
+        return _text_checksum(utils.get_uri_content(filename))
+    except OSError:
+        return None
+
 @utils.xcached(omit_from_key=["loader", "ignore_checksum"])
 def _load_mapping(mapping, **keys):
     """_load_mapping fetches `mapping` from the file system or cache."""
@@ -1837,6 +2228,21 @@ def get_best_references(context_file, header, include=None, condition=True):
         minheader = utils.condition_header(minheader)
     return ctx.get_best_references(minheader, include=include)
 
+def get_best_references_many(context_file, headers, include=None, condition=True):
+    """Compute the best references for many datasets at once for the given
+    CRDS `context_file`,  where `headers` is { dataset_id : header }.  Return
+    { dataset_id : { filekind : bestref } } with the same per-dataset results
+    as get_best_references(),  but with headers grouped by instrument and each
+    rmap consulted once per distinct combination of the parameters it matches on.
+    """
+    ctx = asmapping(context_file, cached=True)
+    minheaders = {}
+    for dataset_id, header in headers.items():
+        minheader = ctx.minimize_header(header)
+        if condition:
+            minheader = utils.condition_header(minheader)
+        minheaders[dataset_id] = minheader
+    return ctx.get_best_references_many(minheaders, include=include)
 
 def test():
     """Run module doctests."""
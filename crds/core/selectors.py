@@ -89,9 +89,14 @@ import re
 import fnmatch
 import sys
 import numbers
-from collections import namedtuple
+from collections import namedtuple, Counter
 import ast
 import copy
+import bisect
+import threading
+import contextlib
+import operator
+import itertools
 from pprint import pprint as pp
 
 # import numpy as np
@@ -108,6 +113,105 @@ from .exceptions import (ValidationError, CrdsLookupError,
                          MappingInsertionError)
 # ==============================================================================
 
+# Match keys recur in nearly every version of an rmap,  so the Matchers compiled from
+# them and their conditioned values are shared by all the rmaps loaded in a process.
+
+MATCHER_CACHE_COUNTS = Counter()
+CONDITIONED_KEY_CACHE_COUNTS = Counter()
+
+# Process-wide "hits" and "misses" of the MatchSelector merged selector caches.
+MERGE_GROUP_COUNTS = Counter()
+
+_INTERN_LOCK = threading.Lock()
+
+def _make_intern_caches():
+    """Return new (matcher cache, conditioned key cache) sized by CRDS_MATCHER_CACHE_SIZE,
+    or (None, None) when the caches are disabled.
+    """
+    size = config.MATCHER_CACHE_SIZE.get()
+    if size <= 0:
+        return None, None
+    return (utils.LRUCache(size, MATCHER_CACHE_COUNTS),
+            utils.LRUCache(size, CONDITIONED_KEY_CACHE_COUNTS))
+
+_MATCHER_CACHE, _CONDITIONED_KEY_CACHE = _make_intern_caches()
+
+def clear_intern_caches():
+    """Discard all cached Matchers and conditioned keys,  resizing the caches for the
+    current value of CRDS_MATCHER_CACHE_SIZE.   Hit and miss counts are retained.
+
+    >>> clear_intern_caches()
+    >>> before = Counter(MATCHER_CACHE_COUNTS)
+    >>> matcher("*_C?W|FOO") is matcher("*_C?W|FOO")
+    True
+    >>> counts = MATCHER_CACHE_COUNTS - before
+    >>> counts["hits"], counts["misses"]
+    (1, 1)
+    >>> MatchSelector.condition_key(("f555w", "1.0")) == ('F555W', '1.0')
+    True
+    >>> intern_cache_sizes()
+    (1, 2)
+    >>> clear_intern_caches()
+    >>> intern_cache_sizes()
+    (0, 0)
+    """
+    global _MATCHER_CACHE, _CONDITIONED_KEY_CACHE
+    with _INTERN_LOCK:
+        _MATCHER_CACHE, _CONDITIONED_KEY_CACHE = _make_intern_caches()
+
+def intern_cache_sizes():
+    """Return the number of (Matchers, conditioned keys) currently cached."""
+    return (len(_MATCHER_CACHE) if _MATCHER_CACHE is not None else 0,
+            len(_CONDITIONED_KEY_CACHE) if _CONDITIONED_KEY_CACHE is not None else 0)
+
+def _interned(cache, key, make):
+    """Return the value cached for `key` in `cache`,  or cache and return make(key)."""
+    if cache is None:
+        return make(key)
+    with _INTERN_LOCK:
+        value = cache.get(key)
+    if value is None:
+        value = make(key)
+        with _INTERN_LOCK:
+            cache[key] = value
+    return value
+
+# ==============================================================================
+
+_DEFERRED = threading.local()
+
+@contextlib.contextmanager
+def deferred_rebuilds():
+    """Within this context,  Selectors modified by insert() only update their raw
+    selections.   The remaining state of each modified Selector,  e.g. its conditioned
+    and sorted selections,  is rebuilt once when the outermost context exits normally.
+
+    >>> u = UseAfterSelector(("DATE-OBS", "TIME-OBS"), {
+    ...        '2004-07-02 08:09:00':'o9t1525sj_bia.fits',
+    ... })
+    >>> parkey, classes = (("DATE-OBS", "TIME-OBS"),), ("UseAfter",)
+    >>> with deferred_rebuilds():
+    ...     u._insert({"DATE-OBS":"2004-02-14", "TIME-OBS":"00:00:00"}, "o3913216j_bia.fits", parkey, classes, {})
+    ...     u._insert({"DATE-OBS":"2003-09-26", "TIME-OBS":"01:28:00"}, "nal1503ij_bia.fits", parkey, classes, {})
+    ...     u.choices()
+    ['o9t1525sj_bia.fits']
+    >>> u.choices()
+    ['nal1503ij_bia.fits', 'o3913216j_bia.fits', 'o9t1525sj_bia.fits']
+    """
+    if getattr(_DEFERRED, "stale", None) is not None:
+        yield    # nested context,  the outermost context rebuilds
+        return
+    stale = _DEFERRED.stale = {}
+    _DEFERRED.conditioned_keys = {}
+    try:
+        yield
+    finally:
+        _DEFERRED.stale = _DEFERRED.conditioned_keys = None
+    for selector in stale.values():
+        selector._rebuild()
+
+# ==============================================================================
+
 def glob_list(value):
     """If `value` is an or-glob expression,  return the list of values generated by
     splitting on the |-bar and stripping,  dropping any empty-string values.
@@ -284,6 +388,28 @@ class Selector:
             self._selections = merge_selections
         self._parkey_map = self.get_parkey_map()
         self._comment_parkeys = tuple(name.upper() for name in self._rmap_header.get("comment_parkeys",()))
+        self._key_positions = None
+        self._clear_terminal_index()
+
+    # Indexes derived from _raw_selections on first use,  omitted from pickles.
+    _key_positions = None
+    _terminal_paths = None
+    _reference_name_set = None
+
+    def __getstate__(self):
+        """Omit derived indexes from pickles,  they're recomputed on demand."""
+        state = dict(self.__dict__)
+        for name in ("_key_positions", "_terminal_paths", "_reference_name_set"):
+            state.pop(name, None)
+        return state
+
+    def _clear_terminal_index(self):
+        """Discard the indexes of terminals nested under this selector.   Since these
+        also describe nested selectors,  modifications must clear them at every level
+        from the rmap's top selector down to the modified selector.
+        """
+        self._terminal_paths = None
+        self._reference_name_set = None
 
     def _trace_compare(self, other, show_equal=False):
         utils.trace_compare(self, other, show_equal)
@@ -483,6 +609,8 @@ class Selector:
         """Delete the value of `parameter` name in every match case,  recursively
         if `parameter is not in self._parameters.
         """
+        self._key_positions = None
+        self._clear_terminal_index()
         for i, (old_key, choice) in enumerate(self._raw_selections):
             try:
                 ix = self._parameters.index(parameter)
@@ -542,8 +670,24 @@ class Selector:
         """Given `header`,  operate on self.keys() to choose one of self.choices()."""
         self._check_defined(header)
         lookup_key = self._validate_header(header)  # may return header or a key
+        return self._choose_from(self.get_selection(lookup_key), header)
+
+    def choose_many(self, headers):
+        """Return [ choose(header) or the exception it raised,  ... ] for each of `headers`."""
+        choices = []
+        for header in headers:
+            try:
+                choices.append(self.choose(header))
+            except Exception as exc:
+                choices.append(exc)
+        return choices
+
+    def _choose_from(self, selections, header):
+        """Return the choice for `header` from the first of the weighted `selections` which
+        doesn't fail.
+        """
         last_exc = None
-        for selection in self.get_selection(lookup_key):  # iterate over weighted selections, best match first.
+        for selection in selections:  # iterate over weighted selections, best match first.
             try:
                 log.verbose("Trying", selection, verbosity=60)
                 return self.get_choice(selection, header) # recursively,  what's final choice?
@@ -603,18 +747,24 @@ class Selector:
         Assume any choice that is a string is a reference file.  Recursively
         search for reference files in nested selectors.
         """
-        files = []
-        for choice in self.choices():
-            if isinstance(choice, Selector):
-                new_files = choice.reference_names()
-            elif isinstance(choice, str):
-                new_files = [choice]
-            elif isinstance(choice, tuple):
-                new_files = list(choice)
-            elif isinstance(choice, dict):
-                new_files = choice.values()
-            files.extend(new_files)
-        return sorted(set(files))
+        return sorted(self._get_reference_name_set())
+
+    def _get_reference_name_set(self):
+        """Return the cached frozenset of reference_names()."""
+        if self._reference_name_set is None:
+            files = []
+            for choice in self.choices():
+                if isinstance(choice, Selector):
+                    new_files = choice._get_reference_name_set()
+                elif isinstance(choice, str):
+                    new_files = [choice]
+                elif isinstance(choice, tuple):
+                    new_files = list(choice)
+                elif isinstance(choice, dict):
+                    new_files = choice.values()
+                files.extend(new_files)
+            self._reference_name_set = frozenset(files)
+        return self._reference_name_set
 
     def format(self, indent=0):
         """Recursively pretty-format the Selector tree rooted in `self`
@@ -794,15 +944,31 @@ class Selector:
         """Return the nested match keys leading to selections of `filename`.
         Assume the deepest value in the Selector tree must be a filename.
         """
-        matches = []
-        for key, value in self._raw_selections:
-            here = tuple(sofar + (self.match_item(key),))
-            if isinstance(value, Selector):
-                matches += value.file_matches(filename, here)
-            else:
-                if filename == value:
-                    matches.append(here)
-        return sorted(matches)
+        try:
+            paths = self.get_terminal_paths().get(filename, ())
+        except TypeError:   # unhashable filename,  equal to no terminal
+            paths = ()
+        return sorted(tuple(sofar) + path for path in paths)
+
+    def get_terminal_paths(self):
+        """Return { terminal : [ (match_item, ...), ... ] } mapping each terminal value
+        nested under this selector onto the paths of match items which select it.
+        Unhashable terminals,  which cannot be filenames,  are not indexed.
+        """
+        if self._terminal_paths is None:
+            index = {}
+            for key, value in self._raw_selections:
+                here = (self.match_item(key),)
+                if isinstance(value, Selector):
+                    for terminal, paths in value.get_terminal_paths().items():
+                        index.setdefault(terminal, []).extend(here + path for path in paths)
+                else:
+                    try:
+                        index.setdefault(value, []).append(here)
+                    except TypeError:
+                        pass
+            self._terminal_paths = index
+        return self._terminal_paths
 
     def match_item(self, key):
         """Return ((parkey, key_field), ...) for match key `key`.   Fix string `key`s to unary tuples."""
@@ -818,6 +984,10 @@ class Selector:
 
     def delete(self, terminal):
         """Remove all instances of `terminal` from `self`."""
+        if isinstance(terminal, str) and terminal not in self._get_reference_name_set():
+            return 0
+        self._key_positions = None
+        self._clear_terminal_index()
         deleted = self._delete(self._selections, terminal)
         deleted += self._delete( self._raw_selections, terminal)
         return deleted
@@ -873,6 +1043,7 @@ class Selector:
 
     def _insert(self, header, value, parkey, classes, valid_values_map):
         """Execute the insertion,  popping off parkeys and classes on the way down."""
+        self._clear_terminal_index()
         key = self._make_key(header, parkey[0])
         log.verbose("Validating key", repr(key))
         self._validate_raw_key(key, valid_values_map)
@@ -919,14 +1090,51 @@ class Selector:
         i = self._find_key(key)
         assert i is None, self.__class__.__name__ + " already contains " + repr(key)
         self._raw_selections.append((key, value))
-        self.__init__(self._parameters, dict_wo_dups(self._raw_selections), rmap_header=self._rmap_header)
+        if isinstance(self._key_positions, dict):
+            self._key_positions[self._index_key(key)] = len(self._raw_selections) - 1
+        self._clear_terminal_index()
+        self._rebuild()
 
     def _remove_item(self, key):
-        """Remove the selection at `key`.   Flat:  this selector only."""
+        """Remove the selection at `key`.   Flat:  this selector only.
+        The last selection replaces the removed one,  raw selection order is restored
+        when the selector is rebuilt.
+        """
         i = self._find_key(key)
         assert i is not None, self.__class__.__name__ + " doesn't contain " + repr(key)
-        del self._raw_selections[i]
-        self.__init__(self._parameters, dict_wo_dups(self._raw_selections), rmap_header=self._rmap_header)
+        last = self._raw_selections.pop()
+        if i < len(self._raw_selections):
+            self._raw_selections[i] = last
+        if isinstance(self._key_positions, dict):
+            del self._key_positions[self._index_key(key)]
+            if i < len(self._raw_selections):
+                self._key_positions[self._index_key(last[0])] = i
+        self._clear_terminal_index()
+        self._rebuild()
+
+    def _rebuild(self):
+        """Reinitialize this selector from its raw selections,  or within deferred_rebuilds(),
+        note that it needs to be reinitialized when that context exits.
+        """
+        stale = getattr(_DEFERRED, "stale", None)
+        if stale is not None:
+            stale[id(self)] = self
+        else:
+            self.__init__(self._parameters, dict_wo_dups(self._raw_selections), rmap_header=self._rmap_header)
+
+    def _current_keys(self):
+        """Return self.keys(),  or within deferred_rebuilds(),  the keys this selector will
+        have once it is rebuilt from its raw selections.
+        """
+        stale = getattr(_DEFERRED, "stale", None)
+        if stale is None or id(self) not in stale:
+            return self.keys()
+        conditioned = _DEFERRED.conditioned_keys.setdefault(id(self), {})
+        for key, _value in self._raw_selections:
+            if key not in conditioned:
+                selections = self.do_substitutions({key : None})
+                conditioned[key] = self.condition_selections(selections)[0][0]
+        return sorted(conditioned[key] for (key, _value) in self._raw_selections)
 
     def _replace_item(self, key, value):
         """Replace the selection at `key` with `value`.   Flat:  this selector only."""
@@ -935,15 +1143,38 @@ class Selector:
 
     def _find_key(self, key):
         """Return the index of `key` in selections."""
+        if self._key_positions is None:
+            self._key_positions = self._make_key_positions()
+        if self._key_positions is not False:
+            return self._key_positions.get(self._index_key(key))
         for i, (old_key, _old_value) in enumerate(self._raw_selections):
             if self._equal_keys(key, old_key):
                 return i
         return None
 
+    def _make_key_positions(self):
+        """Return { index key : position in self._raw_selections },  or False if some
+        raw key cannot be indexed and _find_key() must compare every key.   Where keys
+        are equivalent,  the first position is kept.
+        """
+        positions = {}
+        try:
+            for i, (old_key, _old_value) in enumerate(self._raw_selections):
+                positions.setdefault(self._index_key(old_key), i)
+        except TypeError:
+            return False
+        return positions
+
     def _equal_keys(self, key1, key2):
         """Return True IFF `key1` is equivalent to `key2` for rmap modification.  Ignore comment pars."""
         return self.condition_key(key1) == self.condition_key(key2)
 
+    def _index_key(self, key):
+        """Return the hashable form of `key` such that _index_key(key1) == _index_key(key2)
+        IFF _equal_keys(key1, key2).
+        """
+        return self.condition_key(key)
+
     @classmethod
     def _make_key(self, header, parameters):
         """For rmap modification,  make a key for this Selector based on reference
@@ -1301,6 +1532,7 @@ class GlobMatcher(RegexMatcher):
         exprs = [fnmatch.translate(part) for part in parts]
         new_key = "^(" + "|".join(exprs) + ")$"
         super(GlobMatcher, self).__init__(new_key)
+        self._parts = tuple(parts)
         # To support automatic refactoring in the refactor module,  also
         # match on the original key such as A|B|C|D
 
@@ -1341,12 +1573,14 @@ class InequalityMatcher(Matcher):
             float_value = float(value)
         except Exception:
             return -1
-        return {
-            ">" : lambda m, n :  1 if m > n else -1,
-            "<" : lambda m, n :  1 if m < n else -1,
-            ">=" : lambda m, n :  1 if m >= n else -1,
-            "<=" : lambda m, n :  1 if m <= n else -1,
-         }[self._operator](float_value, self._value)
+        return 1 if INEQUALITY_OPERATORS[self._operator](float_value, self._value) else -1
+
+INEQUALITY_OPERATORS = {
+    ">" : operator.gt,
+    "<" : operator.lt,
+    ">=" : operator.ge,
+    "<=" : operator.le,
+}
 
 class BinaryMatcher(Matcher):
     """A matcher which supports logical "or" and "and" for relational
@@ -1394,12 +1628,7 @@ class NotMatcher(Matcher):
 
     def match(self, value):
         """Matches unnegated key normally to `value` and then returns the inverted result."""
-        unnegated = self._unnegated_matcher.match(value)
-        return {
-            1 : -1,
-            -1 : 1,
-            0 : 0,
-            }[unnegated]
+        return -self._unnegated_matcher.match(value)
 
 def esoteric_key(key):
     """Return True if `key` validation is a tautology or too complicated.
@@ -1602,7 +1831,15 @@ def matcher(key):
     >>> someor.match("for|me")
     -1
 
+    Matchers are immutable,  so those made for string and tuple keys are cached and
+    shared by every rmap which uses the same key.
     """
+    if isinstance(key, (str, tuple)):
+        return _interned(_MATCHER_CACHE, key, _make_matcher)
+    return _make_matcher(key)
+
+def _make_matcher(key):
+    """Return a new Matcher for `key` as described by matcher()."""
     if isinstance(key, tuple):
         return GlobMatcher("|".join(key))
     elif key.startswith("(") and key.endswith(")"):
@@ -1644,6 +1881,241 @@ class MatchSelection(Selection):
     reduces to a single merged choice.
     """
 
+# Header values which every Matcher must see individually,  they bypass the index.
+WILDCARD_VALUES = ("*", "N/A")
+
+class MatchIndex:
+    """MatchIndex is a compiled form of a MatchSelector's match cases which
+    computes the same (weights, remaining) result as MatchSelector._winnow()
+    without evaluating every Matcher of every match case for every lookup.
+
+    For each parameter,  match cases are partitioned into:
+
+    1. exact cases,  plain values and or-globs of plain values,  which are
+    hashed by value so that a header value finds its matches in one lookup.
+
+    2. N/A cases which never eliminate a match case and never add weight.
+
+    3. esoteric cases (globs with wild cards, regexes, inequalities, NOT, ...)
+    which fall back to calling their Matcher.
+
+    >>> m = MatchSelector(("foo","bar"), {
+    ...    ('1.0', 'N/A') : "100",
+    ...    ('1.0', '2.0|3.0') : "200",
+    ...    ('4.0', '*') : "300",
+    ...    ('>3.0', '5.0') : "400",
+    ... })
+    >>> index = MatchIndex(m._parameters, m._match_selections)
+
+    The index gives the same weights and survivors as the uncompiled winnow:
+
+    >>> weights, remaining = index.winnow({"foo":"1.0", "bar":"3.0"})
+    >>> pp(m._rank_candidates(weights, remaining))
+    [(-2, (('1.0', '2.0|3.0'),)), (-1, (('1.0', 'N/A'),))]
+    >>> weights, remaining = m._winnow({"foo":"1.0", "bar":"3.0"}, dict(m._match_selections))
+    >>> pp(m._rank_candidates(weights, remaining))
+    [(-2, (('1.0', '2.0|3.0'),)), (-1, (('1.0', 'N/A'),))]
+
+    >>> weights, remaining = index.winnow({"foo":"4.0", "bar":"5.0"})
+    >>> pp(m._rank_candidates(weights, remaining))
+    [(-2, (('4.0', '*'), ('>3.0', '5.0')))]
+
+    Wild card header values are handed to each Matcher:
+
+    >>> weights, remaining = index.winnow({"foo":"*", "bar":"N/A"})
+    >>> pp(m._rank_candidates(weights, remaining))
+    [(-1, (('1.0', '2.0|3.0'), ('1.0', 'N/A'), ('4.0', '*'), ('>3.0', '5.0')))]
+
+    >>> index.winnow({"foo":"2.0", "bar":"2.0"})
+    ({}, {})
+    """
+    def __init__(self, parameters, match_selections):
+        self._parameters = tuple(parameters)
+        self._match_tuples = list(match_selections.keys())
+        self._selections = list(match_selections.values())
+        self._all_rows = frozenset(range(len(self._match_tuples)))
+        self._exact = []   # per parameter { value : set(rows) }
+        self._na = []      # per parameter set(rows)
+        self._other = []   # per parameter set(rows)
+        for i in range(len(self._parameters)):
+            exact, na_rows, other = {}, set(), set()
+            for row, (matchers, _choice) in enumerate(self._selections):
+                values = self._exact_values(matchers[i])
+                if values is not None:
+                    for value in values:
+                        exact.setdefault(value, set()).add(row)
+                elif isinstance(matchers[i], NaMatcher):
+                    na_rows.add(row)
+                else:
+                    other.add(row)
+            self._exact.append(exact)
+            self._na.append(frozenset(na_rows))
+            self._other.append(frozenset(other))
+        # Weights are additive so parameters can be bound in any order.  Binding the
+        # most discriminating parameters first shrinks the surviving set soonest.
+        self._order = sorted(range(len(self._parameters)),
+                             key=lambda i: len(self._na[i]) + len(self._other[i]))
+
+    @staticmethod
+    def _exact_values(matcher_obj):
+        """Return the values which `matcher_obj` matches by simple string equality,
+        or None if `matcher_obj` must be evaluated.   For globs this includes the
+        translated regex key since the base Matcher also compares against it.
+        """
+        if type(matcher_obj) is Matcher:
+            return (matcher_obj._key,)
+        if type(matcher_obj) is GlobMatcher:
+            parts = getattr(matcher_obj, "_parts", None)
+            if parts is not None and not any(char in part for part in parts for char in "*?["):
+                return parts + (matcher_obj._key,)
+        return None
+
+    def winnow(self, header):
+        """Based on the parkey values in `header`,  return the match cases which
+        can possibly match and their weights exactly as MatchSelector._winnow().
+
+        returns   ( {match_tuple:weight ...},   remaining_selections )
+        """
+        survivors = self._all_rows
+        weights = {}
+        for i in self._order:
+            parkey = self._parameters[i]
+            value = header.get(parkey, "UNDEFINED")
+            log.verbose("Binding", repr(parkey), "=", repr(value), verbosity=60)
+            if value in WILDCARD_VALUES:
+                matching = [(row, self._selections[row][0][i].match(value)) for row in survivors]
+            else:
+                hits = self._exact[i].get(value, ())
+                na_rows = self._na[i]
+                other = self._other[i]
+                if survivors is not self._all_rows:
+                    hits = survivors.intersection(hits)
+                    na_rows = survivors & na_rows
+                    other = survivors & other
+                matching = [(row, 1) for row in hits]
+                matching += [(row, 0) for row in na_rows]
+                matching += [(row, self._selections[row][0][i].match(value)) for row in other]
+            survivors = set()
+            for row, match_status in matching:
+                if match_status != -1:
+                    survivors.add(row)
+                    weights[row] = weights.get(row, 0) - match_status
+            if not survivors:
+                break
+        rows = sorted(survivors)
+        return ({self._match_tuples[row] : weights.get(row, 0) for row in rows},
+                {self._match_tuples[row] : self._selections[row] for row in rows})
+
+class MatchColumns:
+    """MatchColumns is a columnar,  NumPy form of a MatchSelector's match cases
+    which computes the same (weights, remaining) result as MatchSelector._winnow().
+
+    For each parameter the exact values of every match case are encoded as integers,
+    the rows matching each code are stored contiguously,  and N/A and esoteric rows
+    are boolean masks.   Binding a parameter computes the 1/0/-1 match status of every
+    row at once,  calling Matchers only for the esoteric rows which are still alive.
+
+    >>> m = MatchSelector(("foo","bar"), {
+    ...    ('1.0', 'N/A') : "100",
+    ...    ('1.0', '2.0|3.0') : "200",
+    ...    ('4.0', '*') : "300",
+    ...    ('>3.0', '5.0') : "400",
+    ... })
+    >>> columns = MatchColumns(m._parameters, m._match_selections)
+
+    >>> weights, remaining = columns.winnow({"foo":"1.0", "bar":"3.0"})
+    >>> pp(m._rank_candidates(weights, remaining))
+    [(-2, (('1.0', '2.0|3.0'),)), (-1, (('1.0', 'N/A'),))]
+
+    >>> weights, remaining = columns.winnow({"foo":"4.0", "bar":"5.0"})
+    >>> pp(m._rank_candidates(weights, remaining))
+    [(-2, (('4.0', '*'), ('>3.0', '5.0')))]
+
+    >>> weights, remaining = columns.winnow({"foo":"*", "bar":"N/A"})
+    >>> pp(m._rank_candidates(weights, remaining))
+    [(-1, (('1.0', '2.0|3.0'), ('1.0', 'N/A'), ('4.0', '*'), ('>3.0', '5.0')))]
+
+    >>> columns.winnow({"foo":"2.0", "bar":"2.0"})
+    ({}, {})
+    """
+    def __init__(self, parameters, match_selections):
+        import numpy as np
+        self._parameters = tuple(parameters)
+        self._match_tuples = list(match_selections.keys())
+        self._selections = list(match_selections.values())
+        nrows = len(self._match_tuples)
+        self._codes = []        # per parameter { exact value : code }
+        self._code_rows = []    # per parameter rows of each code,  grouped by code
+        self._code_starts = []  # per parameter offset of each code's rows in _code_rows
+        self._na = []           # per parameter mask of NaMatcher rows
+        self._other = []        # per parameter mask of esoteric rows
+        self._na_key = []       # per parameter mask of plain Matcher('N/A') rows
+        for i in range(len(self._parameters)):
+            codes, pairs = {}, []
+            na_mask, other, na_key = (np.zeros(nrows, dtype=bool) for _j in range(3))
+            for row, (matchers, _choice) in enumerate(self._selections):
+                values = MatchIndex._exact_values(matchers[i])
+                if values is not None:
+                    for value in set(values):
+                        pairs.append((codes.setdefault(value, len(codes)), row))
+                    na_key[row] = type(matchers[i]) is Matcher and matchers[i]._key == "N/A"
+                elif isinstance(matchers[i], NaMatcher):
+                    na_mask[row] = True
+                else:
+                    other[row] = True
+            pairs = np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+            self._codes.append(codes)
+            self._code_rows.append(pairs[:, 1])
+            self._code_starts.append(np.searchsorted(pairs[:, 0], np.arange(len(codes) + 1)))
+            self._na.append(na_mask)
+            self._other.append(other)
+            self._na_key.append(na_key)
+        self._order = sorted(range(len(self._parameters)),
+                             key=lambda i: int(self._na[i].sum() + self._other[i].sum()))
+
+    def _status(self, i, value, alive):
+        """Return the array of Matcher.match(`value`) results for parameter `i` of every
+        row,  valid for the rows where `alive` is True.
+        """
+        import numpy as np
+        if value == "*":
+            status = np.ones(len(alive), dtype=np.int64)
+        elif value == "N/A":
+            status = np.zeros(len(alive), dtype=np.int64)
+            status[self._na_key[i]] = 1
+        else:
+            status = np.full(len(alive), -1, dtype=np.int64)
+            code = self._codes[i].get(value)
+            if code is not None:
+                starts = self._code_starts[i]
+                status[self._code_rows[i][starts[code]:starts[code+1]]] = 1
+        status[self._na[i]] = 0
+        for row in np.flatnonzero(self._other[i] & alive):
+            status[row] = self._selections[row][0][i].match(value)
+        return status
+
+    def winnow(self, header):
+        """Based on the parkey values in `header`,  return the match cases which
+        can possibly match and their weights exactly as MatchSelector._winnow().
+
+        returns   ( {match_tuple:weight ...},   remaining_selections )
+        """
+        import numpy as np
+        alive = np.ones(len(self._match_tuples), dtype=bool)
+        weights = np.zeros(len(self._match_tuples), dtype=np.int64)
+        for i in self._order:
+            parkey = self._parameters[i]
+            value = header.get(parkey, "UNDEFINED")
+            log.verbose("Binding", repr(parkey), "=", repr(value), verbosity=60)
+            status = self._status(i, value, alive)
+            alive &= status != -1
+            weights -= status
+            if not alive.any():
+                break
+        rows = np.flatnonzero(alive).tolist()
+        return ({self._match_tuples[row] : int(weights[row]) for row in rows},
+                {self._match_tuples[row] : self._selections[row] for row in rows})
+
 class MatchSelector(Selector):
     """Matching selector does a modified dictionary lookup by directly matching
     the runtime (header) parameters to the selector keys.
@@ -1824,6 +2296,38 @@ Restore original debug behavior:
         super(MatchSelector, self).__init__(parameters, selections, rmap_header)
         self._match_selections = self.get_matcher_selections(dict_wo_dups(self._selections))
         self._value_map = self.get_value_map()
+        self._match_index = None
+        self._match_columns = None
+        if config.PRECOMPUTE_MERGE_GROUPS.get():
+            self.precompute_merge_groups()
+
+    # Merged selectors of equally weighted match cases,  a bounded LRU created on first use.
+    _merge_groups = None
+
+    def __getstate__(self):
+        """Omit merged selectors from pickles,  they're recomputed on demand."""
+        state = super(MatchSelector, self).__getstate__()
+        state.pop("_merge_groups", None)
+        return state
+
+    def _clear_terminal_index(self):
+        """Also discard merged selectors which may include modified nested selectors."""
+        super(MatchSelector, self)._clear_terminal_index()
+        self._merge_groups = None
+
+    @property
+    def match_index(self):
+        """The MatchIndex for this selector,  compiled on first use."""
+        if getattr(self, "_match_index", None) is None:
+            self._match_index = MatchIndex(self._parameters, self._match_selections)
+        return self._match_index
+
+    @property
+    def match_columns(self):
+        """The MatchColumns for this selector,  compiled on first use."""
+        if getattr(self, "_match_columns", None) is None:
+            self._match_columns = MatchColumns(self._parameters, self._match_selections)
+        return self._match_columns
 
     def _equal_keys(self, key1, key2):
         """Return True IFF `key1` is equivalent to `key2` for rmap modification.  Ignore comment pars."""
@@ -1837,6 +2341,12 @@ Restore original debug behavior:
                 return False
         return True
 
+    def _index_key(self, key):
+        """Return the conditioned `key` with comment parameters blanked out,  see _equal_keys()."""
+        key = self.condition_key(key)
+        return tuple(None if i < len(self._parameters) and self._parameters[i].upper() in self._comment_parkeys
+                     else value for (i, value) in enumerate(key))
+
     @classmethod
     def condition_key(cls, match_tuple):
         """Normalize the elements of match_tuple using utils.condition_value()
@@ -1853,6 +2363,13 @@ Restore original debug behavior:
     @classmethod
     def condition_key_element(cls, elem):
         """Condition one element of a match tuple."""
+        if isinstance(elem, str):
+            return _interned(_CONDITIONED_KEY_CACHE, elem, cls._condition_key_element)
+        return cls._condition_key_element(elem)
+
+    @classmethod
+    def _condition_key_element(cls, elem):
+        """Condition one element of a match tuple without consulting the shared cache."""
         if isinstance(elem, str):
             if (elem.startswith("{") and elem.endswith("}")) or \
                 (elem.startswith("(") and elem.endswith(")")):
@@ -1898,10 +2415,13 @@ Restore original debug behavior:
         Successively yield any survivors,  in the order of most specific
         matching value (fewest *'s) to least specific matching value.
         """
-        weights, remaining = self._winnow(header, dict(self._match_selections))
-
-        sorted_candidates = self._rank_candidates(weights, remaining)
+        sorted_candidates, remaining = self._winnow_candidates(header)
+        yield from self._matched_selections(sorted_candidates, remaining)
 
+    def _matched_selections(self, sorted_candidates, remaining):
+        """Yield MatchSelection for the winnowed `sorted_candidates` from best match to worst,
+        then raise MatchingError.
+        """
         # Yield successive candidates in order from best match to worst,
         # merging equivalently weighted candidate match_tuples.
         for _weight, match_tuples in sorted_candidates:
@@ -1910,7 +2430,7 @@ Restore original debug behavior:
                     raise AmbiguousMatchError("More than one match clause matched.")
                 subselectors = tuple([remaining[match_tuple].choice for match_tuple in match_tuples])
                 if isinstance(subselectors[0], Selector):
-                    selector = self.merge_group(subselectors)
+                    selector = self._merged_group(match_tuples, subselectors)
                 else:
                     selector = subselectors
             else:
@@ -1919,6 +2439,58 @@ Restore original debug behavior:
             yield MatchSelection((match_tuples, selector))
         raise MatchingError("No match found.")
 
+    def choose_many(self, headers):
+        """Return [ choose(header) or the exception it raised,  ... ] for each of `headers`.
+
+        Headers are grouped by their values for this selector's parameters,  so the match
+        cases are checked,  winnowed,  and ranked once per group.   Only nested selections,
+        e.g. UseAfter dates,  are chosen per header:
+
+        >>> a = UseAfterSelector(("DATE-OBS", "TIME-OBS"), {"2001-01-01 00:00:00" : "a.fits",
+        ...                                                 "2003-01-01 00:00:00" : "c.fits"})
+        >>> b = UseAfterSelector(("DATE-OBS", "TIME-OBS"), {"2002-01-01 00:00:00" : "b.fits"})
+        >>> m = MatchSelector(("DETECTOR",), {"WFC" : a, "HRC" : b})
+        >>> headers = [{"DETECTOR" : detector, "DATE-OBS" : date, "TIME-OBS" : "00:00:00"}
+        ...            for (detector, date) in [("WFC", "2002-06-01"), ("WFC", "2004-01-01"),
+        ...                                     ("HRC", "2003-01-01"), ("HRC", "2000-01-01"), ("SBC", "2003-01-01")]]
+        >>> [type(choice).__name__ if isinstance(choice, Exception) else choice for choice in m.choose_many(headers)]
+        ['a.fits', 'c.fits', 'b.fits', 'MatchingError', 'ValidationError']
+        """
+        groups = {}
+        for i, header in enumerate(headers):
+            key = tuple((name in header, header.get(name)) for name in self._parameters)
+            groups.setdefault(key, []).append(i)
+        choices = [None] * len(headers)
+        for indices in groups.values():
+            header = headers[indices[0]]
+            try:
+                self._check_defined(header)
+                self._validate_header(header)
+                winnowed = self._winnow_candidates(header)
+            except Exception as exc:
+                for i in indices:
+                    choices[i] = exc
+                continue
+            for i in indices:
+                try:
+                    choices[i] = self._choose_from(self._matched_selections(*winnowed), headers[i])
+                except Exception as exc:
+                    choices[i] = exc
+        return choices
+
+    def _winnow_candidates(self, header):
+        """Winnow the match cases for `header` and rank the survivors.
+
+        Return ( sorted( [(weight, [match_tuples...])...] ),  remaining_selections )
+        """
+        if config.USE_MATCH_COLUMNS:
+            weights, remaining = self.match_columns.winnow(header)
+        elif config.USE_MATCH_INDEX:
+            weights, remaining = self.match_index.winnow(header)
+        else:
+            weights, remaining = self._winnow(header, dict(self._match_selections))
+        return self._rank_candidates(weights, remaining), remaining
+
     def _winnow(self, header, remaining):
         """Based on the parkey values in `header`, winnow out selections
         from `remaining` which cannot possibly match.  For each surviving
@@ -1964,7 +2536,83 @@ Restore original debug behavior:
         log.verbose("Candidates:\n", log.PP(candidates), verbosity=60)
         return candidates
 
-    @utils.cached
+    def _merged_group(self, match_tuples, subselectors):
+        """Return the merge of the equally weighted `subselectors` of `match_tuples`,
+        remembering it in a bounded LRU keyed by `match_tuples`.   Merges evicted from
+        the LRU are not referenced elsewhere,  so CRDS_MERGE_GROUP_CACHE_SIZE bounds the
+        merged selectors each MatchSelector keeps alive:
+
+        >>> import gc, weakref
+        >>> old_size = config.MERGE_GROUP_CACHE_SIZE.set(2)
+        >>> a = UseAfterSelector(("DATE-OBS", "TIME-OBS"), {"2001-01-01 00:00:00" : "a.fits"})
+        >>> b = UseAfterSelector(("DATE-OBS", "TIME-OBS"), {"2002-01-01 00:00:00" : "b.fits"})
+        >>> m = MatchSelector(("DETECTOR",), {"HRC|WFC" : a, "HRC" : b})
+        >>> merges = [weakref.ref(m._merged_group((i,), (a, b))) for i in range(10)]
+        >>> _ = gc.collect()
+        >>> len(m._merge_groups), sum(merge() is not None for merge in merges)
+        (2, 2)
+        >>> _ = config.MERGE_GROUP_CACHE_SIZE.set(old_size)
+        """
+        if self._merge_groups is None:
+            size = config.MERGE_GROUP_CACHE_SIZE.get()
+            if size <= 0:
+                return self.merge_group(subselectors)
+            self._merge_groups = utils.LRUCache(size, MERGE_GROUP_COUNTS)
+        merged = self._merge_groups.get(match_tuples)
+        if merged is None:
+            merged = self._merge_groups[match_tuples] = self.merge_group(subselectors)
+        return merged
+
+    def precompute_merge_groups(self):
+        """Merge the equally weighted match cases which match a header made from the
+        values of some match case,  so that lookups matching those groups find their
+        merged selectors already computed.   Groups only reachable by other values are
+        still merged on first lookup.   Return the number of groups merged.
+
+        >>> m = MatchSelector(("DETECTOR",), {
+        ...    "HRC|WFC" : UseAfterSelector(("DATE-OBS", "TIME-OBS"), {"2001-01-01 00:00:00" : "a.fits"}),
+        ...    "HRC" : UseAfterSelector(("DATE-OBS", "TIME-OBS"), {"2002-01-01 00:00:00" : "b.fits"}),
+        ... })
+        >>> m.precompute_merge_groups()
+        1
+        >>> before = Counter(MERGE_GROUP_COUNTS)
+        >>> m.choose({"DETECTOR" : "HRC", "DATE-OBS" : "2003-01-01", "TIME-OBS" : "00:00:00"})
+        'b.fits'
+        >>> counts = MERGE_GROUP_COUNTS - before
+        >>> counts["hits"], counts["misses"]
+        (1, 0)
+        """
+        if not self._merge_overlaps or config.MERGE_GROUP_CACHE_SIZE.get() <= 0:
+            return 0
+        merged = 0
+        for header in self._representative_headers():
+            candidates, remaining = self._winnow_candidates(header)
+            for _weight, match_tuples in candidates:
+                subselectors = tuple([remaining[match_tuple].choice for match_tuple in match_tuples])
+                if len(match_tuples) < 2 or not isinstance(subselectors[0], Selector) or \
+                        (self._merge_groups is not None and match_tuples in self._merge_groups):
+                    continue
+                with log.verbose_warning_on_exception("Failed precomputing merge of", repr(match_tuples)):
+                    self._merged_group(match_tuples, subselectors)
+                    merged += 1
+        return merged
+
+    # Limit on the headers generated from the or-glob values of each match case.
+    MAX_REPRESENTATIVE_HEADERS = 16
+
+    def _representative_headers(self):
+        """Yield headers made from the values of each match case,  one for each
+        combination of the values of or-globs up to MAX_REPRESENTATIVE_HEADERS per case.
+        Esoteric values are represented by "*",  which every matcher accepts.
+        """
+        seen = set()
+        for key in self.keys():
+            choices = [["*"] if esoteric_key(value) else glob_list(value) for value in key]
+            for values in itertools.islice(itertools.product(*choices), self.MAX_REPRESENTATIVE_HEADERS):
+                if values not in seen:
+                    seen.add(values)
+                    yield dict(zip(self._parameters, values))
+
     def merge_group(self, equivalent_selectors):
         """Merge a group of equal-weighted selectors into a single
         combined selector.  Nominally this merges special case
@@ -2032,7 +2680,7 @@ Restore original debug behavior:
                 log.verbose("Checking", repr(name), "=", repr(value), "against",
                             valid_values_map[name])
                 self._validate_value(name, value, valid_values_map[name], runtime=False)
-        for other in self.keys():
+        for other in self._current_keys():
             if key != other and match_superset(other, key) and \
                 not different_match_weight(key, other):
                 warn = log.verbose_warning if self._merge_overlaps else log.warning
@@ -2048,7 +2696,59 @@ for more explanation.
 
 # ==============================================================================
 
-class UseAfterSelector(Selector):
+class SortedKeysMixin:
+    """Mixin for Selectors which choose by ordering or numerical distance among their
+    keys.   A sorted index of the keys is computed on first lookup and reused until the
+    selections change via __init__ (insert,  merge) or delete().
+    """
+    _key_index = None
+
+    def __init__(self, *args, **keys):
+        super(SortedKeysMixin, self).__init__(*args, **keys)
+        self._reset_key_index()
+
+    def delete(self, terminal):
+        deleted = super(SortedKeysMixin, self).delete(terminal)
+        self._reset_key_index()
+        return deleted
+
+    def _reset_key_index(self):
+        """Discard the key index derived from the current selections."""
+        self._key_index = None
+
+    def __getstate__(self):
+        """Omit the derived key index from pickles,  it's recomputed on demand."""
+        state = super(SortedKeysMixin, self).__getstate__()
+        state.pop("_key_index", None)
+        return state
+
+    def get_key_index(self):
+        """Return the cached result of self._make_key_index()."""
+        if self._key_index is None:
+            self._key_index = self._make_key_index()
+        return self._key_index
+
+    def _make_key_index(self):
+        """Return the sorted keys of this selector and any associated data."""
+        raise NotImplementedError("Abstract method.")
+
+    def _nearest(self, sorted_keys, positions, start, distance):
+        """Return the position in self._selections of the key nearest a condition value
+        which bisects `sorted_keys` at index `start`,  where distance(i) returns the distance
+        of sorted_keys[i].   Equal distances choose the lowest position in self._selections,
+        as numpy.argmin() over self.keys() would.
+        """
+        if not len(sorted_keys):
+            raise ValueError("attempt to get argmin of an empty sequence")
+        low, high = max(start - 1, 0), min(start + 1, len(sorted_keys))
+        best = min(distance(i) for i in range(low, high))
+        while low > 0 and distance(low - 1) == best:
+            low -= 1
+        while high < len(sorted_keys) and distance(high) == best:
+            high += 1
+        return min(positions[i] for i in range(low, high) if distance(i) == best)
+
+class UseAfterSelector(SortedKeysMixin, Selector):
     """A UseAfter selector chooses the greatest time which is less than
     the "date" condition and returns the corresponding item.
 
@@ -2162,6 +2862,28 @@ Empty UseAfterSelectors always raise an exception on choose():
     ...
     UseAfterError: No selection <= '2003-09-01 01:28:00'
 
+Merging two UseAfterSelectors interleaves their dates,  resolving identical dates
+in favor of the greater file name.  UseAfterSelector does not cache merges itself;  merged
+results are remembered in the bounded merge group cache of the enclosing MatchSelector:
+
+    >>> u1 = UseAfterSelector(("DATE-OBS", "TIME-OBS"), {
+    ...        '2003-09-26 01:28:00':'nal1503ij_bia.fits',
+    ...        '2004-07-02 08:09:00':'o9t1525sj_bia.fits',
+    ... })
+    >>> u2 = UseAfterSelector(("DATE-OBS", "TIME-OBS"), {
+    ...        '2004-02-14 00:00:00':'o3913216j_bia.fits',
+    ...        '2004-07-02 08:09:00':'o9s16388j_bia.fits',
+    ... })
+    >>> merged = u1.merge(u2)
+    >>> merged.choices()
+    ['nal1503ij_bia.fits', 'o3913216j_bia.fits', 'o9t1525sj_bia.fits']
+    >>> merged.choose({"DATE-OBS":"2004-03-01", "TIME-OBS":"00:00:00"})
+    'o3913216j_bia.fits'
+    >>> u1.merge(u2) is merged
+    False
+    >>> u1.merge(u2).choices() == merged.choices()
+    True
+
 Restore debug configuration.
 
     >>> _jnk = log.set_exception_trap(old_debug)
@@ -2174,24 +2896,22 @@ Restore debug configuration.
         yield self.bsearch(date, self._selections)
 
     def bsearch(self, date, selections):
-        """Do a binary search over a sorted selections list."""
-        if len(selections) == 0:
-            raise self.error_class("No selection <= " + repr(date))
-        elif len(selections) > 1:
-            left = selections[:len(selections)//2]
-            right = selections[len(selections)//2:]
-            compared = right[0].key
-            log.verbose("...against", compared, end="", verbosity=60)
-            if date >= compared:
-                return self.bsearch(date, right)
-            else:
-                return self.bsearch(date, left)
+        """Do a binary search over a sorted selections list,  returning the last
+        selection with key <= `date`.
+        """
+        if selections is self._selections:
+            keys = self.get_key_index()
         else:
-            if date >= selections[0].key:
-                log.verbose("matched", repr(selections[0]), verbosity=60)
-                return selections[0]
-            else:
-                raise self.error_class("No selection <= " + repr(date))
+            keys = [selection.key for selection in selections]
+        index = bisect.bisect_right(keys, date)
+        if index == 0:
+            raise self.error_class("No selection <= " + repr(date))
+        log.verbose("matched", selections[index-1], verbosity=60)
+        return selections[index-1]
+
+    def _make_key_index(self):
+        """Return the conditioned keys of self._selections,  already sorted."""
+        return self.keys()
 
     def _validate_raw_key(self, key, valid_values_map):
         """Validate a selector date/time field for this UseAfter."""
@@ -2226,34 +2946,35 @@ Restore debug configuration.
         """Merge two UseAfterSelectors into a single selector.  Resolve
         collisions of selections by using the "greater" of the colliding
         selections...  nominally the greater filename which is the most
-        recent for CDBS and CRDS naming conventions.
+        recent for CDBS and CRDS naming conventions.   The sorted selections
+        of `self` and `other` are merged in a single pass.
         """
         merge_selections = []
-        ownsel = self._selections[:]
-        othersel = other._selections[:]
-        while ownsel and othersel:
-            own = ownsel[0]
-            other = othersel[0]
-            if own.key < other.key:
+        ownsel, othersel = self._selections, other._selections
+        own_len, other_len = len(ownsel), len(othersel)
+        i = j = 0
+        while i < own_len and j < other_len:
+            own, oth = ownsel[i], othersel[j]
+            if own.key < oth.key:
                 appended = own
-                ownsel = ownsel[1:]
-            elif other.key < own.key:
-                appended = other
-                othersel = othersel[1:]
+                i += 1
+            elif oth.key < own.key:
+                appended = oth
+                j += 1
             else: # collision
-                ownsel.pop(0)
-                othersel.pop(0)
-                if own.choice >= other.choice:
+                i += 1
+                j += 1
+                if own.choice >= oth.choice:
                     appended = own
-                    overwritten = other
+                    overwritten = oth
                 else:
-                    appended = other
+                    appended = oth
                     overwritten = own
                 log.verbose("Merge collision at", repr(appended.key), "using",
                             repr(appended.choice), "not", repr(overwritten.choice), verbosity=10)
             merge_selections.append(appended)
-        merge_selections.extend(ownsel)
-        merge_selections.extend(othersel)
+        merge_selections.extend(ownsel[i:])
+        merge_selections.extend(othersel[j:])
         return self.__class__(self._parameters[:], merge_selections=merge_selections)
 
     def get_parkey_map(self):
@@ -2452,16 +3173,35 @@ class ClosestTimeSelector(UseAfterSelector):
 
     >>> t.choose({"time":"2019-04-16 00:00:00"})
     'cref_flatfield_123.fits'
+
+    Times equidistant from two keys choose the earlier key:
+
+    >>> t.choose({"time":"2017-09-12 12:00:00"})
+    'cref_flatfield_123.fits'
+
+    Changing the selections recomputes the sorted times:
+
+    >>> t.delete("cref_flatfield_222.fits")
+    2
+    >>> t.choose({"time":"2018-02-02 00:00:00"})
+    'cref_flatfield_123.fits'
     """
     def get_selection(self, date):
         import numpy as np
-        diff = np.array([abs_time_delta(date, key) for key in self.keys()], 'f')
-        index = np.argmin(diff)
-        yield self._selections[index]
+        times, positions = self.get_key_index()
+        when = timestamp.parse_date(date)
+        def distance(i):   # single precision seconds,  as for abs_time_delta() stored in an np.array
+            return np.float32(abs((when - times[i]).total_seconds()))
+        yield self._selections[self._nearest(times, positions, bisect.bisect_left(times, when), distance)]
+
+    def _make_key_index(self):
+        """Return (sorted parsed key datetimes,  corresponding positions in self._selections)."""
+        keyed = sorted((timestamp.parse_date(key), i) for (i, key) in enumerate(self.keys()))
+        return [time for (time, _i) in keyed], [i for (_time, i) in keyed]
 
 # ==============================================================================
 
-class GeometricallyNearestSelector(Selector):
+class GeometricallyNearestSelector(SortedKeysMixin, Selector):
     """GeometricallyNearest selects the choice whose key is at the smallest
     distance from the specified condition value.
 
@@ -2518,11 +3258,18 @@ Effective_wavelength doesn't have to be covered by valid_values_map:
         return utils.condition_value(key)
 
     def get_selection(self, keyval):
+        import numpy as np
+        nkeys, positions = self.get_key_index()
+        def distance(i):   # computed as single precision array arithmetic,  like np.abs(nkeys - keyval)
+            return np.abs(nkeys[i:i+1] - keyval)[0]
+        yield self._selections[self._nearest(nkeys, positions, int(np.searchsorted(nkeys, keyval)), distance)]
+
+    def _make_key_index(self):
+        """Return (sorted single precision keys,  corresponding positions in self._selections)."""
         import numpy as np
         nkeys = np.array(self.keys(), dtype='f')
-        diff = np.abs(nkeys - keyval)
-        index = np.argmin(diff)
-        yield self._selections[index]
+        positions = np.argsort(nkeys, kind="stable")
+        return nkeys[positions], positions.tolist()
 
     def _validate_raw_key(self, key, valid_values_map):
         parname = self._parameters[0]
@@ -2545,7 +3292,7 @@ Effective_wavelength doesn't have to be covered by valid_values_map:
 # Different interface,  not a true subclass of Selection so get_choice() is overridden also.
 BracketSelection = namedtuple("BracketSelection", ("less", "greater"))
 
-class BracketSelector(Selector):
+class BracketSelector(SortedKeysMixin, Selector):
     """Bracket selects the the bracketing values of the
     given context variable,  returning a two-tuple.
 
@@ -2589,10 +3336,8 @@ class BracketSelector(Selector):
         of Selection but is rather (less, greater) where `less` and `greater` are normal
         (key, choice) Selections.
         """
-        index = 0
         selections = self._selections
-        while index < len(selections) and keyval > selections[index].key:
-            index += 1
+        index = bisect.bisect_left(self.get_key_index(), keyval)   # first key >= keyval
         if index == len(selections):
             less, greater = selections[index-1], selections[index-1]
         elif index == 0 or keyval == selections[index].key:
@@ -2601,6 +3346,10 @@ class BracketSelector(Selector):
             less, greater = selections[index-1], selections[index]
         yield BracketSelection(less, greater)   # XXXX non-standard interface
 
+    def _make_key_index(self):
+        """Return the keys of self._selections,  already sorted."""
+        return self.keys()
+
     def get_choice(self, bracket_selection, header):
         """Return the paired choices of the BracketSelector based on an atypical
         "BracketSelection" pair.   Recursively calls the standard get_choice() on
@@ -11,7 +11,7 @@ import re
 import hashlib
 import io
 import functools
-from collections import Counter, defaultdict
+from collections import Counter, defaultdict, OrderedDict
 import datetime
 import ast
 import gc
@@ -323,6 +323,65 @@ def list_cached_functions():
 
 # ===================================================================
 
+class LRUCache:
+    """A bounded cache which discards its least recently used item when more than
+    `maxsize` items are stored.   Lookups are counted as "hits" and "misses" in
+    `counts`,  which can be shared by several caches to aggregate statistics.
+
+    >>> cache = LRUCache(2)
+    >>> cache["a"] = 1
+    >>> cache["b"] = 2
+    >>> cache.get("a")
+    1
+    >>> cache["c"] = 3
+    >>> cache.get("b", "missing")
+    'missing'
+    >>> sorted(cache.keys())
+    ['a', 'c']
+    >>> cache.counts["hits"], cache.counts["misses"]
+    (1, 1)
+    >>> cache.clear()
+    >>> len(cache)
+    0
+    """
+    def __init__(self, maxsize, counts=None):
+        self.maxsize = maxsize
+        self.counts = Counter() if counts is None else counts
+        self._items = OrderedDict()
+
+    def get(self, key, default=None):
+        """Return the value cached for `key` marking it most recently used,  or `default`."""
+        try:
+            value = self._items[key]
+        except KeyError:
+            self.counts["misses"] += 1
+            return default
+        self._items.move_to_end(key)
+        self.counts["hits"] += 1
+        return value
+
+    def __setitem__(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def keys(self):
+        """Return the cached keys from least to most recently used."""
+        return self._items.keys()
+
+    def clear(self):
+        """Discard all cached items,  leaving `counts` unchanged."""
+        self._items.clear()
+
+# ===================================================================
+
 def capture_output(func):
     """Decorate a function with @capture_output to define a CapturedFunction()
     wrapper around it.
@@ -705,16 +705,15 @@ def get_updated_files(context1, context2):
     extension1 = os.path.splitext(context1)[1]
     extension2 = os.path.splitext(context2)[1]
     assert extension1 == extension2, "Only compare mappings of same type/extension."
-    old_map = crds.get_cached_mapping(context1)
+    old_map = rmap.load_shared_mapping(context1)
     old_files = set(old_map.mapping_names() + old_map.reference_names())
     all_mappings = rmap.list_mappings("*"+extension1, old_map.observatory)
     updated = set()
     context1, context2 = os.path.basename(context1), os.path.basename(context2)
-    for new in all_mappings:
-        new = os.path.basename(new)
-        if context1 < new <= context2:
-            new_map = crds.get_cached_mapping(new)
-            updated |= set(new_map.mapping_names() + new_map.reference_names())
+    new_names = [os.path.basename(new) for new in all_mappings]
+    new_names = [new for new in new_names if context1 < new <= context2]
+    for new_map in rmap.load_contexts(new_names):
+        updated |= set(new_map.mapping_names() + new_map.reference_names())
     return sorted(list(updated - old_files))
 
 # ==============================================================================================================
@@ -51,31 +51,37 @@ def clear_cache():
 
 
 class SimpleTable:
-    """A simple class to encapsulate astropy tables for basic CRDS readonly table row and colname access."""
+    """A simple class to encapsulate astropy tables for basic CRDS readonly table row and colname access.
+
+    Table data is kept as one numpy array per column,  memory mapped for FITS where possible,
+    in `column_arrays`.  Row tuples are only created on demand by indexing or iterating `rows`.
+    """
     def __init__(self, filename, segment=1):
         self.filename = filename
         self.segment = segment
         self.basename = os.path.basename(filename)
         self._columns = None  # dynamic,  independent of astropy
         if filename.endswith(".fits"):
-            with data_file.fits_open(filename) as hdus:
+            with data_file.fits_open(filename, memmap=True) as hdus:
                 tab = hdus[segment].data
                 self.colnames = tuple(name.upper() for name in tab.columns.names)
-                self.rows = tuple(tuple(row) for row in tab)   # readonly
+                arrays = [tab.field(i) for i in range(len(self.colnames))]
         else:
             tab = table.Table.read(filename)
             self.colnames = tuple(name.upper() for name in tab.columns)
-            self.rows = tuple(tuple(row) for row in tab)   # readonly
+            arrays = [tab.columns[name] for name in tab.columns]
+        self.rows = TableRows(arrays)   # readonly
+        self.column_arrays = dict(zip(self.colnames, arrays))
         log.verbose("Creating", repr(self), verbosity=60)
 
     @property
     def columns(self):
-        """Based on the row tuples,  create columns dict dynamically.  This permits closing astropy Table during __init__.
+        """Based on the column arrays,  create columns dict of tuples dynamically.
 
         Retuns { colname : column, ... }
         """
         if self._columns is None:
-            self._columns = dict(list(zip(self.colnames, list(zip(*self.rows)))))
+            self._columns = { name : tuple(array) for (name, array) in self.column_arrays.items() }
         return self._columns
 
     def __repr__(self):
@@ -83,6 +89,50 @@ class SimpleTable:
                 repr(self.colnames) + ", nrows=" + str(len(self.rows)) + ")")
 
 
+class TableRows:
+    """A readonly sequence of row tuples which creates each row from `arrays`,  one column array
+    per table column,  only when it is indexed or iterated.
+
+    >>> import numpy as np
+    >>> rows = TableRows([np.array([1, 2, 3]), np.array(["A", "B", "C"])])
+    >>> len(rows)
+    3
+    >>> [(int(a), str(b)) for (a, b) in rows]
+    [(1, 'A'), (2, 'B'), (3, 'C')]
+    >>> str(rows[-1][1])
+    'C'
+    >>> len(rows[1:])
+    2
+    >>> rows[3]
+    Traceback (most recent call last):
+    ...
+    IndexError: table row index out of range
+    """
+    def __init__(self, arrays):
+        self.arrays = tuple(arrays)
+        self._nrows = len(self.arrays[0]) if self.arrays else 0
+
+    def __len__(self):
+        return self._nrows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[i] for i in range(*index.indices(self._nrows)))
+        if index < 0:
+            index += self._nrows
+        if not 0 <= index < self._nrows:
+            raise IndexError("table row index out of range")
+        return tuple(array[index] for array in self.arrays)
+
+    def __iter__(self):
+        if not self.arrays:
+            return iter(())
+        return zip(*self.arrays)
+
+    def __repr__(self):
+        return self.__class__.__name__ + "(nrows=" + str(self._nrows) + ")"
+
+
 
 def test():
     import doctest, crds.io.tables
@@ -96,22 +96,23 @@ def rmap_insert_references(old_rmap, new_rmap, inserted_references):
 
     Return None,  `new_rmap` is already the implicit result
     """
-    new = old = rmap.fetch_mapping(old_rmap, ignore_checksum=True)
+    old = rmap.fetch_mapping(old_rmap, ignore_checksum=True)
     inserted_cases = {}
-    for reference in inserted_references:
-        log.info("Inserting", os.path.basename(reference), "into", repr(new.name))
-        new = new.insert_reference(reference)
-        baseref = os.path.basename(reference)
-        with log.warn_on_exception("Failed checking rmap update for", repr(baseref)):
-            cases = new.file_matches(baseref)
-            for fullcase in cases:
-                case = fullcase[1:]
-                if case not in inserted_cases:
-                    inserted_cases[case] = baseref
-                else:
-                    log.error("-"*40 + "\nBoth", srepr(baseref),
-                              "and", srepr(inserted_cases[case]),
-                              "identically match case:\n", log.PP(case), """
+    with old.bulk_update() as new:
+        for reference in inserted_references:
+            log.info("Inserting", os.path.basename(reference), "into", repr(new.name))
+            new.insert_reference_in_place(reference)
+            baseref = os.path.basename(reference)
+            with log.warn_on_exception("Failed checking rmap update for", repr(baseref)):
+                cases = new.file_matches(baseref)
+                for fullcase in cases:
+                    case = fullcase[1:]
+                    if case not in inserted_cases:
+                        inserted_cases[case] = baseref
+                    else:
+                        log.error("-"*40 + "\nBoth", srepr(baseref),
+                                  "and", srepr(inserted_cases[case]),
+                                  "identically match case:\n", log.PP(case), """
 Each reference would replace the other in the rmap.
 Either reference file matching parameters need correction
 or additional matching parameters should be added to the rmap
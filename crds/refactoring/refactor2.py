@@ -43,15 +43,17 @@ def rmap_insert_references(old_rmap, new_rmap, inserted_references):
 
     Return new ReferenceMapping named `new_rmap`
     """
-    new = old = rmap.fetch_mapping(old_rmap, ignore_checksum=True)
+    old = rmap.fetch_mapping(old_rmap, ignore_checksum=True)
+    with old.bulk_update() as new:
+        for reference in inserted_references:
+            baseref = os.path.basename(reference)
+            with log.augment_exception("In reference", srepr(baseref)):
+                log.info("Inserting", srepr(baseref), "into", srepr(new.name))
+                new.insert_reference_in_place(reference)
     new.header["derived_from"] = old.basename
-    for reference in inserted_references:
-        baseref = os.path.basename(reference)
-        with log.augment_exception("In reference", srepr(baseref)):
-            log.info("Inserting", srepr(baseref), "into", srepr(new.name))
-            new = new.insert_reference(reference)
-            log.verbose("Writing", srepr(new_rmap))
-            new.write(new_rmap)
+    if inserted_references:
+        log.verbose("Writing", srepr(new_rmap))
+        new.write(new_rmap)
     formatted = new.format()
     for reference in inserted_references:
         reference = os.path.basename(reference)
@@ -68,12 +70,13 @@ def rmap_insert_references_by_matches(old_rmap, new_rmap, references_headers):
 
     Return new ReferenceMapping named `new_rmap`
     """
-    new = old = rmap.load_mapping(old_rmap, ignore_checksum=True)
-    for baseref, header in references_headers.items():
-        with log.augment_exception("In reference", srepr(baseref)):
-            log.info("Inserting", srepr(baseref), "into", srepr(old_rmap))
-            log.verbose("Inserting", srepr(baseref), "match case", srepr(header), "into", srepr(old_rmap))
-            new = new.insert_header_reference(header, baseref)
+    old = rmap.load_mapping(old_rmap, ignore_checksum=True)
+    with old.bulk_update() as new:
+        for baseref, header in references_headers.items():
+            with log.augment_exception("In reference", srepr(baseref)):
+                log.info("Inserting", srepr(baseref), "into", srepr(old_rmap))
+                log.verbose("Inserting", srepr(baseref), "match case", srepr(header), "into", srepr(old_rmap))
+                new.insert_header_reference_in_place(header, baseref)
     new.header["derived_from"] = old.basename
     log.verbose("Writing", srepr(new_rmap))
     new.write(new_rmap)
@@ -0,0 +1,69 @@
+"""This module benchmarks loading a context from its snapshot for a single
+instrument and type versus loading whole-context pickles or mapping files.
+
+Each case runs in a fresh Python process and reports the time to load the
+context and select one rmap,  along with the growth in resident memory:
+
+    python -m crds.tests.profile_snapshots [context] [instrument] [filekind]
+"""
+import sys
+import os
+import time
+import json
+import pickle
+import subprocess
+import tempfile
+
+from crds.core import rmap, heavy_client, config
+
+# ==================================================================================
+
+def resident_kbytes():
+    """Return the current resident set size of this process in kilobytes (Linux)."""
+    with open("/proc/self/statm") as handle:
+        return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+def load_case(case, context, instrument, filekind, pickle_file):
+    """Perform benchmark `case` in this process,  returning (seconds, kilobytes resident)."""
+    before = resident_kbytes()
+    start = time.perf_counter()
+    if case == "mapping files":
+        loaded = rmap.load_mapping(context)
+    elif case == "whole pickle":
+        with open(pickle_file, "rb") as handle:
+            loaded = pickle.loads(handle.read())
+    else:
+        loaded = heavy_client.load_pickled_mapping(context)
+    if case == "snapshot, all types":
+        loaded.force_load()
+    loaded.get_imap(instrument).get_rmap(filekind)
+    seconds = time.perf_counter() - start
+    after = resident_kbytes()
+    return seconds, after - before
+
+CASES = ["mapping files", "whole pickle", "snapshot, all types", "snapshot, one type"]
+
+def main(context="hst.pmap", instrument="acs", filekind="darkfile"):
+    """Save a snapshot for `context` and report each case run in a separate process."""
+    loaded = rmap.load_mapping(context)
+    heavy_client.save_pickled_mapping(context, loaded)
+    with tempfile.NamedTemporaryFile(suffix=".pkl", delete=False) as handle:
+        handle.write(pickle.dumps(loaded))
+    print("Snapshot size:", os.path.getsize(config.locate_pickle(context)), "bytes")
+    print("Pickle size:  ", os.path.getsize(handle.name), "bytes")
+    print("{:<24} {:>10} {:>14}".format("case", "seconds", "resident KB"))
+    try:
+        for case in CASES:
+            output = subprocess.check_output(
+                [sys.executable, "-m", "crds.tests.profile_snapshots", "--case",
+                 case, context, instrument, filekind, handle.name], stderr=subprocess.DEVNULL)
+            seconds, kbytes = json.loads(output.decode().splitlines()[-1])
+            print("{:<24} {:>10.4f} {:>14}".format(case, seconds, kbytes))
+    finally:
+        os.remove(handle.name)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--case"]:
+        print(json.dumps(load_case(*sys.argv[2:])))
+    else:
+        main(*sys.argv[1:])
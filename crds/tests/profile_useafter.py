@@ -0,0 +1,133 @@
+"""This module benchmarks UseAfterSelector lookups and merges over the UseAfter
+selectors of real rmaps,  comparing them to the previous recursive list-slicing
+bsearch() and quadratic merge():
+
+    python -m crds.tests.profile_useafter [context] [lookups per selector]
+"""
+import sys
+import time
+import random
+
+from crds.core import rmap, selectors, log
+
+# ==================================================================================
+
+def slicing_bsearch(date, selections):
+    """The previous UseAfterSelector.bsearch(),  recursing on list slices."""
+    if len(selections) == 0:
+        raise selectors.UseAfterError("No selection <= " + repr(date))
+    elif len(selections) > 1:
+        left = selections[:len(selections)//2]
+        right = selections[len(selections)//2:]
+        compared = right[0].key
+        log.verbose("...against", compared, end="", verbosity=60)
+        if date >= compared:
+            return slicing_bsearch(date, right)
+        else:
+            return slicing_bsearch(date, left)
+    elif date >= selections[0].key:
+        log.verbose("matched", repr(selections[0]), verbosity=60)
+        return selections[0]
+    else:
+        raise selectors.UseAfterError("No selection <= " + repr(date))
+
+def slicing_merge(selector, other):
+    """The previous UseAfterSelector.merge(),  popping the heads of list copies."""
+    merge_selections = []
+    ownsel = selector._selections[:]
+    othersel = other._selections[:]
+    while ownsel and othersel:
+        own, oth = ownsel[0], othersel[0]
+        if own.key < oth.key:
+            appended = own
+            ownsel = ownsel[1:]
+        elif oth.key < own.key:
+            appended = oth
+            othersel = othersel[1:]
+        else:
+            ownsel.pop(0)
+            othersel.pop(0)
+            if own.choice >= oth.choice:
+                appended, overwritten = own, oth
+            else:
+                appended, overwritten = oth, own
+            log.verbose("Merge collision at", repr(appended.key), "using",
+                        repr(appended.choice), "not", repr(overwritten.choice), verbosity=10)
+        merge_selections.append(appended)
+    merge_selections.extend(ownsel)
+    merge_selections.extend(othersel)
+    return selector.__class__(selector._parameters[:], merge_selections=merge_selections)
+
+# ==================================================================================
+
+def useafter_groups(selector):
+    """Yield the lists of UseAfterSelectors nested directly beneath each selector
+    of the tree rooted at `selector`.
+    """
+    nested = [choice for choice in selector.choices() if isinstance(choice, selectors.Selector)]
+    useafters = [choice for choice in nested if isinstance(choice, selectors.UseAfterSelector)]
+    if useafters:
+        yield useafters
+    for choice in nested:
+        yield from useafter_groups(choice)
+
+def timed(func, *args, repeat=5):
+    """Return (best seconds of `repeat` runs, result) for func(*args)."""
+    best = None
+    for _i in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+def lookups(search, cases):
+    """Perform search(date, selector) for each (selector, date) in `cases`."""
+    return [search(date, selector) for (selector, date) in cases]
+
+def merges(merge, pairs):
+    """Perform merge(selector, other) for each (selector, other) in `pairs`."""
+    return [merge(selector, other) for (selector, other) in pairs]
+
+def report(operation, old, new):
+    """Print the best times of functions `old` and `new`,  checking for equal results."""
+    old_seconds, old_result = old()
+    new_seconds, new_result = new()
+    assert old_result == new_result, "Results differ for " + repr(operation)
+    print("{:<16} {:>12.4f} {:>12.4f} {:>8.1f}x".format(
+        operation, old_seconds, new_seconds, old_seconds/new_seconds))
+
+def main(context="hst.pmap", count=20):
+    """Compare lookup and merge times over every UseAfterSelector in `context`."""
+    pipeline = rmap.load_mapping(context)
+    random.seed(42)
+    cases, pairs = [], []
+    for imap in pipeline.selections.normal_values():
+        for rmapping in imap.selections.normal_values():
+            if not isinstance(rmapping.selector, selectors.Selector):
+                continue
+            for group in useafter_groups(rmapping.selector):
+                pairs.extend(zip(group[:-1], group[1:]))
+                for useafter in group:
+                    keys = useafter.keys()
+                    cases.extend((useafter, random.choice(keys)) for _i in range(int(count)))
+    print("UseAfter lookups:", len(cases), " merges:", len(pairs))
+    print("{:<16} {:>12} {:>12} {:>9}".format("operation", "old seconds", "new seconds", "speedup"))
+
+    report("bsearch",
+           lambda: timed(lookups, lambda date, sel: slicing_bsearch(date, sel._selections), cases),
+           lambda: timed(lookups, lambda date, sel: sel.bsearch(date, sel._selections), cases))
+
+    def selections(merge):
+        return lambda sel, other: merge(sel, other)._selections
+    report("merge",
+           lambda: timed(merges, selections(slicing_merge), pairs),
+           lambda: timed(merges, selections(selectors.UseAfterSelector.merge), pairs))
+
+    large = [(sel, other) for (sel, other) in pairs if len(sel.keys()) + len(other.keys()) >= 200]
+    report("merge, large",
+           lambda: timed(merges, selections(slicing_merge), large),
+           lambda: timed(merges, selections(selectors.UseAfterSelector.merge), large))
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -6,6 +6,7 @@ import datetime
 from crds import bestrefs
 from crds.bestrefs import BestrefsScript
 from crds import assign_bestrefs
+from crds.core import config
 from crds.tests import test_config
 
 """
@@ -329,6 +330,21 @@ def dt_bestrefs_compare_source_canary():
     >>> test_config.cleanup(old_state)
     """
 
+def dt_bestrefs_compare_source_canary_processes():
+    """
+    >>> old_state = test_config.setup()
+    >>> BestrefsScript("crds.bestrefs --new-context hst_0551.pmap --compare-source --load-pickles data/canary.json --differences-are-errors --processes 2")()  # doctest: +ELLIPSIS
+    CRDS - INFO -  Loading file 'data/canary.json'
+    CRDS - INFO -  Loaded 1 datasets from file 'data/canary.json' completely replacing existing headers.
+    CRDS - ERROR -  instrument='COS' type='BPIXTAB' data='LA7803FIQ' ::  Comparison difference: 'bar.fits' --> 'yae1249sl_bpix.fits' :: Would update.
+    CRDS - ERROR -  instrument='COS' type='XWLKFILE' data='LA7803FIQ' ::  Comparison difference: 'foo.fits' --> '14o2013ql_xwalk.fits' :: Would update.
+    CRDS - INFO -  2 errors
+    CRDS - INFO -  0 warnings
+    CRDS - INFO -  2 infos
+    2
+    >>> test_config.cleanup(old_state)
+    """
+
 def dt_bestrefs_multiple_updates_with_error():
     """
     >>> old_state = test_config.setup()
@@ -513,6 +529,30 @@ class TestBestrefs(test_config.CRDSTestCase):
 
         os.remove(test_copy)
 
+    def local_updates(self, cmd):
+        """Run bestrefs `cmd` on the local test data files using the test data mappings,
+        returning the script's error count and reference updates.
+        """
+        os.environ["CRDS_MAPPATH_SINGLE"] = self.data_dir
+        os.environ["CRDS_MODE"] = "local"
+        script = BestrefsScript("crds.bestrefs --new-context hst_0002.pmap --compare-source-bestrefs --all-types "
+                                "--files data/j8bt05njq_raw.fits data/j8bt06o6q_raw.fits data/j8bt09jcq_raw.fits " + cmd)
+        return script(), dict(script.updates)
+
+    def test_bestrefs_batched_matches_unbatched(self):
+        config.BESTREFS_BATCH_SIZE.set(0)
+        try:
+            unbatched = self.local_updates("")
+        finally:
+            config.BESTREFS_BATCH_SIZE.reset()
+        self.assertEqual(len(unbatched[1]), 3)
+        self.assertEqual(self.local_updates(""), unbatched)
+
+    def test_bestrefs_processes_matches_serial(self):
+        serial = self.local_updates("")
+        self.assertEqual(len(serial[1]), 3)
+        self.assertEqual(self.local_updates("--processes 2"), serial)
+
 
 # ==================================================================================
 
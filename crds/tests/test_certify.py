@@ -1,4 +1,5 @@
 import os
+import io
 import doctest
 from pprint import pprint as pp
 
@@ -9,13 +10,14 @@ from nose.tools import assert_raises, assert_true, assert_false
 
 # ==================================================================================
 
-from crds.core import utils, log, exceptions
+from crds.core import utils, log, exceptions, rmap
 from crds import client
 from crds import data_file
 from crds import certify
 from crds.certify import CertifyScript
 from crds.certify import generic_tpn
 from crds.certify import validators
+from crds.certify import mapping_parser
 
 from crds.tests import test_config
 
@@ -2131,6 +2133,30 @@ class TestCertify(test_config.CRDSTestCase):
         header = data_file.get_header(self.data("16j16005o_apd.fits"))
         checker.check_column("data/16j16005o_apd.fits", header)
 
+    def test_table_mode_differing_rows(self):
+        from crds.certify.certify import differing_rows
+        old = np.array([1.0, np.nan, np.nan, 2.0])
+        new = np.array([2.5, 1.0, np.nan, np.nan, 2.0])
+        rows = np.array([3, 2, 1, 0])
+        assert_true(differing_rows(old, new, np.arange(4), rows).tolist() == [True, False, True, True])
+        assert_true(differing_rows(old, new, np.arange(4), np.array([0, 3, 2, 4])).tolist() == [True, False, False, False])
+        old_arrays = np.array([[1.0, np.nan], [1.0, 2.0]])
+        assert_true(differing_rows(old_arrays, old_arrays.copy(), np.arange(2), np.arange(2)).tolist() == [True, False])
+        strings = np.array(["A", "B"], dtype=object)
+        assert_true(differing_rows(strings, np.array(["A", "C"]), np.arange(2), np.arange(2)).tolist() == [False, True])
+
+    def test_column_validator_summarizes_invalid_rows(self):
+        info = generic_tpn.TpnInfo('FILTER1','C', 'C', 'R', ["F475W", "F555W"])
+        checker = validators.validator(info)
+        with self.assertRaisesRegex(ValueError,
+            r"^Value 'F606W' is not one of \['F475W', 'F555W'\] : 598 of 694 rows are invalid,  first at rows \[4, 5, "):
+            checker.check_column(self.data("v8q14451j_idc.fits"), {})
+        info = generic_tpn.TpnInfo('DETCHIP','C', 'I', 'R', ["1:2"])
+        validators.validator(info).check_column(self.data("v8q14451j_idc.fits"), {})
+        info = generic_tpn.TpnInfo('DETCHIP','C', 'I', 'R', ["1:1"])
+        with self.assertRaisesRegex(ValueError, r"^Value for 'DETCHIP' of 2 is outside acceptable range 1:1 : 347 of 694 rows"):
+            validators.validator(info).check_column(self.data("v8q14451j_idc.fits"), {})
+
 # ------------------------------------------------------------------------------
 
     def test_sybdate_validator(self):
@@ -2218,6 +2244,23 @@ class TestCertify(test_config.CRDSTestCase):
         script = certify.CertifyScript("crds.certify crds://hst_0317.pmap --dont-recurse-mappings")
         errors = script()
 
+    def test_certify_jobs_matches_serial(self):
+        files = " ".join(self.data(name) for name in [
+            "s7g1700gl_dead_dup1.fits", "s7g1700gl_dead_dup2.fits", "v8q14451j_idc.fits", "acs_new_idc.fits"])
+        results = []
+        for jobs in [1, 2]:
+            log.reset()
+            output = io.StringIO()
+            handler = log.add_stream_handler(output)
+            try:
+                errors = certify.CertifyScript(
+                    "crds.certify " + files + " --comparison-context hst.pmap --check-rmap-updates --jobs " + str(jobs))()
+            finally:
+                log.remove_stream_handler(handler)
+            results.append((errors, log.status(), output.getvalue()))
+        assert_true(results[0][2].count("/4) as") == 4)
+        assert_true(results[0] == results[1])
+
     def test_certify_kernel_unity_validator_good(self):
         header = {'SCI_ARRAY': utils.Struct({'COLUMN_NAMES': None,
                                 'DATA': np.array([[ 0.        ,  0.0276    ,  0.        ],
@@ -2246,6 +2289,76 @@ class TestCertify(test_config.CRDSTestCase):
         checker = validators.core.KernelunityValidator(info)
         assert_raises(exceptions.BadKernelSumError, checker.check, "test.fits", header)
 
+    # ------------------------------------------------------------------------------
+
+    def test_mapping_parser_duplicate_keys(self):
+        parsing = mapping_parser.parse_mapping_text("""
+header = {
+    'mapping' : 'REFERENCE',
+    'name' : 'hst_acs_biasfile.rmap',
+    "name" : "hst_acs_biasfile_0001.rmap",
+    'observatory' : 'HST',
+    'instrument' : 'ACS',
+    'filekind' : 'BIASFILE',
+    'parkey' : (('DETECTOR',), ('DATE-OBS', 'TIME-OBS')),
+}
+
+selector = Match({
+    ('HRC',) : UseAfter({
+        '2002-03-01 00:00:00' : 'a.fits',
+        "2002-03-01 00:00:00" : 'b.fits',
+    }),
+    ("HRC",) : UseAfter({
+        '2003-03-01 00:00:00' : 'c.fits',
+    }),
+})
+""")
+        before = log.errors()
+        mapping_parser.check_duplicates(parsing)
+        self.assertEqual(log.errors() - before, 3)
+
+    def test_mapping_parser_double_quoted_keys(self):
+        parsing = mapping_parser.parse_mapping_text(r"""
+header = {
+    "name" : "hst_acs_biasfile.rmap",
+    "parkey" : (("DETECTOR", "CCDAMP"), ("DATE-OBS",)),
+    "comment" : "a \"quoted\" 'value'",
+}
+selector = {
+    ("HRC", "A") : "a.fits",
+    ('HRC', "B") : 'b.fits',
+}
+""")
+        self.assertEqual(parsing.header, [
+            ("name", "hst_acs_biasfile.rmap"),
+            ("parkey", (("DETECTOR", "CCDAMP"), ("DATE-OBS",))),
+            ("comment", "a \"quoted\" 'value'"),
+        ])
+        self.assertEqual(parsing.selector, [(("HRC", "A"), "a.fits"), (("HRC", "B"), "b.fits")])
+
+    def test_mapping_parser_malformed_position(self):
+        for text, message in [
+                ("header = {\n    'name' : 'x',\n    'parkey' : ('A',\n}\nselector = {}",
+                 "Expected a name at line 4 column 1"),
+                ("header = {}\nselector = Bogus({})",
+                 "Unknown selector or value 'Bogus' at line 2 column 12"),
+                ("header = {}\nselector = {} extra",
+                 "Expected end of mapping at line 2 column 15"),
+                ("header = { 'name' : 'x\n}\nselector = {}",
+                 "Expected string at line 1 column 21"),
+            ]:
+            with self.assertRaisesRegex(exceptions.MappingFormatError, message):
+                mapping_parser.parse_mapping_text(text)
+
+    def test_mapping_parser_large_rmap(self):
+        parsing = mapping_parser.parse_mapping("data/hst_wfpc2_darkfile.rmap")
+        loaded = rmap.ReferenceMapping.from_file("data/hst_wfpc2_darkfile.rmap")
+        self.assertEqual(dict(parsing.header), dict(loaded.header))
+        self.assertEqual(parsing.selector.instantiate(loaded.header).format(), loaded.selector.format())
+        before = log.errors()
+        mapping_parser.check_duplicates(parsing)
+        self.assertEqual(log.errors(), before)
+
 
 # ==================================================================================
 
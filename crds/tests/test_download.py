@@ -0,0 +1,220 @@
+"""Tests for the CRDS client FileCacher download engine run against a local
+http.server standing in for the CRDS server.
+"""
+import os
+import time
+import hashlib
+import threading
+import unittest
+from http import server
+
+from crds.core import config
+from crds.core.exceptions import CrdsDownloadError
+from crds.client import api
+from crds.tests import test_config
+
+# ==============================================================================
+
+class RangeRequestHandler(server.BaseHTTPRequestHandler):
+    """Serve the in-memory `files` of the server,  honoring "Range: bytes=N-" and
+    optionally truncating the first response for names listed in `flaky`.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        name = self.path.split("/")[-1]
+        srv = self.server
+        with srv.lock:
+            srv.requests.append((name, self.headers.get("Range"), self.client_address))
+        if name not in srv.files:
+            self.send_error(404)
+            return
+        if name in srv.stalled:
+            time.sleep(2)
+        contents = srv.files[name]
+        offset = 0
+        if self.headers.get("Range"):
+            offset = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes {}-{}/{}".format(offset, len(contents)-1, len(contents)))
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(contents) - offset))
+        self.end_headers()
+        if name in srv.flaky:
+            srv.flaky.remove(name)
+            self.wfile.write(contents[offset:offset + len(contents)//2])
+            self.close_connection = True
+        else:
+            self.wfile.write(contents[offset:])
+
+    def log_message(self, *args):
+        pass
+
+class LocalFileCacher(api.FileCacher):
+    """FileCacher fetching from the local test server rather than the CRDS server."""
+    def __init__(self, base_url, *args, **keys):
+        super(LocalFileCacher, self).__init__(*args, **keys)
+        self.base_url = base_url
+
+    def get_url(self, filename):
+        return self.base_url + filename
+
+class RecordingConnections(api.KeepAliveConnections):
+    """KeepAliveConnections remembering every connection it hands out."""
+    created = []
+
+    def get(self, scheme, netloc):
+        connection = super(RecordingConnections, self).get(scheme, netloc)
+        self.created.append(connection)
+        return connection
+
+# ==============================================================================
+
+class TestDownload(test_config.CRDSTestCase):
+
+    def setUp(self):
+        super(TestDownload, self).setUp()
+        os.environ["CRDS_PATH"] = self.temp_dir
+        self.httpd = server.ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = []
+        self.httpd.flaky = set()
+        self.httpd.stalled = set()
+        self.httpd.files = {
+            "hst_acs_{:04d}_dark.fits".format(i) : os.urandom(50000 + 1000*i) for i in range(6)
+        }
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = "http://127.0.0.1:{}/".format(self.httpd.server_address[1])
+        self.old_metadata = api.get_download_metadata
+        api.get_download_metadata = self.download_metadata
+
+    def tearDown(self):
+        api.get_download_metadata = self.old_metadata
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        config.DOWNLOAD_WORKERS.reset()
+        config.DOWNLOAD_TIMEOUT.reset()
+        config.CLIENT_RETRY_COUNT.reset()
+        super(TestDownload, self).tearDown()
+
+    def download_metadata(self):
+        return { name : dict(size=str(len(contents)), sha1sum=hashlib.sha1(contents).hexdigest())
+                 for (name, contents) in self.httpd.files.items() }
+
+    def cacher(self):
+        return LocalFileCacher(self.base_url, "hst_0001.pmap")
+
+    def localpaths(self):
+        return { name : self.temp(name) for name in sorted(self.httpd.files) }
+
+    def assert_downloaded(self, localpaths):
+        for name, path in localpaths.items():
+            with open(path, "rb") as handle:
+                self.assertEqual(handle.read(), self.httpd.files[name])
+            self.assertFalse(os.path.exists(api.partial_path(path)))
+
+    def test_download_files_serial(self):
+        localpaths = self.localpaths()
+        nbytes = self.cacher().download_files(sorted(localpaths), localpaths)
+        self.assertEqual(nbytes, sum(len(contents) for contents in self.httpd.files.values()))
+        self.assert_downloaded(localpaths)
+        self.assertEqual(len(self.httpd.requests), len(localpaths))
+
+    def test_download_files_parallel_keepalive(self):
+        config.DOWNLOAD_WORKERS.set(3)
+        localpaths = self.localpaths()
+        old_connections, api.KeepAliveConnections = api.KeepAliveConnections, RecordingConnections
+        RecordingConnections.created = []
+        try:
+            nbytes = self.cacher().download_files(sorted(localpaths), localpaths)
+        finally:
+            api.KeepAliveConnections = old_connections
+        self.assertEqual(nbytes, sum(len(contents) for contents in self.httpd.files.values()))
+        self.assert_downloaded(localpaths)
+        clients = set(client for (_name, _range, client) in self.httpd.requests)
+        self.assertTrue(len(clients) <= 3)
+        self.assertEqual(len(RecordingConnections.created), len(localpaths))
+        # connections are closed once the download pool finishes
+        self.assertTrue(all(connection.sock is None for connection in RecordingConnections.created))
+
+    def test_download_timeout(self):
+        config.DOWNLOAD_WORKERS.set(2)
+        config.DOWNLOAD_TIMEOUT.set(1)
+        name = "hst_acs_0005_dark.fits"
+        self.httpd.stalled.add(name)
+        localpaths = { name : self.temp(name), "hst_acs_0000_dark.fits" : self.temp("hst_acs_0000_dark.fits") }
+        with self.assertRaisesRegex(CrdsDownloadError, "timed out"):
+            self.cacher().download_files(sorted(localpaths), localpaths)
+        self.assertFalse(os.path.exists(localpaths[name]))
+
+    def test_download_resumes_with_range(self):
+        config.CLIENT_RETRY_COUNT.set(2)
+        name = "hst_acs_0003_dark.fits"
+        self.httpd.flaky.add(name)
+        localpaths = { name : self.temp(name) }
+        self.cacher().download_files([name], localpaths)
+        self.assert_downloaded(localpaths)
+        ranges = [range_ for (rname, range_, _client) in self.httpd.requests if rname == name]
+        self.assertEqual(ranges, [None, "bytes={}-".format(len(self.httpd.files[name])//2)])
+
+    def test_download_streamed_checksum(self):
+        config.CLIENT_RETRY_COUNT.set(2)
+        self.httpd.flaky.add("hst_acs_0004_dark.fits")
+        localpaths = self.localpaths()
+        old_checksum = api.utils.checksum
+        def no_reread(path):
+            raise AssertionError("downloaded file re-read for checksum: " + repr(path))
+        api.utils.checksum = no_reread
+        try:
+            self.cacher().download_files(sorted(localpaths), localpaths)
+        finally:
+            api.utils.checksum = old_checksum
+        self.assert_downloaded(localpaths)
+
+    def test_download_failure_keeps_partial_file(self):
+        name = "hst_acs_0002_dark.fits"
+        self.httpd.flaky.add(name)
+        localpaths = { name : self.temp(name) }
+        with self.assertRaises(CrdsDownloadError):
+            self.cacher().download_files([name], localpaths)
+        self.assertFalse(os.path.exists(localpaths[name]))
+        half = len(self.httpd.files[name])//2
+        self.assertEqual(os.path.getsize(api.partial_path(localpaths[name])), half)
+        # the next download of the file resumes the partial file
+        self.cacher().download_files([name], localpaths)
+        self.assert_downloaded(localpaths)
+        ranges = [range_ for (rname, range_, _client) in self.httpd.requests if rname == name]
+        self.assertEqual(ranges, [None, "bytes={}-".format(half)])
+
+    def test_download_bad_checksum(self):
+        name = "hst_acs_0001_dark.fits"
+        localpaths = { name : self.temp(name) }
+        cacher = self.cacher()
+        metadata = self.download_metadata()
+        metadata[name]["sha1sum"] = "0" * 40
+        api.get_download_metadata = lambda: metadata
+        with self.assertRaises(CrdsDownloadError):
+            cacher.download_files([name], localpaths)
+        self.assertFalse(os.path.exists(localpaths[name]))
+        self.assertFalse(os.path.exists(api.partial_path(localpaths[name])))
+
+    def test_download_not_found_logs_error(self):
+        cacher = LocalFileCacher(self.base_url, "hst_0001.pmap", raise_exceptions=False)
+        localpaths = self.localpaths()
+        localpaths["hst_acs_9999_dark.fits"] = self.temp("hst_acs_9999_dark.fits")
+        config.DOWNLOAD_WORKERS.set(2)
+        cacher.download_files(sorted(localpaths), localpaths)
+        del localpaths["hst_acs_9999_dark.fits"]
+        self.assert_downloaded(localpaths)
+
+# ==================================================================================
+
+def tst():
+    """Run module tests."""
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDownload)
+    return unittest.TextTestRunner().run(suite)
+
+if __name__ == "__main__":
+    print(tst())
@@ -0,0 +1,119 @@
+"""Tests for the crds.bestrefs.headers InstrumentHeaderGenerator run against a local
+http.server standing in for the CRDS JSON RPC server.
+"""
+import json
+import threading
+import collections
+from http import server
+from types import SimpleNamespace
+
+from crds.core import config
+from crds.client import api
+from crds.bestrefs import headers
+from crds.tests import test_config
+
+# ==============================================================================
+
+class JsonRpcHandler(server.BaseHTTPRequestHandler):
+    """Answer get_dataset_ids and get_dataset_headers_by_id from the in-memory
+    `datasets` of the server,  recording the ids requested by each header fetch.
+    """
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        srv = self.server
+        method, params = request["method"], request["params"]
+        if method == "get_dataset_ids":
+            result = srv.ids if srv.ids is not None else list(srv.datasets)
+        elif method == "get_dataset_headers_by_id":
+            with srv.lock:
+                srv.fetches.append(tuple(params[1]))
+            result = { dataset_id : srv.datasets[dataset_id] for dataset_id in params[1] }
+        else:
+            result = None
+        response = json.dumps(dict(id=request["id"], result=result, error=None)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args):
+        pass
+
+# ==============================================================================
+
+class TestInstrumentHeaders(test_config.CRDSTestCase):
+
+    def setUp(self):
+        super(TestInstrumentHeaders, self).setUp()
+        self.httpd = server.ThreadingHTTPServer(("127.0.0.1", 0), JsonRpcHandler)
+        self.httpd.lock = threading.Lock()
+        self.httpd.fetches = []
+        self.httpd.ids = None
+        self.httpd.datasets = {
+            "J8BA{:02d}010:J8BA{:02d}ABQ".format(i, i) : dict(
+                INSTRUME="ACS", DETECTOR="HRC", DATE_OBS="2002-03-{:02d}".format(i+1), TIME_OBS="00:00:00")
+            for i in reversed(range(11))
+        }
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.old_server = api.get_crds_server()
+        api.set_crds_server("http://localhost:{}".format(self.httpd.server_address[1]))
+
+    def tearDown(self):
+        api.set_crds_server(self.old_server)
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        config.HEADER_PREFETCH_SEGMENTS.reset()
+        super(TestInstrumentHeaders, self).tearDown()
+
+    def generator(self, segment_size=3):
+        return headers.InstrumentHeaderGenerator(
+            "hst_0001.pmap", ["acs"], None, None, SimpleNamespace(max_headers_per_rpc=segment_size))
+
+    def test_prefetch_keeps_order_and_fetches_each_segment_once(self):
+        config.HEADER_PREFETCH_SEGMENTS.set(2)
+        generator = self.generator()
+        try:
+            self.assertEqual(list(generator), sorted(self.httpd.datasets))
+            executor = generator._executor
+        finally:
+            generator.close()
+        ids = sorted(self.httpd.datasets)
+        segments = [tuple(ids[i:i+3]) for i in range(0, len(ids), 3)]
+        self.assertEqual(collections.Counter(self.httpd.fetches), collections.Counter(segments))
+        self.assertIsNone(generator._executor)
+        self.assertFalse([thread for thread in executor._threads if thread.is_alive()])
+
+    def test_no_prefetch_fetches_segments_in_order(self):
+        config.HEADER_PREFETCH_SEGMENTS.set(0)
+        generator = self.generator()
+        self.assertEqual(list(generator), sorted(self.httpd.datasets))
+        generator.close()
+        ids = sorted(self.httpd.datasets)
+        self.assertEqual(self.httpd.fetches, [tuple(ids[i:i+3]) for i in range(0, len(ids), 3)])
+        self.assertIsNone(generator._executor)
+
+    def test_each_segment_fetched_by_first_source_with_duplicate_ids(self):
+        config.HEADER_PREFETCH_SEGMENTS.set(2)
+        ids = sorted(self.httpd.datasets)
+        self.httpd.ids = ids + [ids[2]]    # the duplicate straddles the first segment boundary
+        generator = self.generator()
+        fetched_for = collections.Counter()
+        fetch_source_segment = generator.fetch_source_segment
+        def counting_fetch(source):
+            fetched_for[source] += 1
+            return fetch_source_segment(source)
+        generator.fetch_source_segment = counting_fetch
+        try:
+            self.assertEqual(list(generator), sorted(self.httpd.ids))
+            # one fetch per segment,  triggered by the first source of each segment not already held
+            self.assertEqual(fetched_for, collections.Counter([ids[0], ids[3], ids[5], ids[8]]))
+            self.assertEqual(collections.Counter(self.httpd.fetches),
+                             collections.Counter([tuple(generator.segment_ids(i)) for i in range(4)]))
+            # the duplicate id still resolves to its first segment once its headers have been dropped
+            self.assertEqual(generator._source_positions[ids[2]], 2)
+            self.assertEqual(generator.header(ids[2]), self.httpd.datasets[ids[2]])
+            self.assertEqual(self.httpd.fetches.count(tuple(generator.segment_ids(0))), 2)
+            self.assertEqual(fetched_for[ids[2]], 1)
+        finally:
+            generator.close()
@@ -214,6 +214,84 @@ def dt_pickled_mappings(mapping):
     >>> test_config.cleanup(old_state)
     """
 
+def dt_context_snapshots():
+    """
+    >>> old_state = test_config.setup()
+    >>> pickle_file = config.locate_pickle("hst.pmap", "hst")
+
+    >>> loaded = heavy_client.get_pickled_mapping.uncached("hst.pmap", use_pickles=True, save_pickles=True)  # doctest: +ELLIPSIS
+    CRDS - INFO -  Saved pickled context '.../pickles/hst/hst.pmap.pkl'
+    >>> with open(pickle_file, "rb") as handle:
+    ...     handle.read(8)
+    b'CRDSSNAP'
+
+    Instruments and types are materialized from the snapshot only when selected:
+
+    >>> snapped = heavy_client.load_pickled_mapping("hst.pmap")
+    CRDS - INFO -  Loaded pickled context 'hst.pmap'
+    >>> sorted(snapped.selections._contents)
+    []
+    >>> snapped.get_imap("acs").get_rmap("darkfile")
+    ReferenceMapping('hst_acs_darkfile.rmap')
+    >>> sorted(snapped.selections._contents)
+    ['acs']
+    >>> sorted(snapped.get_imap("acs").selections._contents)
+    ['darkfile']
+    >>> loaded.difference(snapped, include_header_diffs=True, recurse_added_deleted=True)
+    []
+
+    Mappings materialized from snapshots are shared with identical mappings of other
+    snapshots and contexts loaded by rmap.load_shared_mapping():
+
+    >>> rmap.load_shared_mapping("hst_acs.imap") is snapped.get_imap("acs")
+    True
+
+    Snapshots in other formats are stale and cause get_pickled_mapping() to load
+    the mapping files instead:
+
+    >>> with open(pickle_file, "r+b") as handle:
+    ...     _ = handle.seek(8)
+    ...     _ = handle.write(b"\\xff\\xff\\xff\\xff")
+    >>> heavy_client.load_pickled_mapping("hst.pmap")  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    crds.core.heavy_client.CrdsStaleSnapshotError: Unsupported context snapshot format in '.../pickles/hst/hst.pmap.pkl'
+    >>> heavy_client.get_pickled_mapping.uncached("hst.pmap", use_pickles=True, save_pickles=False)
+    PipelineContext('hst.pmap')
+
+    Snapshots written by a different version of CRDS are also stale,  and are rebuilt
+    when pickles are being saved:
+
+    >>> import crds
+    >>> version, crds.__version__ = crds.__version__, "0.0.0"
+    >>> _ = heavy_client.get_pickled_mapping.uncached("hst.pmap", use_pickles=True, save_pickles=True)  # doctest: +ELLIPSIS
+    CRDS - INFO -  Saved pickled context '.../pickles/hst/hst.pmap.pkl'
+    >>> crds.__version__ = version
+    >>> heavy_client.load_pickled_mapping("hst.pmap")  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    crds.core.heavy_client.CrdsStaleSnapshotError: Context snapshot '.../pickles/hst/hst.pmap.pkl' was written by CRDS '0.0.0' not '...'
+    >>> heavy_client.get_pickled_mapping.uncached("hst.pmap", use_pickles=True, save_pickles=True)  # doctest: +ELLIPSIS
+    CRDS - INFO -  Saved pickled context '.../pickles/hst/hst.pmap.pkl'
+    PipelineContext('hst.pmap')
+    >>> heavy_client.load_pickled_mapping("hst.pmap")
+    CRDS - INFO -  Loaded pickled context 'hst.pmap'
+    PipelineContext('hst.pmap')
+
+    Whole context pickles written by older versions of CRDS still load:
+
+    >>> import pickle
+    >>> with open(pickle_file, "wb") as handle:
+    ...     _ = handle.write(pickle.dumps(loaded))
+    >>> heavy_client.load_pickled_mapping("hst.pmap")
+    CRDS - INFO -  Loaded pickled context 'hst.pmap'
+    PipelineContext('hst.pmap')
+
+    >>> heavy_client.remove_pickled_mapping("hst.pmap")  # doctest: +ELLIPSIS
+    CRDS - INFO -  Removed pickle for context '.../pickles/hst/hst.pmap.pkl'
+    >>> test_config.cleanup(old_state)
+    """
+
 def dt_check_parameters():
     """
     >>> old_state = test_config.setup(url="https://jwst-crds-serverless.stsci.edu", observatory="jwst")
@@ -124,6 +124,12 @@ def dt_fits_table():
 
     >>> tab.columns['DETCHIP'][:1]
     (1,)
+
+    >>> tab.column_arrays['DETCHIP'][:1].tolist()
+    [1]
+
+    >>> len(tab.rows[-2:])
+    2
     >>> test_config.cleanup(old_state)
     """
 
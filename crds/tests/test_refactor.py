@@ -6,7 +6,7 @@ import os
 from pprint import pprint as pp
 
 import crds
-from crds.core import log, exceptions
+from crds.core import log, exceptions, rmap
 from crds import data_file, diff
 from crds.refactoring import refactor
 from crds.refactoring.refactor import RefactorScript
@@ -166,6 +166,68 @@ class TestRefactor(test_config.CRDSTestCase):
 
     '''
 
+    def test_bulk_update_matches_successive_inserts(self):
+        old = rmap.load_mapping(self.data("hst_cos_deadtab.rmap"))
+        insertions = [
+            ({"DETECTOR":"FUV", "DATE-OBS":"1997-10-01", "TIME-OBS":"01:01:01"}, "s7g1700hl_dead.fits"),
+            ({"DETECTOR":"NUV", "DATE-OBS":"1996-10-01", "TIME-OBS":"00:00:00"}, "s7g1700rl_dead.fits"),
+            ({"DETECTOR":"FUV", "DATE-OBS":"1990-01-01", "TIME-OBS":"00:00:00"}, "s7g1700xl_dead.fits"),
+            ({"DETECTOR":"FUV", "DATE-OBS":"1997-10-01", "TIME-OBS":"01:01:01"}, "s7g1700yl_dead.fits"),
+        ]
+        successive = [old]
+        for header, reference in insertions:
+            successive.append(successive[-1].insert_header_reference(header, reference))
+        with old.bulk_update() as bulk:
+            for i, (header, reference) in enumerate(insertions):
+                bulk.insert_header_reference_in_place(header, reference)
+                self.assertEqual(bulk.file_matches(reference), successive[i+1].file_matches(reference))
+        self.assertEqual(bulk.format(), successive[-1].format())
+        self.assertEqual(old.format(), rmap.load_mapping(self.data("hst_cos_deadtab.rmap")).format())
+        self.assertEqual(
+            bulk.get_best_ref({"DETECTOR":"FUV", "DATE-OBS":"1998-01-01", "TIME-OBS":"00:00:00",
+                               "DEADCORR":"PERFORM"}),
+            "s7g1700yl_dead.fits")
+
+    def test_bulk_update_warns_of_overlaps_like_successive_inserts(self):
+        with open(self.data("hst_cos_deadtab.rmap")) as handle:
+            text = handle.read().replace("    'mapping' :", "    'merge_overlaps' : 'False',\n    'mapping' :")
+        old = rmap.ReferenceMapping.from_string(text, "hst_cos_deadtab.rmap", ignore_checksum=True)
+        insertions = [
+            ({"DETECTOR":"FUV|NUV", "DATE-OBS":"1997-10-01", "TIME-OBS":"00:00:00"}, "s7g1700hl_dead.fits"),
+            ({"DETECTOR":"FUV", "DATE-OBS":"1998-10-01", "TIME-OBS":"00:00:00"}, "s7g1700rl_dead.fits"),
+        ]
+        warnings = log.warnings()
+        successive = old
+        for header, reference in insertions:
+            successive = successive.insert_header_reference(header, reference)
+        successive_warnings = log.warnings() - warnings
+        warnings = log.warnings()
+        with old.bulk_update() as bulk:
+            for header, reference in insertions:
+                bulk.insert_header_reference_in_place(header, reference)
+        self.assertEqual(successive_warnings, 1)
+        self.assertEqual(log.warnings() - warnings, successive_warnings)
+        self.assertEqual(bulk.format(), successive.format())
+
+    def test_indexes_follow_insert_and_delete(self):
+        old = rmap.load_mapping(self.data("hst_cos_deadtab.rmap"))
+        self.assertEqual(old.reference_names(), ["s7g1700gl_dead.fits", "s7g1700ql_dead.fits"])
+        self.assertEqual(old.file_matches("s7g1700hl_dead.fits"), [])
+        header = {"DETECTOR":"NUV", "DATE-OBS":"1997-10-01", "TIME-OBS":"01:01:01"}
+        new = old.insert_header_reference(header, "s7g1700hl_dead.fits")
+        new.insert_in_place(dict(header, DETECTOR="FUV"), "s7g1700hl_dead.fits")
+        self.assertEqual(new.reference_names(), ["s7g1700gl_dead.fits", "s7g1700hl_dead.fits", "s7g1700ql_dead.fits"])
+        self.assertEqual([match[1:] for match in new.file_matches("s7g1700hl_dead.fits")], [
+            ((("DETECTOR", "FUV"),), (("DATE-OBS", "1997-10-01"), ("TIME-OBS", "01:01:01"))),
+            ((("DETECTOR", "NUV"),), (("DATE-OBS", "1997-10-01"), ("TIME-OBS", "01:01:01"))),
+        ])
+        new.insert_in_place(header, "s7g1700rl_dead.fits")
+        self.assertEqual(len(new.file_matches("s7g1700hl_dead.fits")), 1)
+        newer = new.delete("s7g1700gl_dead.fits")
+        self.assertEqual(newer.file_matches("s7g1700gl_dead.fits"), [])
+        self.assertEqual(newer.reference_names(), ["s7g1700hl_dead.fits", "s7g1700ql_dead.fits", "s7g1700rl_dead.fits"])
+        self.assertEqual(newer.selector.delete("s7g1700gl_dead.fits"), 0)
+
 # ==================================================================================
 
 
@@ -5,6 +5,7 @@ import os
 import json
 from pprint import pprint as pp
 import pickle
+from collections import Counter
 
 from crds import rmap, log, config, tests, utils
 from crds.client import api
@@ -463,6 +464,90 @@ def dt_imap_match_omit():
     >>> test_config.cleanup(old_state)
     """
 
+def dt_rmap_bestref_memo():
+    """
+    >>> old_state = test_config.setup()
+    >>> r = rmap.get_cached_mapping("data/hst_acs_darkfile.rmap")
+    >>> r.clear_bestref_memo()
+    >>> before = rmap.BESTREF_MEMO_COUNTS.copy()
+    >>> header = {
+    ... "DETECTOR" : "WFC",
+    ... "CCDAMP" : "ABCD",
+    ... "CCDGAIN" : "2.0",
+    ... "DATE-OBS" : "2005-04-30",
+    ... "TIME-OBS" : "16:43:00",
+    ... }
+    >>> r.get_best_ref(header)
+    'p5p15134j_drk.fits'
+    >>> r.get_best_ref(dict(header, FILTER1="CLEAR1L"))
+    'p5p15134j_drk.fits'
+    >>> r.get_best_ref(dict(header, DETECTOR="HRC"))
+    'p5p15133j_drk.fits'
+    >>> counts = rmap.BESTREF_MEMO_COUNTS - before
+    >>> counts["hits"], counts["misses"]
+    (1, 2)
+    >>> test_config.cleanup(old_state)
+    """
+
+def dt_rmap_get_best_refs_groups_headers():
+    """
+    Headers which differ only in keywords the rmap doesn't match on are looked up once.
+
+    >>> old_state = test_config.setup()
+    >>> r = rmap.get_cached_mapping("data/hst_acs_darkfile.rmap")
+    >>> r.clear_bestref_memo()
+    >>> before = rmap.BESTREF_MEMO_COUNTS.copy()
+    >>> header = {
+    ... "DETECTOR" : "WFC",
+    ... "CCDAMP" : "ABCD",
+    ... "CCDGAIN" : "2.0",
+    ... "DATE-OBS" : "2005-04-30",
+    ... "TIME-OBS" : "16:43:00",
+    ... }
+    >>> headers = { "A" : dict(header, EXPSTART="1"), "B" : dict(header, EXPSTART="2"), "C" : dict(header, DETECTOR="HRC") }
+    >>> r.get_best_refs(headers)
+    {'A': 'p5p15134j_drk.fits', 'B': 'p5p15134j_drk.fits', 'C': 'p5p15133j_drk.fits'}
+    >>> counts = rmap.BESTREF_MEMO_COUNTS - before
+    >>> counts["hits"], counts["misses"]
+    (0, 2)
+    >>> test_config.cleanup(old_state)
+    """
+
+def dt_imap_get_best_references_many():
+    """
+    >>> old_state = test_config.setup()
+    >>> p = rmap.get_cached_mapping("data/hst_acs_9999.imap")
+    >>> header = {
+    ...      "DETECTOR" : "SBC",
+    ...      "CCDAMP" : "A",
+    ...      "CCDGAIN" : "1.0",
+    ...      "DATE-OBS" : "2002-03-19",
+    ...      "TIME-OBS" : "00:34:32",
+    ...      "OBSTYPE" : "IMAGING",
+    ...      "FLATCORR" : "PERFORM",
+    ...      "DQICORR" : "PERFORM",
+    ...      "DRIZCORR" : "PERFORM",
+    ...      "PHOTCORR" : "PERFORM",
+    ...      "ATODCORR" : "PERFORM",
+    ...      "BIASCORR" : "PERFORM",
+    ...      "FLSHCORR" : "PERFORM",
+    ...      "FLASHCUR" : "OFF",
+    ...      "SHADCORR" : "PERFORM",
+    ...      "PCTECORR" : "PERFORM",
+    ... }
+    >>> headers = { "A" : header, "B" : dict(header, DETECTOR="HRC"), "C" : dict(header, EXPSTART="1") }
+    >>> many = p.get_best_references_many(headers)
+    >>> many == { dataset_id : p.get_best_references(hdr) for (dataset_id, hdr) in headers.items() }
+    True
+    >>> many["A"] == many["C"]
+    True
+    >>> many["A"]["pctetab"]
+    'NOT FOUND n/a'
+    >>> "mlintab" in many["A"]
+    False
+    >>> test_config.cleanup(old_state)
+    """
+
 def dt_pickling():
     """
     >>> from crds import data_file
@@ -535,6 +620,59 @@ class TestRmap(test_config.CRDSTestCase):
         r = rmap.get_cached_mapping("data/hst_acs_flshfile_0252.rmap")
         self.assertEqual(r.get_derived_from().name, 'hst_acs_flshfile_0251.rmap')
 
+    def test_load_contexts_shares_unchanged_mappings(self):
+        old, new = rmap.load_contexts(["data/hst_0001.pmap", "data/hst_0002.pmap"])
+        old_acs, new_acs = old.get_imap("acs"), new.get_imap("acs")
+        self.assertIsNot(old_acs, new_acs)
+        self.assertIsNot(old_acs.get_rmap("biasfile"), new_acs.get_rmap("biasfile"))
+        self.assertIs(old_acs.get_rmap("darkfile"), new_acs.get_rmap("darkfile"))
+        self.assertIs(old.get_imap("cos"), new.get_imap("cos"))
+        self.assertIs(rmap.load_contexts(["data/hst_0002.pmap"])[0], new)
+        self.assertIsNot(rmap.load_mapping("data/hst_0002.pmap"), new)
+
+    def test_load_shared_mapping_checks_file_text(self):
+        with open(self.data("hst_acs_biasfile_0001.rmap")) as handle:
+            text = handle.read()
+        for subdir, contents in [("same", text), ("edited", text.replace("'HRC'", "'WFC'", 1))]:
+            os.mkdir(self.temp(subdir))
+            with open(os.path.join(self.temp(subdir), "hst_acs_biasfile_0001.rmap"), "w") as handle:
+                handle.write(contents)
+        shared = rmap.load_shared_mapping("hst_acs_biasfile_0001.rmap", path=self.data_dir)
+        self.assertIs(rmap.load_shared_mapping("hst_acs_biasfile_0001.rmap", path=self.temp("same")), shared)
+        # edited text with the original header sha1sum is loaded and checked,  not shared
+        with self.assertRaises(ChecksumError):
+            rmap.load_shared_mapping("hst_acs_biasfile_0001.rmap", path=self.temp("edited"))
+
+    def test_verified_mappings_reload_unchanged_files(self):
+        with open(self.data("hst_acs_biasfile_0001.rmap")) as handle:
+            text = handle.read()
+        with open(self.temp("hst_acs_biasfile_0001.rmap"), "w") as handle:
+            handle.write(text)
+        before = Counter(rmap.VERIFIED_MAPPING_COUNTS)
+        first = rmap.load_mapping("hst_acs_biasfile_0001.rmap", path=self.temp_dir)
+        second = rmap.load_mapping("hst_acs_biasfile_0001.rmap", path=self.temp_dir)
+        counts = rmap.VERIFIED_MAPPING_COUNTS - before
+        self.assertEqual((counts["hits"], counts["misses"]), (1, 1))
+        self.assertIsNot(first, second)
+        self.assertEqual(first.format(), second.format())
+        with open(self.temp("hst_acs_biasfile_0001.rmap"), "a") as handle:
+            handle.write("\n")
+        with self.assertRaises(ChecksumError):
+            rmap.load_mapping("hst_acs_biasfile_0001.rmap", path=self.temp_dir)
+
+    def test_trusted_cached_mappings_skip_checksum(self):
+        os.environ["CRDS_MAPPATH_SINGLE"] = self.data_dir
+        with self.assertRaises(ChecksumError):
+            rmap.load_mapping("hst-bad-xsum.rmap")
+        config.TRUST_CACHED_MAPPINGS.set(True)
+        try:
+            r = rmap.load_mapping("hst-bad-xsum.rmap")
+        finally:
+            config.TRUST_CACHED_MAPPINGS.reset()
+        self.assertEqual(r.filekind, "deadtab")
+        with self.assertRaises(ChecksumError):
+            rmap.load_mapping("hst-bad-xsum.rmap")
+
     def test_missing_required_header_key(self):
         with self.assertRaises(MissingHeaderKeyError):
             r = rmap.load_mapping("data/hst_acs_darkfile_missing_key.rmap")
@@ -942,6 +1080,63 @@ selector = Match({
         self.assertEqual(dheader.SUBTYPE, "N/A")
         self.assertEqual(dheader.DARKCORR, "PERFORM")
 
+    def test_rmap_bestref_memo_keeps_warnings(self):
+        header = { "DETECTOR" : "WFC", "DATE-OBS" : "2005-04-30", "TIME-OBS" : "16:43:00" }   # no PCTECORR
+        headers = [dict(header, EXPSTART=str(i)) for i in range(3)]
+        def warnings_for(memo_size):
+            config.BESTREF_MEMO_SIZE.set(memo_size)
+            try:
+                r = rmap.ReferenceMapping.from_file("data/hst_acs_pctetab.rmap")
+            finally:
+                config.BESTREF_MEMO_SIZE.reset()
+            before = log.warnings()
+            refs = [r.get_best_ref(hdr) for hdr in headers]
+            return refs, log.warnings() - before
+        unmemoized = warnings_for(0)
+        self.assertEqual(unmemoized, (["w591643nj_cte.fits"]*3, 3))
+        self.assertEqual(warnings_for(10000), unmemoized)
+
+    def test_rmap_bestref_memo_follows_exception_trap(self):
+        r = rmap.ReferenceMapping.from_file("data/hst_acs_darkfile.rmap")
+        header = { "DETECTOR" : "WFC", "CCDAMP" : "ABCD", "CCDGAIN" : "2.0",
+                   "DATE-OBS" : "1990-01-01", "TIME-OBS" : "00:00:00" }
+        old_trap = log.set_exception_trap(True)
+        try:
+            self.assertTrue(r.get_best_ref(header).startswith("NOT FOUND"))
+            log.set_exception_trap(False)
+            with self.assertRaises(CrdsLookupError):
+                r.get_best_ref(header)
+        finally:
+            log.set_exception_trap(old_trap)
+
+    def test_rmap_get_best_refs_matches_get_best_ref(self):
+        r = rmap.ReferenceMapping.from_file("data/hst_acs_darkfile.rmap")
+        headers = {
+            "hrc_%d" % i : { "DETECTOR" : "HRC", "CCDAMP" : "A", "CCDGAIN" : "1.0",
+                             "DATE-OBS" : "2006-0%d-01" % (i+1), "TIME-OBS" : "00:00:00" }
+            for i in range(4)
+        }
+        headers["wfc_early"] = { "DETECTOR" : "WFC", "CCDAMP" : "ABCD", "CCDGAIN" : "2.0",
+                                 "DATE-OBS" : "1990-01-01", "TIME-OBS" : "00:00:00" }
+        old_trap = log.set_exception_trap(True)
+        try:
+            single = { dataset_id : r.get_best_ref(header) for (dataset_id, header) in headers.items() }
+            r = rmap.ReferenceMapping.from_file("data/hst_acs_darkfile.rmap")
+            self.assertEqual(r.get_best_refs(headers), single)
+        finally:
+            log.set_exception_trap(old_trap)
+
+    def test_rmap_get_best_refs_keeps_warnings(self):
+        r = rmap.ReferenceMapping.from_file("data/hst_acs_pctetab.rmap")
+        header = { "DETECTOR" : "WFC", "DATE-OBS" : "2005-04-30", "TIME-OBS" : "16:43:00" }   # no PCTECORR
+        headers = { str(i) : dict(header, EXPSTART=str(i)) for i in range(3) }
+        before = log.warnings()
+        self.assertEqual(r.get_best_refs(headers), dict.fromkeys(headers, "w591643nj_cte.fits"))
+        self.assertEqual(log.warnings() - before, 3)
+        before = log.warnings()
+        self.assertEqual(r.get_best_refs(headers, skip_logged=True), {})
+        self.assertEqual(log.warnings() - before, 1)
+
 # ==================================================================================
 
 
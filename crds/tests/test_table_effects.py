@@ -3,7 +3,7 @@ import doctest
 
 from crds import tests
 from crds.tests import test_config
-from crds.bestrefs import BestrefsScript
+from crds.bestrefs import BestrefsScript, table_effects
 
 def dt_table_effects_default_always_reprocess():
     """
@@ -96,6 +96,30 @@ def dt_table_effects_reprocess_no():
     >>> test_config.cleanup(old_state)
     """
 
+def dt_table_effects_are_different_memo():
+    """
+    Test: COS WCPTAB comparisons are remembered by references and mode values.
+
+    >>> old_state = test_config.setup()
+    >>> table_effects.clear_cache()
+    >>> table_effects.ARE_DIFFERENT_MEMO_COUNTS.clear()
+
+    >>> for opt_elem in ["G185M", "G230L", "G230L", "G185M"]:
+    ...     deep_look = table_effects.DeepLook.from_filekind("cos", "wcptab")
+    ...     deep_look.are_different({"OPT_ELEM" : opt_elem}, "data/x2i1559gl_wcp.fits", "data/xaf1429el_wcp.fits")
+    ...     print(opt_elem, deep_look.is_different, deep_look.message)
+    G185M False Selection rules have executed and the selected rows are the same.
+    G230L True Selection rules have executed and the selected rows are different.
+    G230L True Selection rules have executed and the selected rows are different.
+    G185M False Selection rules have executed and the selected rows are the same.
+
+    >>> table_effects.ARE_DIFFERENT_MEMO_COUNTS["hits"], table_effects.ARE_DIFFERENT_MEMO_COUNTS["misses"]
+    (2, 2)
+
+    >>> table_effects.clear_cache()
+    >>> test_config.cleanup(old_state)
+    """
+
 def main():
     """Run module tests,  for now just doctests only."""
     from crds.tests import test_table_effects, tstmod
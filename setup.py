@@ -73,7 +73,7 @@ setup_pars = {
 
 TEST_DEPS = ["lockfile", "mock", "nose", "pytest", "pylint", "flake8", "bandit",]
 
-SUBMISSION_DEPS = ["requests", "lxml", "parsley"]
+SUBMISSION_DEPS = ["requests", "lxml"]
 
 setup(name="crds",
       provides=["crds"],
@@ -89,7 +89,7 @@ setup(name="crds",
       extras_require={
           "jwst": ["jwst"],
           "roman" : ["roman_datamodels"],
-          "submission": ["requests", "lxml", "parsley"],
+          "submission": ["requests", "lxml"],
           "dev" : ["ipython","jupyterlab","ansible","helm",
                    "nose-cprof", "coverage"],
           "test" : TEST_DEPS,